@@ -0,0 +1,109 @@
+"""
+融合技術指標核心的效能測試
+
+比較 TechnicalIndicatorCalculator.calculate_all_indicators 的兩種實作:
+- pandas: 五次獨立的 pandas 運算 (fused=False)
+- fused: FusedIndicatorKernel (fused=True)
+
+使用方式 (於專案根目錄):
+    python experiments/optimization/fused_indicators_20261016/benchmark.py --sizes 100000 1000000 10000000
+    python experiments/optimization/fused_indicators_20261016/benchmark.py --sizes 100000000   # 需要約 25 GB 記憶體
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / 'src'))
+
+from utils.technical_indicators import TechnicalIndicatorCalculator  # noqa: E402
+
+# 每一列約需要的位元組數: 輸入 3 欄、兩種實作的輸出各 10 欄與計算時的暫存
+BYTES_PER_ROW = 8 * 30
+
+
+def make_bars(n: int, seed: int = 0, kind: str = 'random_walk') -> pd.DataFrame:
+    """
+    產生 K 線
+
+    - random_walk: 隨機漫步 (價格精度 1e-5，與外匯報價相同)
+    - low_vol_trend: 每根 K 線上漲 1e-6、雜訊 1e-8 的低波動趨勢 (收盤價平方和最容易抵銷的情況)
+    """
+    rng = np.random.default_rng(seed)
+    if kind == 'low_vol_trend':
+        close = 1.1 + np.arange(n) * 1e-6 + rng.normal(0, 1e-8, n)
+        scale = 1e-8
+    else:
+        close = np.round(1.1 + np.cumsum(rng.normal(0, 1e-4, n)), 5)
+        scale = 5e-5
+    open_ = np.empty(n)
+    open_[0] = close[0]
+    open_[1:] = close[:-1]
+    wick = np.abs(rng.normal(0, scale, (2, n)))
+    if kind != 'low_vol_trend':
+        wick = np.round(wick, 5)
+    return pd.DataFrame({
+        'high': np.maximum(open_, close) + wick[0],
+        'low': np.minimum(open_, close) - wick[1],
+        'close': close
+    })
+
+
+def available_memory() -> int:
+    """可用的實體記憶體 (無法取得時回傳 0)"""
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return 0
+
+
+def run(df: pd.DataFrame, fused: bool, repeat: int) -> tuple:
+    """回傳 (最短耗時, 計算結果)"""
+    calculator = TechnicalIndicatorCalculator(fused=fused)
+    best, result = np.inf, None
+    for _ in range(repeat):
+        result = None
+        prices = df.copy()
+        started = time.perf_counter()
+        result = calculator.calculate_all_indicators(prices)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--kind', choices=['random_walk', 'low_vol_trend'], default='random_walk')
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'pandas (s)':>11} {'fused (s)':>10} {'speedup':>8} {'max abs diff':>13} {'max rel diff':>13}")
+    for n in args.sizes:
+        memory = available_memory()
+        if memory and n * BYTES_PER_ROW > memory:
+            print(f"{n:>12} 略過: 需要約 {n * BYTES_PER_ROW / 1024 ** 3:.1f} GB 記憶體")
+            continue
+        df = make_bars(n, kind=args.kind)
+        repeat = args.repeat if n <= 10_000_000 else 1
+        pandas_time, expected = run(df, fused=False, repeat=repeat)
+        fused_time, actual = run(df, fused=True, repeat=repeat)
+        diff, relative = 0.0, 0.0
+        for col in expected.columns:
+            x = expected[col].to_numpy()
+            error = np.abs(x - actual[col].to_numpy())
+            diff = max(diff, float(np.nanmax(error, initial=0.0)))
+            # 相對誤差只計算參考值不為 0 的位置
+            nonzero = np.abs(x) > 0
+            relative = max(relative, float(np.nanmax(error[nonzero] / np.abs(x[nonzero]), initial=0.0)))
+        print(f"{n:>12} {pandas_time:>11.3f} {fused_time:>10.3f} {pandas_time / fused_time:>7.2f}x "
+              f"{diff:>13.2e} {relative:>13.2e}")
+        del df, expected, actual
+
+
+if __name__ == '__main__':
+    main()
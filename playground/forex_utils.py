@@ -274,16 +274,91 @@ class FeatureEngineering:
 
         return win_df
 
-    def create_features(self, df):
+    def windowed_array(self, X, y, window_size: int, shift: int = 1, segment_ids=None):
+        """
+        直接在數值特徵矩陣上建立滑動窗口，取代 windowed + prepare_sequence_data。
+
+        使用 numpy 的 stride 技巧建立視圖（view），不會為每一列產生 Python list，
+        也不會複製 window_size 倍的資料，因此較大的窗口（例如 64～256）也能使用。
+
+        參數:
+        - X: 特徵矩陣，形狀為 (樣本數, 特徵數) 的 numpy 陣列或 DataFrame。
+        - y: 與 X 每一列對齊的標籤向量（例如 create_features 產生的 y）。
+        - window_size: 整數，每個窗口的時間步數。
+        - shift: 標籤相對於窗口最後一個時間步的位移，預設為 1，與 windowed 的對齊方式相同。
+        - segment_ids: 可選，每一列所屬的連續區段編號（例如 GapIndex.segment_ids）。
+          指定時只保留窗口與標籤都在同一區段內的樣本，不會跨越時間間隔。
+
+        回傳:
+        - tuple: (窗口特徵, 標籤)
+            - 窗口特徵: 形狀為 (樣本數, window_size, 特徵數) 的 float32 唯讀視圖，時間由舊到新排列
+            - 標籤: 形狀為 (樣本數,) 的 float32 陣列
+
+        說明:
+        - 只有在 X 不是 float32 連續陣列時，才會將特徵矩陣轉換一次（大小與 X 相同）
+        - 標籤超出範圍或為 NaN 的窗口會被移除，不會像 windowed 一樣補 0
+        """
+        if window_size < 1:
+            raise ValueError("window_size 必須大於 0")
+        if shift < 0:
+            raise ValueError("shift 不能小於 0")
+
+        # 轉換為連續的 float32 矩陣（已經是的話不會複製）
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        y = np.asarray(y, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(-1, 1)
+        if len(X) != len(y):
+            raise ValueError("X 與 y 的長度必須相同")
+
+        # 以第 t 列為結尾的窗口，對應的標籤為 y[t + shift]
+        labels = y[window_size - 1 + shift:]
+        if len(labels) == 0:
+            print(f"windowed_array Size = {window_size}  : 資料不足")
+            return np.empty((0, window_size, X.shape[1]), dtype=np.float32), labels
+
+        # sliding_window_view 回傳 (樣本數, 特徵數, window_size)，轉置為 (樣本數, window_size, 特徵數)
+        windows = np.lib.stride_tricks.sliding_window_view(X, window_size, axis=0)
+        windows = windows.transpose(0, 2, 1)[:len(labels)]
+
+        # 移除沒有標籤的窗口；NaN 只出現在尾端時仍然保持為視圖
+        valid = ~np.isnan(labels)
+        if segment_ids is not None:
+            # 窗口第一列、最後一列與標籤所在列必須屬於同一區段
+            segment_ids = np.asarray(segment_ids)
+            if len(segment_ids) != len(X):
+                raise ValueError("segment_ids 與 X 的長度必須相同")
+            first = segment_ids[:len(labels)]
+            last = segment_ids[window_size - 1:window_size - 1 + len(labels)]
+            target = segment_ids[window_size - 1 + shift:]
+            valid &= (first == last) & (last == target)
+        if not valid.all():
+            last_valid = len(valid) - np.argmax(valid[::-1]) if valid.any() else 0
+            if valid[:last_valid].all():
+                windows, labels = windows[:last_valid], labels[:last_valid]
+            else:
+                windows, labels = windows[valid], labels[valid]
+
+        print(f"windowed_array Size = {window_size}  : {windows.shape}")
+
+        return windows, labels
+
+    def create_features(self, df, columnar=False):
         """
         將處理過的數據轉換為機器學習模型可用的特徵和標籤格式。
         
         參數:
             df (pandas.DataFrame): 包含縮放後特徵的數據框
+            columnar (bool): 為 True 時改用 create_feature_matrix 輸出連續的特徵矩陣，
+                不會把每一列轉換成 Python list
             
         返回:
             tuple: (特徵和標籤的數據框, 特徵數量)
+                   columnar=True 時為 (特徵矩陣, 標籤向量, 特徵欄位名稱)
         """
+        if columnar:
+            return self.create_feature_matrix(df)
+
         # 找出所有縮放後的特徵列
         feature_columns = [col for col in df.columns if col.startswith('scaled_')]
         
@@ -309,6 +384,43 @@ class FeatureEngineering:
         
         return ml_data, feature_count
 
+    def create_feature_matrix(self, df, dtype=np.float32):
+        """
+        將縮放後的特徵輸出為連續的數值矩陣，並另外回傳標籤向量。
+
+        參數:
+            df (pandas.DataFrame): 包含縮放後特徵的數據框
+            dtype: 特徵矩陣的資料型別，預設為 float32
+
+        返回:
+            tuple: (特徵矩陣, 標籤向量, 特徵欄位名稱)
+                - 特徵矩陣: 形狀為 (樣本數, 特徵數) 的 C 連續 numpy 陣列
+                - 標籤向量: 下一行的 scaled_close，最後一筆為 NaN
+                - 特徵欄位名稱: 與矩陣欄位順序一致（依照 df 中的欄位順序）
+
+        說明:
+            - 可以直接交給 windowed_array 建立窗口，不需要經過 list 欄位
+            - 特徵數量即為 len(特徵欄位名稱)
+        """
+        # 找出所有縮放後的特徵列，保持在 df 中的順序
+        feature_columns = [col for col in df.columns if col.startswith('scaled_')]
+
+        # 檢查是否有特徵列
+        if not feature_columns:
+            print("警告：沒有找到縮放後的特徵列")
+            return np.empty((0, 0), dtype=dtype), np.empty(0, dtype=dtype), []
+
+        # 一次轉換為連續的數值矩陣
+        X = np.ascontiguousarray(df[feature_columns].to_numpy(dtype=dtype))
+
+        # 使用下一行的 scaled_close 作為標籤
+        y = df["scaled_close"].shift(-1).to_numpy(dtype=dtype)
+
+        # 輸出數據形狀和特徵數量
+        print(f"Feature Matrix     : {X.shape}      Number of Features:  {len(feature_columns)}")
+
+        return X, y, feature_columns
+
 class DataPreprocessing:
     """
     數據預處理類別，用於處理原始金融數據。
@@ -342,13 +454,36 @@ class DataPreprocessing:
             print(f"{file_path} 找不到檔案。")
             return None
 
+    def load_parquet(self, path, columns=None):
+        """
+        載入 Parquet 檔案或分區目錄（例如 data/raw/symbol=EURUSD/timeframe=M5），
+        保留欄位型別與時間索引，不存在則回傳 None。
+        
+        參數:
+            path (str): Parquet 檔案或目錄的路徑
+            columns (list, optional): 只讀取這些欄位
+            
+        返回:
+            pandas.DataFrame 或 None: 成功載入則返回數據框，失敗則返回 None
+        """
+        # 檢查檔案或目錄是否存在
+        if os.path.exists(path):
+            # 只讀取需要的欄位，不需重新解析文字
+            df = pd.read_parquet(path, columns=columns)
+            print(f"{path} 載入成功。")
+            return df
+        else:
+            print(f"{path} 找不到檔案。")
+            return None
+
 
     def prepare_sequence_data(self, data: pd.DataFrame, window_size: int, features: int) -> np.ndarray:
         """
         將原始資料轉換成 (樣本數, window_size, features) 的格式，用於序列模型（例如 LSTM）。
 
         Args:
-            data (pd.DataFrame): 輸入的資料，每個欄位包含序列型態的 list。
+            data (pd.DataFrame | np.ndarray): 輸入的資料，每個欄位包含序列型態的 list；
+                也可以直接傳入 windowed_array 產生的 (樣本數, window_size, features) 陣列。
             window_size (int): 每個樣本的時間步長。
             features (int): 每個時間步的特徵數。
 
@@ -356,6 +491,12 @@ class DataPreprocessing:
             np.ndarray: 轉換後的資料，形狀為 (樣本數, window_size, features)。
         """
 
+        # windowed_array 的輸出已經是正確的形狀，只在必要時轉換型別
+        if isinstance(data, np.ndarray):
+            reshaped_data = data.reshape(data.shape[0], window_size, features)
+            print(f"Reshaped Data: {reshaped_data.shape}")
+            return reshaped_data.astype('float32', copy=False)
+
         # 將所有欄位（每列是 list）先各自堆疊成 numpy array
         stacked_data = np.concatenate([np.stack(data[col].values) for col in data.columns], axis=1)
 
@@ -157,10 +157,62 @@ class FeatureEngineering:
 
         return win_df
 
-    def create_features(self, df):
+    def windowed_array(self, X, y, window_size: int, shift: int = 1, segment_ids=None):
+        """
+        在數值特徵矩陣上以 stride 視圖建立 (樣本數, window_size, 特徵數) 的 float32 窗口與對齊的標籤。
+        指定 segment_ids（例如 GapIndex.segment_ids）時只保留窗口與標籤都在同一區段內的樣本。
+        """
+        if window_size < 1:
+            raise ValueError("window_size 必須大於 0")
+        if shift < 0:
+            raise ValueError("shift 不能小於 0")
+
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        y = np.asarray(y, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(-1, 1)
+        if len(X) != len(y):
+            raise ValueError("X 與 y 的長度必須相同")
+
+        # 以第 t 列為結尾的窗口，對應的標籤為 y[t + shift]
+        labels = y[window_size - 1 + shift:]
+        if len(labels) == 0:
+            print(f"windowed_array Size = {window_size}  : 資料不足")
+            return np.empty((0, window_size, X.shape[1]), dtype=np.float32), labels
+
+        windows = np.lib.stride_tricks.sliding_window_view(X, window_size, axis=0)
+        windows = windows.transpose(0, 2, 1)[:len(labels)]
+
+        # 移除沒有標籤的窗口；NaN 只出現在尾端時仍然保持為視圖
+        valid = ~np.isnan(labels)
+        if segment_ids is not None:
+            # 窗口第一列、最後一列與標籤所在列必須屬於同一區段
+            segment_ids = np.asarray(segment_ids)
+            if len(segment_ids) != len(X):
+                raise ValueError("segment_ids 與 X 的長度必須相同")
+            first = segment_ids[:len(labels)]
+            last = segment_ids[window_size - 1:window_size - 1 + len(labels)]
+            target = segment_ids[window_size - 1 + shift:]
+            valid &= (first == last) & (last == target)
+        if not valid.all():
+            last_valid = len(valid) - np.argmax(valid[::-1]) if valid.any() else 0
+            if valid[:last_valid].all():
+                windows, labels = windows[:last_valid], labels[:last_valid]
+            else:
+                windows, labels = windows[valid], labels[valid]
+
+        print(f"windowed_array Size = {window_size}  : {windows.shape}")
+
+        return windows, labels
+
+    def create_features(self, df, columnar=False):
         """
         將處理過的數據轉換為機器學習模型可用的特徵和標籤格式。
+        columnar=True 時回傳 (特徵矩陣, 標籤向量, 特徵欄位名稱)。
         """
+        if columnar:
+            return self.create_feature_matrix(df)
+
         feature_columns = [col for col in df.columns if col.startswith('scaled_')]
         
         if not feature_columns:
@@ -175,4 +227,21 @@ class FeatureEngineering:
         
         print(f"Features & Lables  : {ml_data.shape}      Number of Features:  {feature_count}")       
         
-        return ml_data, feature_count 
\ No newline at end of file
+        return ml_data, feature_count
+
+    def create_feature_matrix(self, df, dtype=np.float32):
+        """
+        將縮放後的特徵輸出為連續的數值矩陣，回傳 (特徵矩陣, 標籤向量, 特徵欄位名稱)。
+        """
+        feature_columns = [col for col in df.columns if col.startswith('scaled_')]
+
+        if not feature_columns:
+            print("警告：沒有找到縮放後的特徵列")
+            return np.empty((0, 0), dtype=dtype), np.empty(0, dtype=dtype), []
+
+        X = np.ascontiguousarray(df[feature_columns].to_numpy(dtype=dtype))
+        y = df["scaled_close"].shift(-1).to_numpy(dtype=dtype)
+
+        print(f"Feature Matrix     : {X.shape}      Number of Features:  {len(feature_columns)}")
+
+        return X, y, feature_columns
@@ -36,12 +36,35 @@ class DataPreprocessing:
             print(f"{file_path} 找不到檔案。")
             return None
 
+    def load_parquet(self, path, columns=None):
+        """
+        載入 Parquet 檔案或分區目錄（例如 data/raw/symbol=EURUSD/timeframe=M5），
+        保留欄位型別與時間索引，不存在則回傳 None。
+        
+        參數:
+            path (str): Parquet 檔案或目錄的路徑
+            columns (list, optional): 只讀取這些欄位
+            
+        返回:
+            pandas.DataFrame 或 None: 成功載入則返回數據框，失敗則返回 None
+        """
+        # 檢查檔案或目錄是否存在
+        if os.path.exists(path):
+            # 只讀取需要的欄位，不需重新解析文字
+            df = pd.read_parquet(path, columns=columns)
+            print(f"{path} 載入成功。")
+            return df
+        else:
+            print(f"{path} 找不到檔案。")
+            return None
+
     def prepare_sequence_data(self, data: pd.DataFrame, window_size: int, features: int) -> np.ndarray:
         """
         將原始資料轉換成 (樣本數, window_size, features) 的格式，用於序列模型（例如 LSTM）。
 
         Args:
-            data (pd.DataFrame): 輸入的資料，每個欄位包含序列型態的 list。
+            data (pd.DataFrame | np.ndarray): 輸入的資料，每個欄位包含序列型態的 list；
+                也可以直接傳入 windowed_array 產生的 (樣本數, window_size, features) 陣列。
             window_size (int): 每個樣本的時間步長。
             features (int): 每個時間步的特徵數。
 
@@ -49,6 +72,12 @@ class DataPreprocessing:
             np.ndarray: 轉換後的資料，形狀為 (樣本數, window_size, features)。
         """
 
+        # windowed_array 的輸出已經是正確的形狀，只在必要時轉換型別
+        if isinstance(data, np.ndarray):
+            reshaped_data = data.reshape(data.shape[0], window_size, features)
+            print(f"Reshaped Data: {reshaped_data.shape}")
+            return reshaped_data.astype('float32', copy=False)
+
         # 將所有欄位（每列是 list）先各自堆疊成 numpy array
         stacked_data = np.concatenate([np.stack(data[col].values) for col in data.columns], axis=1)
 
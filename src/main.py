@@ -1,113 +1,149 @@
+import argparse
 import sys
 import os
 from datetime import datetime, timedelta
 import pandas as pd
-import MetaTrader5 as mt5
  
 
 # 添加父目錄到系統路徑
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.mt5_trading import MT5Connection, MT5History
 from utils.utils import setup_logger
 from utils.data_processing import DataProcessor
 from utils.technical_indicators import TechnicalIndicatorCalculator
+from utils.storage import ParquetStore
+from utils.feature_store import FeatureStore
+from utils.stage_cache import StageCache
+from utils.dtype_policy import DtypePolicy
+from utils.chunked_processing import ChunkedProcessor
+from utils.pipeline import SELECTED_FEATURES, MultiSymbolPipelineRunner, add_derived_features, fetch_bars, process_frame
 
 # 設置日誌
 logger = setup_logger('forex_trading')
 
-def get_data():
-    """
-    從 MT5 獲取 EUR/USD 的歷史數據
+# 交易品種與時間週期
+SYMBOL = "EURUSD"
+TIMEFRAME = "M5"
+
+def get_data(symbol: str = SYMBOL, timeframe: str = TIMEFRAME, count: int = 99000, data_dir: str = None, backend=None):
     """
-    logger.info("開始從 MT5 獲取數據")
+    從 MT5 獲取指定交易品種的歷史數據
     
-    # 初始化 MT5 連接
-    connection = MT5Connection()
-    connection.connect()  # 移除 if 判斷，因為 connect() 方法內部已經有錯誤處理
-    
-    try:
-        # 創建歷史數據處理器
-        history = MT5History(connection)
-        
-        # 直接獲取 99000 筆歷史數據 (M1 時間週期)
-        df = history.get_historical_data("EURUSD", "M5", count=99000)
-        
-        if df is None:
-            logger.error("獲取數據失敗")
-            return None
-            
-        logger.info(f"成功獲取 {len(df)} 筆數據")
-        return df
-        
-    except Exception as e:
-        logger.error(f"獲取數據時發生錯誤: {str(e)}")
-        return None
-    finally:
-        connection.disconnect()
+    指定 data_dir 時會使用本地 K 線快取，只向 MT5 下載快取中缺少的數據；
+    指定 backend (例如 SimulatedMT5) 時可在沒有 MT5 終端機的環境執行
+    """
+    return fetch_bars(symbol, timeframe, count=count, data_dir=data_dir, backend=backend)
 
-def main():
-    logger.info("程式開始執行")
-    
-    # 創建數據目錄
+def get_data_dir() -> str:
+    """取得並建立數據目錄"""
     data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
     os.makedirs(data_dir, exist_ok=True)
     logger.info(f"數據目錄已創建: {data_dir}")
+    return data_dir
+
+def main(timeframe: str = TIMEFRAME, render_plots: bool = True, use_cache: bool = True,
+         compact_dtypes: bool = False, chunk_size: int = None):
+    logger.info(f"程式開始執行: {SYMBOL} {timeframe}")
+    
+    # 創建數據目錄
+    data_dir = get_data_dir()
     
     # 獲取數據
-    df = get_data()
+    df = get_data(timeframe=timeframe, data_dir=data_dir)
     if df is None:
         logger.error("無法獲取數據，程式終止")
         return
     
-    # 保存原始數據
-    raw_data_path = os.path.join(data_dir, 'raw_data.csv')
-    df.to_csv(raw_data_path)
-    logger.info(f"原始數據已保存到: {raw_data_path}")
+    # 保存原始數據 (Parquet 列式儲存)
+    store = ParquetStore(data_dir)
+    store.write(df, SYMBOL, timeframe, dataset='raw')
+    logger.info(f"原始數據已保存到: {store.root_dir}")
     
     # 初始化數據處理器
-    processor = DataProcessor(data_dir)
-    
-    # 數據處理
-    df = processor.process_spread(df)
-    df = processor.process_tick_volume(df)
-    df = processor.process_price_changes(df)
+    # 處理階段快取：輸入數據與參數都未改變的階段直接讀取快取
+    cache = StageCache(os.path.join(data_dir, 'cache')) if use_cache else None
+    # 精簡型別：浮點欄位保存為 float32、旗標保存為 int8 (計算仍使用 float64)
+    dtype_policy = DtypePolicy() if compact_dtypes else None
+    processor = DataProcessor(data_dir, render_plots=render_plots, timeframe=timeframe, cache=cache,
+                              dtype_policy=dtype_policy)
     
-    # 計算技術指標
-    calculator = TechnicalIndicatorCalculator()
-    df = calculator.calculate_all_indicators(df)
-    
-    # 檢查數據質量
-    processor.check_data_quality(df)
+    calculator = TechnicalIndicatorCalculator(features=SELECTED_FEATURES)
+    feature_store = FeatureStore(data_dir)
+    if chunk_size:
+        # 分段處理：從已保存的原始數據逐段讀取，每段處理後立即寫入，不保留整個數據框
+        del df
+        
+        def finalize(part):
+            part = add_derived_features(part)
+            feature_store.save(part, SYMBOL, timeframe, calculator)
+            return part
+        
+        try:
+            rows = ChunkedProcessor(processor, calculator, chunk_size).process_store(
+                store, SYMBOL, timeframe, finalize=finalize)
+        finally:
+            processor.close()
+        logger.info(f"分段處理後的數據 {rows} 筆已保存到: {store.root_dir}")
+    else:
+        # 數據處理、技術指標與特徵選擇 (診斷圖表在背景繪製)
+        try:
+            df = process_frame(df, processor, calculator)
+        finally:
+            processor.close()
+        
+        # 保存處理後的數據
+        store.write(df, SYMBOL, timeframe, dataset='processed', mode='overwrite')
+        logger.info(f"處理後的數據已保存到: {store.root_dir}")
+        
+        # 依指標參數保存特徵版本，其他訓練或實驗可直接讀取
+        feature_store.save(df, SYMBOL, timeframe, calculator)
     
-    # 自創特徵：EMA 差距
-    df["ema_gap"] = df["ema_fast"] - df["ema_slow"]
-    logger.info("已計算 EMA 差距特徵")
-
-    # 選擇使用的特徵欄位
-    selected_features = [
-        'open', 'high', 'low', 'close', 'tick_volume_log',
-        'is_tick_volume_outlier', 'is_spread_outlier_threshold',
-        'ema_fast', 'ema_slow', 'ema_gap',
-        'rsi', 'macd', 'macd_signal',
-        'bb_middle', 'bb_upper', 'bb_lower',
-        'atr',
-        'price_change_pct', 'volatility', 'normalized_price',
-        'price_change_ma', 'price_change_volatility'
-    ]
+    if dtype_policy is not None:
+        logger.info(f"各階段的記憶體用量 (MB):\n{dtype_policy.summary().to_string(index=False)}")
+    logger.info("程式執行完成")
 
-    # 去除 NaN（技術指標開頭幾筆資料可能為空）
-    df.dropna(subset=selected_features, inplace=True)
-    logger.info(f"去除 NaN 後剩餘 {len(df)} 筆數據")
+def run_symbols(symbols, timeframes, workers=None, max_terminal_connections=2, render_plots=True, use_cache=True,
+                compact_dtypes=False):
+    """
+    以行程池平行處理多個交易品種與時間週期
+    
+    每個 (交易品種, 時間週期) 為獨立任務，單一任務失敗不影響其他任務
+    """
+    logger.info(f"開始平行處理 {len(symbols)} 個交易品種")
     
-    # 保存處理後的數據
-    processed_data_path = os.path.join(data_dir, 'processed_data.csv')
-    df.to_csv(processed_data_path)
-    logger.info(f"處理後的數據已保存到: {processed_data_path}")
+    runner = MultiSymbolPipelineRunner(
+        get_data_dir(),
+        max_workers=workers,
+        max_terminal_connections=max_terminal_connections,
+        render_plots=render_plots,
+        use_cache=use_cache,
+        compact_dtypes=compact_dtypes
+    )
+    results = runner.run(symbols, timeframes)
+    runner.summarize(results)
     logger.info("程式執行完成")
+    return results
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="外匯數據獲取與處理")
+    parser.add_argument('--symbols', nargs='+', help="要處理的交易品種，未指定時只處理 %s" % SYMBOL)
+    parser.add_argument('--timeframes', nargs='+', default=[TIMEFRAME], help="時間週期")
+    parser.add_argument('--workers', type=int, default=None, help="工作行程數量，預設為 CPU 核心數")
+    parser.add_argument('--terminal-connections', type=int, default=2, help="同時連接 MT5 終端機的最大數量")
+    parser.add_argument('--no-plots', action='store_true', help="不繪製診斷圖表")
+    parser.add_argument('--no-cache', action='store_true', help="不使用處理階段快取")
+    parser.add_argument('--compact-dtypes', action='store_true', help="以 float32 / int8 保存處理後的數據")
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help="分段處理每段的 K 線數量 (只處理單一交易品種時使用)，未指定時一次處理全部數據")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    main()
-    
-    
-    
\ No newline at end of file
+    args = parse_args()
+    if args.symbols:
+        run_symbols(args.symbols, args.timeframes, args.workers, args.terminal_connections,
+                    not args.no_plots, not args.no_cache, args.compact_dtypes)
+    else:
+        # 未指定交易品種時依序處理 SYMBOL 的每個時間週期
+        for timeframe in args.timeframes:
+            main(timeframe, render_plots=not args.no_plots, use_cache=not args.no_cache,
+                 compact_dtypes=args.compact_dtypes, chunk_size=args.chunk_size)
@@ -0,0 +1,296 @@
+"""
+向量化回測模組
+
+此模組以陣列運算回測 main.py 輸出的處理後數據 (OHLC、spread、技術指標) 與交易信號：
+1. 一次回測多個信號欄位 (例如數千組參數產生的信號)，所有計算都是 (K 線, 信號) 的二維陣列運算
+2. 信號在 K 線收盤產生，於 execution_lag 根 K 線後的開盤價成交，不會使用未來數據
+3. 考慮點差的成交價: MT5 的 K 線為 bid 價格，買入以 ask (bid + spread) 成交，賣出以 bid 成交
+4. 計算損益、資金曲線、最大回撤與交易統計 (交易以 bincount 一次彙整，不需要逐筆迴圈)
+5. 依信號欄位分批計算，記憶體用量與信號數量無關
+
+損益以 1 單位部位的價格變動計算 (與報價相同的單位)，summary 另以點 (point) 表示。
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .utils import setup_logger
+
+# 外匯市場每年的交易時間 (52 週 × 5 天)
+FX_SECONDS_PER_YEAR = 52 * 5 * 86400
+
+SUMMARY_COLUMNS = [
+    'total_pnl', 'total_points', 'total_cost', 'n_trades', 'win_rate', 'avg_trade',
+    'profit_factor', 'max_drawdown', 'sharpe', 'exposure', 'turnover'
+]
+
+SignalInput = Union[pd.DataFrame, pd.Series, np.ndarray, Dict[str, np.ndarray]]
+
+
+@dataclass
+class BacktestResult:
+    """回測結果"""
+    summary: pd.DataFrame
+    equity: Optional[pd.DataFrame] = None
+
+
+class VectorizedBacktester:
+    """
+    向量化回測類別
+
+    範例:
+        >>> signals = pd.DataFrame({
+        ...     f"ema_{fast}_{slow}": np.sign(grid.ema([fast])[:, 0] - grid.ema([slow])[:, 0])
+        ...     for fast, slow in pairs
+        ... }, index=df.index)
+        >>> result = VectorizedBacktester(point=0.00001).run(df, signals)
+        >>> result.summary.sort_values('sharpe', ascending=False).head()
+    """
+
+    def __init__(
+        self,
+        point: float = 0.00001,
+        execution_lag: int = 1,
+        commission: float = 0.0,
+        default_spread: float = 0.0,
+        periods_per_year: Optional[float] = None,
+        block_size: int = 128
+    ):
+        """
+        初始化回測器
+
+        Args:
+            point (float): 最小報價單位，spread 欄位以此為單位
+            execution_lag (int): 信號產生後第幾根 K 線的開盤價成交 (至少為 1)
+            commission (float): 每單位成交量的手續費 (價格單位)
+            default_spread (float): 數據沒有 spread 欄位時使用的點差 (點)
+            periods_per_year (float, optional): 每年的 K 線數量 (年化 Sharpe 使用)，預設依時間索引推斷
+            block_size (int): 每批計算的信號數量
+        """
+        if execution_lag < 1:
+            raise ValueError("execution_lag 必須至少為 1，否則會使用未來數據")
+        if block_size < 1:
+            raise ValueError("block_size 必須大於 0")
+        self.logger = setup_logger('VectorizedBacktester')
+        self.point = point
+        self.execution_lag = execution_lag
+        self.commission = commission
+        self.default_spread = default_spread
+        self.periods_per_year = periods_per_year
+        self.block_size = block_size
+
+    # ---------- 輸入 ----------
+    @staticmethod
+    def _signal_matrix(signals: SignalInput, n: int) -> Tuple[np.ndarray, List[str]]:
+        """
+        將信號轉換為 (n, k) 的陣列與欄位名稱
+
+        保留原始型別 (例如 int8)，每批計算時才轉換為 float64，避免一次複製所有信號。
+        """
+        if isinstance(signals, pd.Series):
+            names, values = [signals.name or 'signal'], signals.to_numpy()[:, None]
+        elif isinstance(signals, pd.DataFrame):
+            names, values = [str(col) for col in signals.columns], signals.to_numpy()
+        elif isinstance(signals, dict):
+            names = [str(name) for name in signals]
+            values = np.column_stack([np.asarray(value) for value in signals.values()])
+        else:
+            values = np.asarray(signals)
+            if values.ndim == 1:
+                values = values[:, None]
+            names = [f"signal_{i}" for i in range(values.shape[1])]
+        if values.shape[0] != n:
+            raise ValueError(f"信號長度 {values.shape[0]} 與數據長度 {n} 不同")
+        return values, names
+
+    def _periods_per_year(self, index: pd.Index) -> float:
+        """每年的 K 線數量"""
+        if self.periods_per_year is not None:
+            return self.periods_per_year
+        if isinstance(index, pd.DatetimeIndex) and len(index) > 1:
+            step = np.median(np.diff(index.asi8)) / 1e9
+            if step > 0:
+                return FX_SECONDS_PER_YEAR / step
+        return 252.0
+
+    def positions(self, signals: np.ndarray) -> np.ndarray:
+        """
+        將信號轉換為每根 K 線持有的部位 (信號延後 execution_lag 根 K 線)
+
+        Args:
+            signals (np.ndarray): (n, k) 的信號，正數為多單、負數為空單、0 為空手
+
+        Returns:
+            np.ndarray: (n, k) 的部位
+        """
+        positions = np.zeros_like(signals)
+        positions[self.execution_lag:] = signals[:-self.execution_lag]
+        return positions
+
+    # ---------- 回測 ----------
+    def run(
+        self,
+        df: pd.DataFrame,
+        signals: SignalInput,
+        keep_equity: bool = False
+    ) -> BacktestResult:
+        """
+        執行回測
+
+        Args:
+            df (pd.DataFrame): 包含 open、close (與 spread) 欄位的數據，例如 main.py 保存的 processed 數據
+            signals: 信號，可為 DataFrame (每欄一個策略)、Series、二維陣列或 {名稱: 陣列}
+            keep_equity (bool): 是否保留每個信號的資金曲線 (n × k，信號數量多時會佔用大量記憶體)
+
+        Returns:
+            BacktestResult: summary 為每個信號一列的統計，equity 為資金曲線 (keep_equity=True 時)
+        """
+        for col in ('open', 'close'):
+            if col not in df.columns:
+                self.logger.error(f"數據框缺少 {col} 欄位")
+                raise ValueError(f"數據框缺少 {col} 欄位")
+
+        n = len(df)
+        matrix, names = self._signal_matrix(signals, n)
+        k = matrix.shape[1]
+        self.logger.info(f"開始回測 {k} 個信號，共 {n} 根 K 線")
+
+        open_ = df['open'].to_numpy(dtype=np.float64)
+        close = df['close'].to_numpy(dtype=np.float64)
+        if 'spread' in df.columns:
+            spread = df['spread'].to_numpy(dtype=np.float64) * self.point
+        else:
+            spread = np.full(n, self.default_spread * self.point)
+
+        # 每根 K 線的價格變動: 開盤跳空 (由上一根的部位承擔) 與開盤到收盤 (由新部位承擔)
+        gap = np.zeros(n)
+        gap[1:] = open_[1:] - close[:-1]
+        body = close - open_
+
+        periods = self._periods_per_year(df.index)
+        summaries = []
+        equity_blocks = []
+        for start in range(0, k, self.block_size):
+            # 轉置為 (信號, 時間) 的連續陣列，NaN 視為空手
+            block = np.ascontiguousarray(matrix[:, start:start + self.block_size].T, dtype=np.float64)
+            np.nan_to_num(block, copy=False, nan=0.0)
+            summary, equity = self._run_block(block, gap, body, spread, periods, keep_equity)
+            summaries.append(summary)
+            if keep_equity:
+                equity_blocks.append(equity)
+
+        summary = pd.DataFrame(np.vstack(summaries), index=names, columns=SUMMARY_COLUMNS)
+        summary['n_trades'] = summary['n_trades'].astype(np.int64)
+        equity = None
+        if keep_equity:
+            equity = pd.DataFrame(np.hstack(equity_blocks), index=df.index, columns=names, copy=False)
+        self.logger.info("回測完成")
+        return BacktestResult(summary=summary, equity=equity)
+
+    def _run_block(
+        self,
+        signals: np.ndarray,
+        gap: np.ndarray,
+        body: np.ndarray,
+        spread: np.ndarray,
+        periods_per_year: float,
+        keep_equity: bool
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        回測一批信號，回傳 (統計, 資金曲線)
+
+        陣列以 (信號, 時間) 配置，累加都沿著連續的記憶體進行。
+        """
+        k, n = signals.shape
+        position = np.zeros_like(signals)
+        position[:, self.execution_lag:] = signals[:, :-self.execution_lag]
+        previous = np.zeros_like(position)
+        previous[:, 1:] = position[:, :-1]
+        change = position - previous
+
+        # 成交成本: 買入支付點差 (ask = bid + spread)，每單位成交量另收手續費
+        cost = np.maximum(change, 0.0) * spread
+        if self.commission:
+            cost += np.abs(change) * self.commission
+
+        # 開盤跳空由上一根 K 線的部位承擔，開盤到收盤由新部位承擔
+        pnl = previous * gap
+        pnl += position * body
+        pnl -= cost
+        equity = np.cumsum(pnl, axis=1)
+        drawdown = equity - np.maximum.accumulate(np.maximum(equity, 0.0), axis=1)
+
+        trade_stats = self._trade_stats(position, equity, gap, spread) if n else np.zeros((k, 4))
+        total = equity[:, -1] if n else np.zeros(k)
+        n_trades, wins, gross_profit, gross_loss = trade_stats.T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            win_rate = wins / n_trades
+            avg_trade = total / n_trades
+            profit_factor = gross_profit / gross_loss
+            std = pnl.std(axis=1, ddof=1) if n > 1 else np.full(k, np.nan)
+            sharpe = np.where(std > 0, pnl.mean(axis=1) / std * np.sqrt(periods_per_year), np.nan)
+
+        summary = np.column_stack([
+            total,
+            total / self.point,
+            cost.sum(axis=1),
+            n_trades,
+            win_rate,
+            avg_trade,
+            profit_factor,
+            drawdown.min(axis=1) if n else np.zeros(k),
+            sharpe,
+            np.count_nonzero(position, axis=1) / n if n else np.zeros(k),
+            np.abs(change).sum(axis=1)
+        ])
+        return summary, (equity.T if keep_equity else None)
+
+    def _trade_stats(
+        self,
+        position: np.ndarray,
+        equity: np.ndarray,
+        gap: np.ndarray,
+        spread: np.ndarray
+    ) -> np.ndarray:
+        """
+        交易統計 (交易數量, 獲利交易數量, 總獲利, 總虧損)
+
+        交易為同方向持倉的連續 K 線。交易的損益只需要起點與終點的資金曲線:
+            損益 = 權益[終點] - 權益[起點 - 1] - 起點的平倉部分 + 終點下一根的平倉部分
+        其中「平倉部分」是 K 線中屬於上一筆交易的開盤跳空與平倉成本，
+        因此只在交易的起點與終點取值，不需要對每根 K 線分配交易編號。
+        """
+        k, n = position.shape
+        direction = np.sign(position)
+        changed = np.ones((k, n), dtype=bool)
+        changed[:, 1:] = direction[:, 1:] != direction[:, :-1]
+        starts = changed & (direction != 0)
+        ends = np.ones((k, n), dtype=bool)
+        ends[:, :-1] = changed[:, 1:]
+        ends &= direction != 0
+
+        # 每一列的起點與終點依時間排序，第 j 個起點對應第 j 個終點
+        rows, start_cols = np.nonzero(starts)
+        _, end_cols = np.nonzero(ends)
+
+        def closing_part(cols: np.ndarray) -> np.ndarray:
+            """方向改變的 K 線中屬於上一筆交易的損益 (上一根部位的跳空減去平倉成本)"""
+            valid = (cols > 0) & (cols < n)
+            safe = np.clip(cols, 1, n - 1)
+            held = position[rows, safe - 1]
+            cost = np.abs(held) * (np.where(held < 0, spread[safe], 0.0) + self.commission)
+            return np.where(valid, held * gap[safe] - cost, 0.0)
+
+        before = np.where(start_cols > 0, equity[rows, np.maximum(start_cols - 1, 0)], 0.0)
+        trade_pnl = equity[rows, end_cols] - before - closing_part(start_cols) + closing_part(end_cols + 1)
+
+        won = trade_pnl > 0
+        return np.column_stack([
+            np.bincount(rows, minlength=k),
+            np.bincount(rows, weights=won, minlength=k),
+            np.bincount(rows, weights=np.where(won, trade_pnl, 0.0), minlength=k),
+            np.bincount(rows, weights=np.where(trade_pnl < 0, -trade_pnl, 0.0), minlength=k)
+        ])
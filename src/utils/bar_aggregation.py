@@ -0,0 +1,302 @@
+"""
+報價聚合模組
+
+此模組從報價數據在本地建立 K 線，不需要向終端機請求：
+1. 時間 K 線：MT5 的所有時間週期 (M1 ~ MN1) 以及任意自訂週期 (例如 '7min'、'90s')
+2. 資訊驅動 K 線：固定筆數 (tick bars)、固定成交量 (volume bars)、失衡 (imbalance bars)
+
+輸出格式與 MT5History.get_historical_data 相同
+(time 索引，open, high, low, close, tick_volume, spread, real_volume)。
+"""
+
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from .utils import setup_logger
+
+MS_PER_MINUTE = 60 * 1000
+MS_PER_DAY = 24 * 60 * MS_PER_MINUTE
+
+# 固定長度的 MT5 時間週期 (毫秒)
+TIMEFRAME_MS = {
+    'M1': MS_PER_MINUTE,
+    'M5': 5 * MS_PER_MINUTE,
+    'M15': 15 * MS_PER_MINUTE,
+    'M30': 30 * MS_PER_MINUTE,
+    'H1': 60 * MS_PER_MINUTE,
+    'H4': 240 * MS_PER_MINUTE,
+    'D1': MS_PER_DAY
+}
+
+# 1970-01-01 是星期四，MT5 的週 K 線從星期日開始
+_WEEK_OFFSET_MS = 3 * MS_PER_DAY
+_WEEK_MS = 7 * MS_PER_DAY
+
+
+class TickBarAggregator:
+    """
+    報價聚合器類別
+
+    所有 K 線都以單次向量化運算建立：先找出每根 K 線在報價中的起點，
+    再以 numpy 的 reduceat 一次計算所有 K 線的開高低收與成交量。
+
+    - 價格預設使用 bid (與 MT5 K 線相同)
+    - spread 為 K 線內的最小點差 (點數)
+    - 報價必須依時間排序
+    """
+
+    # 失衡 K 線每次區塊搜尋的報價數量範圍
+    MIN_SCAN_BLOCK = 256
+    MAX_SCAN_BLOCK = 1 << 16
+
+    def __init__(self, point: float = 0.00001, price: str = 'bid'):
+        """
+        初始化報價聚合器
+
+        Args:
+            point (float): 最小報價單位，用於將點差換算為點數
+            price (str): 建立 K 線使用的價格欄位 ('bid'、'ask' 或 'last')
+        """
+        self.logger = setup_logger('TickBarAggregator')
+        self.point = point
+        self.price = price
+
+    # ---------- 共用 ----------
+    def _aggregate(self, ticks: Union[np.ndarray, pd.DataFrame], starts: np.ndarray, times_msc: np.ndarray) -> pd.DataFrame:
+        """
+        依每根 K 線的起點聚合報價
+
+        Args:
+            ticks: 報價數據
+            starts (np.ndarray): 每根 K 線第一筆報價的位置 (遞增)
+            times_msc (np.ndarray): 每根 K 線的時間 (Unix 毫秒)
+
+        Returns:
+            pd.DataFrame: K 線數據
+        """
+        price = np.asarray(ticks[self.price], dtype=np.float64)
+        spread_points = np.rint((np.asarray(ticks['ask'], dtype=np.float64) - np.asarray(ticks['bid'], dtype=np.float64)) / self.point)
+        volume = np.asarray(ticks['volume'])
+        ends = np.r_[starts[1:], len(price)]
+
+        df = pd.DataFrame({
+            'open': price[starts],
+            'high': np.maximum.reduceat(price, starts),
+            'low': np.minimum.reduceat(price, starts),
+            'close': price[ends - 1],
+            'tick_volume': (ends - starts).astype(np.uint64),
+            'spread': np.minimum.reduceat(spread_points, starts).astype(np.int32),
+            'real_volume': np.add.reduceat(volume, starts).astype(np.uint64)
+        }, index=pd.DatetimeIndex(pd.to_datetime(times_msc, unit='ms'), name='time'))
+        return df
+
+    @staticmethod
+    def _times(ticks: Union[np.ndarray, pd.DataFrame]) -> np.ndarray:
+        """取得報價時間 (Unix 毫秒)"""
+        return np.asarray(ticks['time_msc'], dtype=np.int64)
+
+    @staticmethod
+    def _empty() -> pd.DataFrame:
+        """沒有報價時回傳的空 K 線"""
+        return pd.DataFrame(
+            columns=['open', 'high', 'low', 'close', 'tick_volume', 'spread', 'real_volume'],
+            index=pd.DatetimeIndex([], name='time')
+        )
+
+    # ---------- 時間 K 線 ----------
+    def bucket_start(self, times_msc: np.ndarray, timeframe: str) -> np.ndarray:
+        """
+        計算每筆報價所屬 K 線的開盤時間
+
+        Args:
+            times_msc (np.ndarray): 報價時間 (Unix 毫秒)
+            timeframe (str): MT5 時間週期 (M1 ~ MN1) 或 pandas 時間長度字串 (例如 '7min')
+
+        Returns:
+            np.ndarray: K 線開盤時間 (Unix 毫秒)
+        """
+        if timeframe == 'MN1':
+            months = times_msc.astype('datetime64[ms]').astype('datetime64[M]')
+            return months.astype('datetime64[ms]').astype(np.int64)
+        if timeframe == 'W1':
+            return (times_msc - _WEEK_OFFSET_MS) // _WEEK_MS * _WEEK_MS + _WEEK_OFFSET_MS
+
+        width = self.timeframe_ms(timeframe)
+        return times_msc - times_msc % width
+
+    def bucket_end(self, bucket_starts: np.ndarray, timeframe: str) -> np.ndarray:
+        """
+        計算 K 線的收盤時間 (下一根 K 線的開盤時間)
+
+        Args:
+            bucket_starts (np.ndarray): K 線開盤時間 (Unix 毫秒)
+            timeframe (str): MT5 時間週期 (M1 ~ MN1) 或 pandas 時間長度字串
+
+        Returns:
+            np.ndarray: K 線收盤時間 (Unix 毫秒)
+        """
+        if timeframe == 'MN1':
+            months = bucket_starts.astype('datetime64[ms]').astype('datetime64[M]') + 1
+            return months.astype('datetime64[ms]').astype(np.int64)
+        if timeframe == 'W1':
+            return bucket_starts + _WEEK_MS
+        return bucket_starts + self.timeframe_ms(timeframe)
+
+    def timeframe_ms(self, timeframe: str) -> int:
+        """
+        取得固定長度時間週期的毫秒數 (不適用於 W1、MN1)
+
+        Args:
+            timeframe (str): MT5 時間週期 (M1 ~ D1) 或 pandas 時間長度字串
+
+        Returns:
+            int: 時間週期長度 (毫秒)
+        """
+        width = TIMEFRAME_MS.get(timeframe)
+        if width is None:
+            try:
+                width = int(pd.Timedelta(timeframe).total_seconds() * 1000)
+            except ValueError:
+                self.logger.error(f"不支援的時間週期: {timeframe}")
+                raise ValueError(f"不支援的時間週期: {timeframe}")
+        if width <= 0:
+            raise ValueError(f"不支援的時間週期: {timeframe}")
+        return width
+
+    def time_bars(self, ticks: Union[np.ndarray, pd.DataFrame], timeframe: str) -> pd.DataFrame:
+        """
+        建立時間 K 線
+
+        Args:
+            ticks: 報價數據 (copy_ticks_* 結構化陣列、TickStore 記錄或 get_ticks 數據框)
+            timeframe (str): MT5 時間週期 (M1 ~ MN1) 或 pandas 時間長度字串 (例如 '7min')
+
+        Returns:
+            pd.DataFrame: K 線數據，沒有報價的時段不會產生 K 線
+        """
+        times = self._times(ticks)
+        if len(times) == 0:
+            return self._empty()
+
+        buckets = self.bucket_start(times, timeframe)
+        starts = np.r_[0, np.flatnonzero(np.diff(buckets)) + 1]
+        bars = self._aggregate(ticks, starts, buckets[starts])
+
+        self.logger.info(f"已從 {len(times)} 筆報價建立 {len(bars)} 根 {timeframe} K 線")
+        return bars
+
+    # ---------- 資訊驅動 K 線 ----------
+    def tick_bars(self, ticks: Union[np.ndarray, pd.DataFrame], ticks_per_bar: int) -> pd.DataFrame:
+        """
+        建立固定筆數的 K 線
+
+        Args:
+            ticks: 報價數據
+            ticks_per_bar (int): 每根 K 線的報價筆數
+
+        Returns:
+            pd.DataFrame: K 線數據，時間為每根 K 線第一筆報價的時間
+        """
+        if ticks_per_bar < 1:
+            raise ValueError("ticks_per_bar 必須大於 0")
+        times = self._times(ticks)
+        if len(times) == 0:
+            return self._empty()
+
+        starts = np.arange(0, len(times), ticks_per_bar)
+        return self._aggregate(ticks, starts, times[starts])
+
+    def volume_bars(self, ticks: Union[np.ndarray, pd.DataFrame], volume_per_bar: float, volume_field: str = 'volume') -> pd.DataFrame:
+        """
+        建立固定成交量的 K 線
+
+        累積成交量每跨過一次 volume_per_bar 的倍數就開始新的 K 線，
+        跨過門檻的報價屬於前一根 K 線，超出的部分不會帶到下一根。
+
+        Args:
+            ticks: 報價數據
+            volume_per_bar (float): 每根 K 線的成交量
+            volume_field (str): 成交量欄位 ('volume' 或 'volume_real')
+
+        Returns:
+            pd.DataFrame: K 線數據，時間為每根 K 線第一筆報價的時間
+        """
+        if volume_per_bar <= 0:
+            raise ValueError("volume_per_bar 必須大於 0")
+        times = self._times(ticks)
+        if len(times) == 0:
+            return self._empty()
+
+        volume = np.asarray(ticks[volume_field], dtype=np.float64)
+        before = np.cumsum(volume) - volume
+        bar_ids = np.floor(before / volume_per_bar)
+        starts = np.r_[0, np.flatnonzero(np.diff(bar_ids)) + 1]
+        return self._aggregate(ticks, starts, times[starts])
+
+    def imbalance_bars(
+        self,
+        ticks: Union[np.ndarray, pd.DataFrame],
+        threshold: float,
+        volume_field: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        建立失衡 K 線
+
+        以 tick rule 判斷每筆報價的方向 (價格上漲 +1、下跌 -1、不變沿用前一筆)，
+        K 線內方向的累積值 (或乘上成交量) 絕對值達到 threshold 時結束該 K 線並重新累積。
+
+        Args:
+            ticks: 報價數據
+            threshold (float): 失衡門檻
+            volume_field (str, optional): 指定時以成交量加權 (volume imbalance)，否則為 tick imbalance
+
+        Returns:
+            pd.DataFrame: K 線數據，時間為每根 K 線第一筆報價的時間
+        """
+        if threshold <= 0:
+            raise ValueError("threshold 必須大於 0")
+        times = self._times(ticks)
+        n = len(times)
+        if n == 0:
+            return self._empty()
+
+        # tick rule：價格不變時沿用前一筆的方向
+        price = np.asarray(ticks[self.price], dtype=np.float64)
+        sign = np.sign(np.diff(price, prepend=price[0]))
+        nonzero = np.where(sign != 0, np.arange(n), 0)
+        np.maximum.accumulate(nonzero, out=nonzero)
+        signed = sign[nonzero]
+        if volume_field is not None:
+            signed = signed * np.asarray(ticks[volume_field], dtype=np.float64)
+        cumulative = np.cumsum(signed)
+
+        # 每根 K 線以區塊向量化搜尋第一個達到門檻的位置，迴圈次數等於 K 線數量；
+        # 第一個區塊為隨機漫步達到門檻的預期報價數 (threshold / 每筆失衡的均方根)²，
+        # 找不到時區塊加倍，每根 K 線的搜尋量與其長度同數量級
+        rms = float(np.sqrt(np.mean(signed * signed)))
+        expected = (threshold / rms) ** 2 if rms > 0 else float(self.MAX_SCAN_BLOCK)
+        first_block = int(min(max(expected, self.MIN_SCAN_BLOCK), self.MAX_SCAN_BLOCK))
+        starts = []
+        start = 0
+        while start < n:
+            starts.append(start)
+            base = cumulative[start - 1] if start > 0 else 0.0
+            end = None
+            lo = start
+            block = first_block
+            while lo < n:
+                hi = min(lo + block, n)
+                hits = np.flatnonzero(np.abs(cumulative[lo:hi] - base) >= threshold)
+                if len(hits) > 0:
+                    end = lo + hits[0] + 1
+                    break
+                lo = hi
+                block = min(block * 2, self.MAX_SCAN_BLOCK)
+            if end is None:
+                break
+            start = end
+
+        starts = np.asarray(starts, dtype=np.int64)
+        return self._aggregate(ticks, starts, times[starts])
@@ -0,0 +1,249 @@
+"""
+K 線本地快取模組
+
+此模組在 MT5History.get_historical_data 前面加上一層本地快取：
+1. 以交易品種與時間週期為鍵，將 K 線存放在 ParquetStore
+2. 記錄已下載的時間範圍，只向終端機請求缺少的頭尾或中間區段
+3. 合併新數據時以時間去除重複
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+from .storage import ParquetStore
+from .utils import setup_logger, TIMEFRAME_DELTAS
+
+Interval = Tuple[pd.Timestamp, pd.Timestamp]
+
+
+def _merge_intervals(intervals: List[Interval]) -> List[Interval]:
+    """合併重疊或相接的時間區間"""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _missing_intervals(start: pd.Timestamp, end: pd.Timestamp, covered: List[Interval]) -> List[Interval]:
+    """計算 [start, end] 中尚未被覆蓋的時間區間"""
+    missing: List[Interval] = []
+    cursor = start
+    for cov_start, cov_end in covered:
+        if cov_end < cursor:
+            continue
+        if cov_start > end:
+            break
+        if cov_start > cursor:
+            missing.append((cursor, cov_start))
+        cursor = max(cursor, cov_end)
+    if cursor < end:
+        missing.append((cursor, end))
+    return missing
+
+
+class BarCache:
+    """
+    K 線本地快取類別
+
+    使用方式與 MT5History.get_historical_data 相同：
+        >>> cache = BarCache(MT5History(connection), ParquetStore('data'))
+        >>> df = cache.get_historical_data("EURUSD", "M5", count=99000)
+
+    已快取範圍只記錄到實際收到的倒數第二根 K 線 (K 線時間為伺服器時間，不與本地時鐘比較)，
+    可能尚未收盤的最後一根 K 線下次讀取時會重新下載並覆蓋。
+    """
+
+    COVERAGE_FILE = 'coverage.json'
+    # 伺服器時間與本地時鐘的最大差距 (時區差距不超過一天)
+    SERVER_CLOCK_MARGIN = pd.Timedelta(days=1)
+
+    def __init__(self, history, store: ParquetStore, dataset: str = 'bar_cache'):
+        """
+        初始化 K 線快取
+
+        Args:
+            history: MT5History 實例 (或提供相同 get_historical_data 介面的物件)
+            store (ParquetStore): 快取使用的儲存
+            dataset (str): 快取在儲存中的數據集名稱
+        """
+        self.history = history
+        self.store = store
+        self.dataset = dataset
+        self.logger = setup_logger('BarCache')
+        self.logger.info("初始化 BarCache")
+
+    # ---------- 已快取範圍 ----------
+    def _coverage_path(self, symbol: str, timeframe: str) -> str:
+        """取得已快取範圍記錄檔的路徑"""
+        return os.path.join(self.store.series_dir(symbol, timeframe, self.dataset), self.COVERAGE_FILE)
+
+    def get_coverage(self, symbol: str, timeframe: str) -> List[Interval]:
+        """
+        取得已快取的時間範圍
+
+        Args:
+            symbol (str): 交易品種
+            timeframe (str): 時間週期
+
+        Returns:
+            List[Tuple[pd.Timestamp, pd.Timestamp]]: 依時間排序且不重疊的區間
+        """
+        path = self._coverage_path(symbol, timeframe)
+        if not os.path.isfile(path):
+            return []
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return [(pd.Timestamp(start), pd.Timestamp(end)) for start, end in data]
+
+    def _add_coverage(self, symbol: str, timeframe: str, interval: Interval) -> None:
+        """記錄新下載的時間範圍"""
+        if interval[1] < interval[0]:
+            return
+        coverage = _merge_intervals(self.get_coverage(symbol, timeframe) + [interval])
+        path = self._coverage_path(symbol, timeframe)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump([[start.isoformat(), end.isoformat()] for start, end in coverage], f)
+
+    def clear(self, symbol: str, timeframe: str) -> None:
+        """
+        清除交易品種與時間週期的快取
+
+        Args:
+            symbol (str): 交易品種
+            timeframe (str): 時間週期
+        """
+        self.store.delete(symbol, timeframe, self.dataset)
+
+    # ---------- 下載與合併 ----------
+    def _fetch_range(self, symbol: str, timeframe: str, start: pd.Timestamp, end: pd.Timestamp) -> int:
+        """從終端機下載一段時間範圍並寫入快取，回傳下載筆數"""
+        self.logger.info(f"從終端機下載 {symbol} {timeframe}: {start} ~ {end}")
+        df = self.history.get_historical_data(
+            symbol, timeframe, start_time=start.to_pydatetime(), end_time=end.to_pydatetime()
+        )
+        if df is not None and len(df) > 0:
+            self.store.write(df, symbol, timeframe, self.dataset)
+        closed_until = self._closed_until(symbol, timeframe)
+        if closed_until is not None:
+            self._add_coverage(symbol, timeframe, (start, min(end, closed_until)))
+        return 0 if df is None else len(df)
+
+    def _fetch_count(self, symbol: str, timeframe: str, count: int) -> int:
+        """從終端機下載最近 count 根 K 線並寫入快取，回傳下載筆數"""
+        self.logger.info(f"從終端機下載 {symbol} {timeframe} 最近 {count} 筆")
+        df = self.history.get_historical_data(symbol, timeframe, count=count)
+        if df is None or len(df) == 0:
+            return 0
+        self.store.write(df, symbol, timeframe, self.dataset)
+        closed_until = self._closed_until(symbol, timeframe)
+        if closed_until is not None:
+            self._add_coverage(symbol, timeframe, (df.index[0], closed_until))
+        return len(df)
+
+    def _closed_until(self, symbol: str, timeframe: str) -> Optional[pd.Timestamp]:
+        """
+        開盤時間不晚於此時間的 K 線都已收盤
+
+        K 線時間為經紀商伺服器時間，無法與本地時鐘比較；快取中最新的 K 線可能尚未收盤，
+        之後已有 K 線的倒數第二根一定已收盤，因此以它的開盤時間為準。
+
+        Returns:
+            pd.Timestamp: 倒數第二根 K 線的開盤時間，快取不足兩根時回傳 None
+        """
+        partitions = self.store.partitions(symbol, timeframe, self.dataset)
+        if not partitions:
+            return None
+        # 最後一個分區可能只有一根 K 線，因此從倒數第二個分區開始讀取
+        start = pd.Timestamp(partitions[max(len(partitions) - 2, 0)])
+        df = self.store.read(symbol, timeframe, self.dataset, columns=['close'], start_time=start)
+        if df is None or len(df) < 2:
+            return None
+        return df.index[-2]
+
+    @classmethod
+    def _latest_end(cls) -> pd.Timestamp:
+        """
+        請求最新數據時使用的結束時間
+
+        伺服器時間可能早於本地時鐘，結束時間加上 SERVER_CLOCK_MARGIN，避免漏掉最新的 K 線；
+        只用於下載，已快取範圍由實際收到的 K 線決定。
+        """
+        return pd.Timestamp(datetime.now()) + cls.SERVER_CLOCK_MARGIN
+
+    # ---------- 對外介面 ----------
+    def get_historical_data(
+        self,
+        symbol: str,
+        timeframe: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        count: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        獲取歷史K線數據，優先從本地快取讀取
+
+        Args:
+            symbol (str): 交易品種
+            timeframe (str): 時間週期 (M1, M5, M15, M30, H1, H4, D1, W1, MN1)
+            start_time (datetime, optional): 開始時間
+            end_time (datetime, optional): 結束時間
+            count (int, optional): 獲取數量
+
+        Returns:
+            pd.DataFrame: 歷史K線數據
+
+        Raises:
+            ValueError: 時間週期不支援
+        """
+        if timeframe not in TIMEFRAME_DELTAS:
+            self.logger.error(f"不支援的時間週期: {timeframe}")
+            raise ValueError(f"不支援的時間週期: {timeframe}")
+
+        if start_time or end_time:
+            return self._get_range(symbol, timeframe, start_time, end_time)
+        return self._get_latest(symbol, timeframe, count or 1000)
+
+    def _get_range(
+        self,
+        symbol: str,
+        timeframe: str,
+        start_time: Optional[datetime],
+        end_time: Optional[datetime]
+    ) -> pd.DataFrame:
+        """依時間範圍讀取，只下載缺少的區段"""
+        start = pd.Timestamp(start_time or datetime(1970, 1, 1))
+        end = pd.Timestamp(end_time) if end_time else self._latest_end()
+
+        missing = _missing_intervals(start, end, self.get_coverage(symbol, timeframe))
+        for gap_start, gap_end in missing:
+            self._fetch_range(symbol, timeframe, gap_start, gap_end)
+        if not missing:
+            self.logger.info(f"{symbol} {timeframe} {start} ~ {end} 已全部在快取中")
+
+        df = self.store.read(symbol, timeframe, self.dataset, start_time=start, end_time=end)
+        return df if df is not None else pd.DataFrame()
+
+    def _get_latest(self, symbol: str, timeframe: str, count: int) -> pd.DataFrame:
+        """讀取最近 count 根 K 線，只下載快取之後的新數據"""
+        coverage = self.get_coverage(symbol, timeframe)
+        if coverage:
+            # 補上最後一段快取之後的數據
+            last_start, last_end = coverage[-1]
+            self._fetch_range(symbol, timeframe, last_end, self._latest_end())
+            cached = self.store.read(symbol, timeframe, self.dataset, start_time=last_start)
+            if cached is not None and len(cached) >= count:
+                self.logger.info(f"{symbol} {timeframe} 最近 {count} 筆已在快取中")
+                return cached.iloc[-count:]
+
+        # 快取不足時依數量下載，與既有快取合併
+        self._fetch_count(symbol, timeframe, count)
+        df = self.store.read(symbol, timeframe, self.dataset)
+        return df.iloc[-count:] if df is not None else pd.DataFrame()
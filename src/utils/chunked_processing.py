@@ -0,0 +1,244 @@
+"""
+分段處理模組
+
+多年的 M1 歷史數據若一次載入單一數據框處理，記憶體用量隨歷史長度增加。
+此模組將 DataProcessor.process_chain (含技術指標) 改為逐段執行，峰值記憶體只與每段的長度有關：
+1. 第一次掃描 (fit) 只讀取 spread 與 tick_volume，以每個數值的出現次數計算整個數據集的四分位數，
+   異常值旗標使用與整段處理相同的 IQR 上下限 (兩者都是整數，不同數值的數量很少)
+2. 第二次掃描 (process) 在每段前面加上上一段最後 warmup_rows 根 K 線 (最長的滾動視窗)，
+   pct_change、RSI 與 ATR 需要的前一根收盤價也包含在內；處理後去除這些列
+3. EMA 與 MACD 信號線為遞迴計算，以上一段最後一列的 float64 值作為 seed 接續，結果與整段計算完全相同
+
+滾動統計 (pandas 的線上演算法與融合核心的分塊前綴和) 在重疊的視窗中重新計算，
+與整段處理只有最後幾位的浮點差異。
+"""
+
+import dataclasses
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .data_processing import DataProcessor
+from .storage import ParquetStore
+from .technical_indicators import TechnicalIndicatorCalculator
+from .utils import setup_logger
+
+
+class ChunkedProcessor:
+    """
+    分段處理類別
+
+    範例:
+        >>> chunked = ChunkedProcessor(processor, calculator, chunk_size=500_000)
+        >>> chunked.fit(store.iter_partitions(symbol, timeframe, columns=['spread', 'tick_volume']))
+        >>> for part in chunked.process(store.iter_partitions(symbol, timeframe)):
+        ...     store.write(part, symbol, timeframe, dataset='processed')
+    """
+
+    def __init__(
+        self,
+        processor: DataProcessor,
+        calculator: Optional[TechnicalIndicatorCalculator] = None,
+        chunk_size: int = 500_000
+    ):
+        """
+        初始化分段處理器
+
+        Args:
+            processor (DataProcessor): 數據處理器 (處理時不繪製診斷圖表，每段的分布只代表該段數據)
+            calculator (TechnicalIndicatorCalculator, optional): 指定時一併計算技術指標
+            chunk_size (int): 每段的 K 線數量 (不含重疊的暖機列)
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size 必須大於 0")
+        self.logger = setup_logger('ChunkedProcessor')
+        self.processor = processor
+        self.calculator = calculator
+        self.chunk_size = chunk_size
+        self.warmup_rows = self._warmup_rows()
+        self.spread_bounds: Optional[Tuple[float, float]] = None
+        self.tick_volume_bounds: Optional[Tuple[float, float]] = None
+        self.last_peak_memory_mb: Optional[float] = None
+
+    def _warmup_rows(self) -> int:
+        """
+        每段需要的前一段 K 線數量
+
+        週期 p 的滾動視窗包含目前與之前 p - 1 個數值，漲跌、真實範圍與 pct_change 另外需要前一根收盤價，
+        因此之前的 p 根 K 線即足夠。
+        """
+        windows = [self.processor.PRICE_CHANGE_WINDOW]
+        if self.calculator is not None:
+            config = self.calculator.config
+            windows += [config['rsi']['period'], config['bollinger']['period'], config['atr']['period']]
+        return max(windows)
+
+    # ---------- 第一次掃描 ----------
+    @staticmethod
+    def _quartiles(counts: pd.Series, transform: Optional[Callable] = None) -> Tuple[float, float]:
+        """
+        由數值的出現次數計算四分位數 (與 pandas quantile 的線性內插相同)
+
+        Args:
+            counts (pd.Series): 數值 -> 出現次數
+            transform (Callable, optional): 計算前套用的單調遞增轉換 (例如 np.log1p)
+
+        Returns:
+            Tuple[float, float]: (Q1, Q3)
+        """
+        counts = counts.sort_index()
+        values = counts.index.to_numpy(dtype=np.float64)
+        if transform is not None:
+            values = transform(values)
+        cumulative = np.cumsum(counts.to_numpy(dtype=np.int64))
+        total = int(cumulative[-1])
+        positions = (total - 1) * np.array([0.25, 0.75])
+        lower = np.floor(positions).astype(np.int64)
+        upper = np.minimum(lower + 1, total - 1)
+        # 排序後第 i 個數值: 累計次數大於 i 的第一個數值
+        below = values[np.searchsorted(cumulative, lower, side='right')]
+        above = values[np.searchsorted(cumulative, upper, side='right')]
+        Q1, Q3 = below + (above - below) * (positions - lower)
+        return float(Q1), float(Q3)
+
+    @staticmethod
+    def _iqr_bounds(Q1: float, Q3: float) -> Tuple[float, float]:
+        """IQR 上下限 (與 SpreadProcessor / TickVolumeProcessor 相同)"""
+        IQR = Q3 - Q1
+        return Q1 - 1.5 * IQR, Q3 + 1.5 * IQR
+
+    def fit(self, chunks: Union[pd.DataFrame, Iterable[pd.DataFrame]]) -> Dict[str, Tuple[float, float]]:
+        """
+        掃描整個數據集，計算異常值旗標使用的 IQR 上下限
+
+        Args:
+            chunks: 依時間順序的數據塊 (只需要 spread 與 tick_volume 欄位)，或單一數據框
+
+        Returns:
+            Dict[str, Tuple[float, float]]: {'spread': (下限, 上限), 'tick_volume_log': (下限, 上限)}
+        """
+        if isinstance(chunks, pd.DataFrame):
+            chunks = [chunks]
+        spread_counts = pd.Series(dtype=np.int64)
+        tick_volume_counts = pd.Series(dtype=np.int64)
+        rows = 0
+        for chunk in chunks:
+            # 出現次數以數值對齊相加 (NaN 不計入，與 quantile 相同)
+            spread_counts = spread_counts.add(chunk['spread'].value_counts(), fill_value=0)
+            tick_volume_counts = tick_volume_counts.add(chunk['tick_volume'].value_counts(), fill_value=0)
+            rows += len(chunk)
+        if len(spread_counts) == 0 or len(tick_volume_counts) == 0:
+            self.logger.error("沒有可計算四分位數的 spread 或 tick_volume 數據")
+            raise ValueError("沒有可計算四分位數的 spread 或 tick_volume 數據")
+
+        self.spread_bounds = self._iqr_bounds(*self._quartiles(spread_counts))
+        self.tick_volume_bounds = self._iqr_bounds(*self._quartiles(tick_volume_counts, np.log1p))
+        self.logger.info(
+            f"已掃描 {rows} 筆數據: spread IQR 上下限 {self.spread_bounds}，"
+            f"tick_volume_log IQR 上下限 {self.tick_volume_bounds}"
+        )
+        return {'spread': self.spread_bounds, 'tick_volume_log': self.tick_volume_bounds}
+
+    # ---------- 第二次掃描 ----------
+    def _rechunk(self, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """將輸入的數據塊 (例如每月一個分區) 重新分為 chunk_size 根 K 線的段落"""
+        pending: List[pd.DataFrame] = []
+        rows = 0
+        last_time = None
+        for chunk in chunks:
+            if len(chunk) == 0:
+                continue
+            if last_time is not None and chunk.index[0] <= last_time:
+                self.logger.error(f"數據塊沒有依時間順序排列: {chunk.index[0]} 不在 {last_time} 之後")
+                raise ValueError("數據塊必須依時間順序排列且不可重疊")
+            last_time = chunk.index[-1]
+            pending.append(chunk)
+            rows += len(chunk)
+            while rows >= self.chunk_size:
+                merged = pd.concat(pending) if len(pending) > 1 else pending[0]
+                yield merged.iloc[:self.chunk_size]
+                rest = merged.iloc[self.chunk_size:]
+                pending = [rest] if len(rest) else []
+                rows = len(rest)
+        if rows:
+            yield pd.concat(pending) if len(pending) > 1 else pending[0]
+
+    def process(self, chunks: Union[pd.DataFrame, Iterable[pd.DataFrame]]) -> Iterator[pd.DataFrame]:
+        """
+        逐段執行處理鏈
+
+        Args:
+            chunks: 依時間順序的原始數據塊 (例如 ParquetStore.iter_partitions 的結果)，或單一數據框
+
+        Yields:
+            pd.DataFrame: 每段的處理結果 (與整段執行 process_chain 的對應列相同)
+        """
+        if self.spread_bounds is None or self.tick_volume_bounds is None:
+            self.logger.error("尚未計算 IQR 上下限，請先呼叫 fit()")
+            raise ValueError("尚未計算 IQR 上下限，請先呼叫 fit()")
+        if isinstance(chunks, pd.DataFrame):
+            chunks = [chunks]
+
+        processor = self.processor
+        saved = (processor.spread_processor.iqr_bounds, processor.tick_volume_processor.iqr_bounds,
+                 processor.renderer.enabled)
+        processor.spread_processor.iqr_bounds = self.spread_bounds
+        processor.tick_volume_processor.iqr_bounds = self.tick_volume_bounds
+        processor.renderer.enabled = False
+        self.last_peak_memory_mb = 0.0
+        tail: Optional[pd.DataFrame] = None
+        seed = None
+        count = 0
+        try:
+            for chunk in self._rechunk(chunks):
+                warmup = 0 if tail is None else len(tail)
+                frame = chunk if tail is None else pd.concat([tail, chunk])
+                # 上一段的最後一列即為暖機列的最後一列
+                chunk_seed = dataclasses.replace(seed, row=warmup - 1) if seed is not None and warmup else None
+                result = processor.process_chain(frame, self.calculator, seed=chunk_seed)
+                seed = processor.last_indicator_seed
+                self.last_peak_memory_mb = max(self.last_peak_memory_mb, processor.last_peak_memory_mb or 0.0)
+                # 複製暖機列，不保留整段數據的引用
+                tail = frame.iloc[-self.warmup_rows:].copy()
+                count += 1
+                self.logger.info(f"第 {count} 段: {len(chunk)} 筆 (暖機 {warmup} 筆)")
+                yield result.iloc[warmup:]
+        finally:
+            (processor.spread_processor.iqr_bounds, processor.tick_volume_processor.iqr_bounds,
+             processor.renderer.enabled) = saved
+        self.logger.info(f"分段處理完成: 共 {count} 段，單段峰值記憶體 {self.last_peak_memory_mb:.1f} MB")
+
+    def process_store(
+        self,
+        store: ParquetStore,
+        symbol: str,
+        timeframe: str,
+        source: str = 'raw',
+        target: str = 'processed',
+        finalize: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None
+    ) -> int:
+        """
+        從 ParquetStore 逐一讀取分區處理，結果逐段寫入另一個數據集 (取代其中既有的數據)
+
+        Args:
+            store (ParquetStore): 數據儲存
+            symbol (str): 交易品種
+            timeframe (str): 時間週期
+            source (str): 原始數據集名稱
+            target (str): 寫入的數據集名稱
+            finalize (Callable, optional): 寫入前套用在每段結果的函數 (例如 pipeline.add_derived_features)
+
+        Returns:
+            int: 寫入的數據筆數
+        """
+        self.fit(store.iter_partitions(symbol, timeframe, source, columns=['spread', 'tick_volume']))
+        # 目標數據集只包含這次的結果，各段之間再以合併寫入 (段落不重疊)
+        store.delete(symbol, timeframe, target)
+        rows = 0
+        for part in self.process(store.iter_partitions(symbol, timeframe, source)):
+            if finalize is not None:
+                part = finalize(part)
+            store.write(part, symbol, timeframe, dataset=target)
+            rows += len(part)
+        return rows
@@ -1,9 +1,16 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import os
-from typing import Optional, Tuple, Dict
-from utils.utils import setup_logger, get_project_root
+from functools import partial
+from typing import Iterable, Optional, Tuple, Dict
+from utils.utils import PeakMemoryTracker, setup_logger, get_project_root
+from utils.plotting import DiagnosticPlotRenderer, downsample_series, histogram_summary
+from utils.quantile_sketch import QuantileSketch
+from utils.gap_index import GapIndex
+from utils.stage_cache import StageCache, fingerprint_frame
+from utils.rolling_cache import RollingStatsCache
+from utils.dtype_policy import DtypePolicy
+from utils.fused_indicators import IndicatorSeed
 import logging
 
 
@@ -20,81 +27,246 @@ class DataQualityChecker:
         return missing_values
 
     def check_outliers(self, df: pd.DataFrame) -> Dict[str, Tuple[int, float, float]]:
-        """使用 IQR 方法檢查數值型欄位的異常值"""
-        outlier_stats = {}
+        """
+        使用 IQR 方法檢查數值型欄位的異常值
+        
+        所有欄位一次排序後以索引內插計算四分位數 (與 pandas quantile 的線性內插相同)，
+        再以同一個遮罩計算各欄位的異常值數量與範圍，不會為每個欄位建立篩選後的副本。
+        """
         numeric_columns = df.select_dtypes(include=[np.number]).columns
+        if len(numeric_columns) == 0:
+            return {}
+        values = df[numeric_columns].to_numpy(dtype=np.float64)
         
-        for col in numeric_columns:
-            Q1 = df[col].quantile(0.25)
-            Q3 = df[col].quantile(0.75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            outliers = df[(df[col] < lower_bound) | (df[col] > upper_bound)][col]
-            
-            outlier_stats[col] = (len(outliers), outliers.min() if len(outliers) > 0 else None, 
-                                outliers.max() if len(outliers) > 0 else None)
-            
-            self.logger.info("%s 的異常值數量: %d", col, len(outliers))
-            if len(outliers) > 0:
-                self.logger.info("異常值範圍: %f 到 %f", outliers.min(), outliers.max())
+        # 一次計算所有欄位的四分位數 (NaN 排序後位於尾端，以非 NaN 數量內插)
+        counts = np.count_nonzero(~np.isnan(values), axis=0)
+        positions = np.maximum(counts - 1, 0)[None, :] * np.array([0.25, 0.75])[:, None]
+        lower = np.floor(positions).astype(np.int64)
+        upper = np.minimum(lower + 1, np.maximum(counts - 1, 0))
+        ordered = np.sort(values, axis=0)
+        below = np.take_along_axis(ordered, lower, axis=0)
+        above = np.take_along_axis(ordered, upper, axis=0)
+        Q1, Q3 = below + (above - below) * (positions - lower)
+        IQR = Q3 - Q1
+        
+        # 異常值遮罩 (NaN 比較結果為 False)
+        lower_bound = Q1 - 1.5 * IQR
+        upper_bound = Q3 + 1.5 * IQR
+        with np.errstate(invalid='ignore'):
+            mask = (values < lower_bound) | (values > upper_bound)
+        n_outliers = mask.sum(axis=0)
+        outlier_min = np.where(mask, values, np.inf).min(axis=0)
+        outlier_max = np.where(mask, values, -np.inf).max(axis=0)
+        
+        outlier_stats = {
+            col: (int(n), outlier_min[i] if n > 0 else None, outlier_max[i] if n > 0 else None)
+            for i, (col, n) in enumerate(zip(numeric_columns, n_outliers))
+        }
+        self._log_outlier_stats(outlier_stats)
+        return outlier_stats
+
+    def check_outliers_streaming(self, chunks: Iterable[pd.DataFrame], k: int = 1000) -> Dict[str, Tuple[int, float, float]]:
+        """
+        以近似分位數 sketch 逐塊檢查異常值，不需要將整個數據集載入記憶體
         
+        Args:
+            chunks (Iterable[pd.DataFrame]): 數據塊 (例如 ParquetStore.iter_partitions 的結果)
+            k (int): sketch 精度參數
+        Returns:
+            Dict[str, Tuple[int, float, float]]: 與 check_outliers 相同格式的近似結果
+        """
+        sketch = OutlierSketch(k=k)
+        for chunk in chunks:
+            sketch.update(chunk)
+        outlier_stats = sketch.result()
+        self._log_outlier_stats(outlier_stats)
         return outlier_stats
 
-    def check_time_series_continuity(self, df: pd.DataFrame) -> Optional[pd.Series]:
-        """檢查時間序列的連續性"""
+    def _log_outlier_stats(self, outlier_stats: Dict[str, Tuple[int, float, float]]) -> None:
+        """記錄各欄位的異常值數量與範圍"""
+        for col, (n_outliers, outlier_min, outlier_max) in outlier_stats.items():
+            self.logger.info("%s 的異常值數量: %d", col, n_outliers)
+            if n_outliers > 0:
+                # 近似結果中沒有觀察到的端點為 None
+                self.logger.info("異常值範圍: %s 到 %s",
+                                 "未知" if outlier_min is None else f"{outlier_min:f}",
+                                 "未知" if outlier_max is None else f"{outlier_max:f}")
+
+    def check_time_series_continuity(self, df: pd.DataFrame, timeframe: Optional[str] = None) -> Optional[GapIndex]:
+        """
+        檢查時間序列的連續性
+        
+        Args:
+            df (pd.DataFrame): 以 K 線開盤時間為索引的數據框
+            timeframe (str, optional): 數據的時間週期，未指定時由索引推斷
+        Returns:
+            Optional[GapIndex]: 時間間隔索引 (可供後續的窗口建立與滾動計算重複使用)，索引不是日期時間時為 None
+        """
         if not isinstance(df.index, pd.DatetimeIndex):
             self.logger.warning("警告：數據框的索引不是日期時間類型")
             return None
-            
-        time_diff = df.index.to_series().diff()
-        gaps = time_diff[time_diff > pd.Timedelta(minutes=1)]
-        
-        if len(gaps) > 0:
-            self.logger.info("發現 %d 個時間間隔", len(gaps))
-            self.logger.info("最大的時間間隔: %s", gaps.max())
-        else:
+        if len(df) < 2 and timeframe is None:
             self.logger.info("時間序列是連續的")
+            return None
+        
+        gap_index = GapIndex(df.index, timeframe)
+        gap_index.log_summary()
+        return gap_index
+
+
+class OutlierSketch:
+    """
+    可合併的 IQR 異常值 sketch 類別
+    
+    每個數值型欄位維護一個 QuantileSketch，四分位數與異常值數量皆由 sketch 估計，
+    記憶體用量與數據量無關。平行的工作行程可各自處理部分數據後以 merge 合併。
+    
+    Example:
+        >>> sketch = OutlierSketch()
+        >>> for chunk in store.iter_partitions("EURUSD", "M1", dataset='processed'):
+        ...     sketch.update(chunk)
+        >>> stats = sketch.result()
+    """
+    
+    def __init__(self, k: int = 1000, seed: Optional[int] = None):
+        """
+        Args:
+            k (int): 每個欄位 sketch 的精度參數
+            seed (int, optional): sketch 壓縮時隨機選擇的種子
+        """
+        self.k = k
+        self.seed = seed
+        self.sketches: Dict[str, QuantileSketch] = {}
+    
+    def update(self, df: pd.DataFrame) -> 'OutlierSketch':
+        """加入一個數據塊的所有數值型欄位"""
+        for col in df.select_dtypes(include=[np.number]).columns:
+            if col not in self.sketches:
+                self.sketches[col] = QuantileSketch(self.k, self.seed)
+            self.sketches[col].update(df[col].to_numpy(dtype=np.float64))
+        return self
+    
+    def merge(self, other: 'OutlierSketch') -> 'OutlierSketch':
+        """合併另一個 OutlierSketch (other 不會被修改)"""
+        for col, sketch in other.sketches.items():
+            if col not in self.sketches:
+                self.sketches[col] = QuantileSketch(sketch.k, self.seed)
+            self.sketches[col].merge(sketch)
+        return self
+    
+    def result(self) -> Dict[str, Tuple[int, float, float]]:
+        """
+        估計各欄位的異常值統計
+        
+        Returns:
+            Dict[str, Tuple[int, float, float]]: 欄位 -> (異常值數量, 最小異常值, 最大異常值)，
+            沒有異常值時範圍為 None；最小 (最大) 異常值只回傳實際觀察到的數值
+            (整體的最小、最大值或 sketch 中保留的數值)，sketch 中沒有超出上下限的數值時為 None
+        """
+        outlier_stats = {}
+        for col, sketch in self.sketches.items():
+            if sketch.count == 0:
+                outlier_stats[col] = (0, None, None)
+                continue
+            
+            Q1, Q3 = sketch.quantile([0.25, 0.75])
+            IQR = Q3 - Q1
+            lower_bound = Q1 - 1.5 * IQR
+            upper_bound = Q3 + 1.5 * IQR
             
-        return gaps
+            items, _ = sketch.sorted_items()
+            n_low = int(sketch.rank(lower_bound, side='left'))
+            n_high = sketch.count - int(sketch.rank(upper_bound, side='right'))
+            n_outliers = n_low + n_high
+            if n_outliers == 0:
+                outlier_stats[col] = (0, None, None)
+                continue
+            
+            # 整體最小值低於下限時即為最小異常值，否則取 sketch 中大於上限的最小數值 (高端同理)；
+            # 都沒有時不以上下限代替觀察值
+            high_items = items[items > upper_bound]
+            low_items = items[items < lower_bound]
+            if sketch.min < lower_bound:
+                outlier_min = float(sketch.min)
+            else:
+                outlier_min = float(high_items[0]) if len(high_items) else None
+            if sketch.max > upper_bound:
+                outlier_max = float(sketch.max)
+            else:
+                outlier_max = float(low_items[-1]) if len(low_items) else None
+            outlier_stats[col] = (n_outliers, outlier_min, outlier_max)
+        return outlier_stats
 
 
 class SpreadProcessor:
     """Spread 數據處理器類別"""
     
-    def __init__(self, plots_dir: str):
+    # 固定閾值法的 spread 上限 (點)
+    OUTLIER_THRESHOLD = 10
+    
+    def __init__(self, plots_dir: str, renderer: Optional[DiagnosticPlotRenderer] = None):
         self.logger = setup_logger('SpreadProcessor')
         self.plots_dir = plots_dir
+        self.renderer = renderer
+        self.plot_summary = None
+        # 固定的 IQR 上下限 (例如分段處理時以整個數據集計算)，未指定時以每次輸入的數據計算
+        self.iqr_bounds: Optional[Tuple[float, float]] = None
 
     def process(self, df: pd.DataFrame) -> pd.DataFrame:
         """處理 spread 數據"""
+        return pd.concat([df, self.compute_columns(df)], axis=1)
+
+    def compute_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        計算 spread 的新增欄位 (不複製原始數據框)
+        
+        Args:
+            df (pd.DataFrame): 包含 spread 欄位的數據框
+        Returns:
+            pd.DataFrame: 只包含新增欄位的數據框 (與 df 相同索引)
+        """
         self.logger.info("開始處理 spread 數據")
         
         try:
-            df_processed = df.copy()
             original_stats = df['spread'].describe()
             self.logger.info("原始 spread 統計量:\n%s", original_stats)
             
-            # 使用 IQR 方法標記異常值
-            df_processed['is_spread_outlier_iqr'] = self._mark_iqr_outliers(df['spread'])
-            
-            # 使用固定閾值標記異常值
-            df_processed['is_spread_outlier_threshold'] = (df['spread'] > 10).astype(int)
+            columns = pd.DataFrame({
+                # 使用 IQR 方法標記異常值
+                'is_spread_outlier_iqr': self._mark_iqr_outliers(df['spread']),
+                # 使用固定閾值標記異常值
+                'is_spread_outlier_threshold': (df['spread'] > self.OUTLIER_THRESHOLD).astype(int)
+            }, index=df.index)
             
             # 計算異常值比例
-            self._log_outlier_ratios(df_processed)
+            self._log_outlier_ratios(columns)
             
-            # 繪製分布圖
-            self._plot_distribution(df, df_processed)
+            # 產生分布圖摘要 (由繪製器決定是否以及何時繪圖)
+            self.summarize(df, columns)
             
-            return df_processed
+            return columns
             
         except Exception as e:
             self.logger.error("處理 spread 數據時發生錯誤: %s", str(e))
             raise
 
+    def summarize(self, df: pd.DataFrame, columns: pd.DataFrame) -> None:
+        """
+        產生分布圖摘要並交給繪製器 (處理階段快取命中時以快取的欄位呼叫)
+        
+        Args:
+            df (pd.DataFrame): 包含 spread 欄位的數據框
+            columns (pd.DataFrame): compute_columns 的結果
+        """
+        self.plot_summary = self._summarize_distribution(df, columns)
+        if self.renderer is not None:
+            self.renderer.submit(os.path.join(self.plots_dir, 'spread_distribution.png'), self.plot_summary)
+
     def _mark_iqr_outliers(self, series: pd.Series) -> pd.Series:
         """使用 IQR 方法標記異常值"""
+        if self.iqr_bounds is not None:
+            lower_bound, upper_bound = self.iqr_bounds
+            return ((series < lower_bound) | (series > upper_bound)).astype(int)
         Q1 = series.quantile(0.25)
         Q3 = series.quantile(0.75)
         IQR = Q3 - Q1
@@ -110,74 +282,89 @@ class SpreadProcessor:
         self.logger.info("IQR method outlier ratio: %.2f%%", iqr_outlier_ratio)
         self.logger.info("Fixed threshold method outlier ratio: %.2f%%", threshold_outlier_ratio)
 
-    def _plot_distribution(self, df: pd.DataFrame, df_processed: pd.DataFrame) -> None:
-        """繪製 spread 分布圖"""
-        plt.figure(figsize=(15, 5))
-        
-        plt.subplot(1, 3, 1)
-        plt.hist(df['spread'], bins=50, alpha=0.7)
-        plt.title('Original Spread Distribution')
-        plt.xlabel('Spread')
-        plt.ylabel('Frequency')
-        
-        plt.subplot(1, 3, 2)
-        plt.hist(df['spread'][df_processed['is_spread_outlier_iqr'] == 0], bins=50, alpha=0.7, color='green')
-        plt.hist(df['spread'][df_processed['is_spread_outlier_iqr'] == 1], bins=50, alpha=0.7, color='red')
-        plt.title('IQR Method Outlier Detection')
-        plt.xlabel('Spread')
-        plt.ylabel('Frequency')
-        
-        plt.subplot(1, 3, 3)
-        plt.hist(df['spread'][df_processed['is_spread_outlier_threshold'] == 0], bins=50, alpha=0.7, color='green')
-        plt.hist(df['spread'][df_processed['is_spread_outlier_threshold'] == 1], bins=50, alpha=0.7, color='red')
-        plt.title('Threshold Method Outlier Detection')
-        plt.xlabel('Spread')
-        plt.ylabel('Frequency')
-        
-        plt.tight_layout()
-        output_file = os.path.join(self.plots_dir, 'spread_distribution.png')
-        plt.savefig(output_file)
-        self.logger.info("已生成分布圖: %s", output_file)
-        plt.close()
+    def _summarize_distribution(self, df: pd.DataFrame, df_processed: pd.DataFrame) -> dict:
+        """產生 spread 分布圖摘要"""
+        spread = df['spread'].to_numpy(dtype=np.float64)
+        summary = histogram_summary(spread)
+        edges = summary['edges']
+        panels = [{'kind': 'hist', 'title': 'Original Spread Distribution',
+                   'xlabel': 'Spread', 'ylabel': 'Frequency', 'series': [summary]}]
+        for column, title in [('is_spread_outlier_iqr', 'IQR Method Outlier Detection'),
+                              ('is_spread_outlier_threshold', 'Threshold Method Outlier Detection')]:
+            outliers = df_processed[column].to_numpy() == 1
+            panels.append({'kind': 'hist', 'title': title, 'xlabel': 'Spread', 'ylabel': 'Frequency', 'series': [
+                histogram_summary(spread[~outliers], edges=edges, color='green'),
+                histogram_summary(spread[outliers], edges=edges, color='red')
+            ]})
+        return {'figsize': (15, 5), 'layout': (1, 3), 'panels': panels}
 
 
 class TickVolumeProcessor:
     """Tick Volume 數據處理器類別"""
     
-    def __init__(self, plots_dir: str):
+    def __init__(self, plots_dir: str, renderer: Optional[DiagnosticPlotRenderer] = None):
         self.logger = setup_logger('TickVolumeProcessor')
         self.plots_dir = plots_dir
+        self.renderer = renderer
+        self.plot_summary = None
+        # 固定的 tick_volume_log IQR 上下限 (例如分段處理時以整個數據集計算)，未指定時以每次輸入的數據計算
+        self.iqr_bounds: Optional[Tuple[float, float]] = None
 
     def process(self, df: pd.DataFrame) -> pd.DataFrame:
         """處理 tick_volume 數據"""
+        return pd.concat([df, self.compute_columns(df)], axis=1)
+
+    def compute_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        計算 tick_volume 的新增欄位 (不複製原始數據框)
+        
+        Args:
+            df (pd.DataFrame): 包含 tick_volume 欄位的數據框
+        Returns:
+            pd.DataFrame: 只包含新增欄位的數據框 (與 df 相同索引)
+        """
         self.logger.info("開始處理 tick_volume 數據")
         
         try:
-            df_processed = df.copy()
             original_stats = df['tick_volume'].describe()
             self.logger.info("原始 tick_volume 統計量:\n%s", original_stats)
             
             # 進行對數轉換
-            df_processed['tick_volume_log'] = np.log1p(df['tick_volume'])
+            columns = pd.DataFrame({'tick_volume_log': np.log1p(df['tick_volume'])}, index=df.index)
             
             # 標記異常值
-            df_processed['is_tick_volume_outlier'] = self._mark_outliers(df_processed['tick_volume_log'])
+            columns['is_tick_volume_outlier'] = self._mark_outliers(columns['tick_volume_log'])
             
             # 計算異常值比例
-            outlier_ratio = df_processed['is_tick_volume_outlier'].mean() * 100
+            outlier_ratio = columns['is_tick_volume_outlier'].mean() * 100
             self.logger.info("異常值比例: %.2f%%", outlier_ratio)
             
-            # 繪製分布圖
-            self._plot_distribution(df, df_processed)
+            # 產生分布圖摘要 (由繪製器決定是否以及何時繪圖)
+            self.summarize(df, columns)
             
-            return df_processed
+            return columns
             
         except Exception as e:
             self.logger.error("處理 tick_volume 數據時發生錯誤: %s", str(e))
             raise
 
+    def summarize(self, df: pd.DataFrame, columns: pd.DataFrame) -> None:
+        """
+        產生分布圖摘要並交給繪製器 (處理階段快取命中時以快取的欄位呼叫)
+        
+        Args:
+            df (pd.DataFrame): 包含 tick_volume 欄位的數據框
+            columns (pd.DataFrame): compute_columns 的結果
+        """
+        self.plot_summary = self._summarize_distribution(df, columns)
+        if self.renderer is not None:
+            self.renderer.submit(os.path.join(self.plots_dir, 'tick_volume_distribution.png'), self.plot_summary)
+
     def _mark_outliers(self, series: pd.Series) -> pd.Series:
         """使用 IQR 方法標記異常值"""
+        if self.iqr_bounds is not None:
+            lower_bound, upper_bound = self.iqr_bounds
+            return ((series < lower_bound) | (series > upper_bound)).astype(int)
         Q1 = series.quantile(0.25)
         Q3 = series.quantile(0.75)
         IQR = Q3 - Q1
@@ -185,42 +372,72 @@ class TickVolumeProcessor:
         upper_bound = Q3 + 1.5 * IQR
         return ((series < lower_bound) | (series > upper_bound)).astype(int)
 
-    def _plot_distribution(self, df: pd.DataFrame, df_processed: pd.DataFrame) -> None:
-        """繪製 tick_volume 分布圖"""
-        plt.figure(figsize=(12, 6))
-        
-        plt.subplot(1, 2, 1)
-        plt.hist(df['tick_volume'], bins=50, alpha=0.7)
-        plt.title('Original Tick Volume Distribution')
-        plt.xlabel('Tick Volume')
-        plt.ylabel('Frequency')
-        
-        plt.subplot(1, 2, 2)
-        plt.hist(df_processed['tick_volume_log'], bins=50, alpha=0.7)
-        plt.title('Log-Transformed Tick Volume Distribution')
-        plt.xlabel('log(Tick Volume + 1)')
-        plt.ylabel('Frequency')
-        
-        plt.tight_layout()
-        output_file = os.path.join(self.plots_dir, 'tick_volume_distribution.png')
-        plt.savefig(output_file)
-        self.logger.info("已生成分布圖: %s", output_file)
-        plt.close()
+    def _summarize_distribution(self, df: pd.DataFrame, df_processed: pd.DataFrame) -> dict:
+        """產生 tick_volume 分布圖摘要"""
+        return {'figsize': (12, 6), 'layout': (1, 2), 'panels': [
+            {'kind': 'hist', 'title': 'Original Tick Volume Distribution', 'xlabel': 'Tick Volume',
+             'ylabel': 'Frequency', 'series': [histogram_summary(df['tick_volume'])]},
+            {'kind': 'hist', 'title': 'Log-Transformed Tick Volume Distribution', 'xlabel': 'log(Tick Volume + 1)',
+             'ylabel': 'Frequency', 'series': [histogram_summary(df_processed['tick_volume_log'])]}
+        ]}
 
 
 class DataProcessor:
     """數據處理主類別"""
     
-    def __init__(self, data_dir: str):
+    # 價格變動滾動統計的週期
+    PRICE_CHANGE_WINDOW = 20
+    
+    def __init__(
+        self,
+        data_dir: str,
+        render_plots: bool = True,
+        background_plots: bool = True,
+        timeframe: Optional[str] = None,
+        cache: Optional[StageCache] = None,
+        rolling_cache: Optional[RollingStatsCache] = None,
+        dtype_policy: Optional[DtypePolicy] = None
+    ):
+        """
+        初始化數據處理器
+        
+        各處理步驟只產生圖表摘要 (保存在 plot_summaries)，圖表由 DiagnosticPlotRenderer 繪製。
+        
+        Args:
+            data_dir (str): 數據目錄，圖表輸出到其下的 plots 目錄
+            render_plots (bool): 是否繪製診斷圖表
+            background_plots (bool): 是否在背景執行緒繪圖，處理流程不等待繪圖完成
+            timeframe (str, optional): 數據的時間週期，用於時間序列連續性檢查，未指定時由索引推斷
+            cache (StageCache, optional): 處理階段快取，指定時輸入與參數都未改變的階段直接讀取快取
+            rolling_cache (RollingStatsCache, optional): 滾動統計快取，未指定時建立新的快取；
+                process_chain 會與技術指標計算器共用
+            dtype_policy (DtypePolicy, optional): 精簡型別政策，指定時 process_chain 的每個階段輸出
+                都依政策轉換型別 (例如 float32 / int8)，並記錄每個階段節省的記憶體
+        """
         self.data_dir = data_dir
         self.logger = setup_logger('DataProcessor')
         self.quality_checker = DataQualityChecker()
         self.plots_dir = os.path.join(data_dir, 'plots')
-        os.makedirs(self.plots_dir, exist_ok=True)
+        if render_plots:
+            os.makedirs(self.plots_dir, exist_ok=True)
+        self.renderer = DiagnosticPlotRenderer(enabled=render_plots, background=background_plots)
+        self.plot_summaries = {}
+        self.last_peak_memory_mb = None
+        self.timeframe = timeframe
+        self.gap_index: Optional[GapIndex] = None
+        self.cache = cache
+        self.rolling_cache = rolling_cache if rolling_cache is not None else RollingStatsCache()
+        self.dtype_policy = dtype_policy
+        self.last_chain_key: Optional[str] = None
+        self.last_indicator_seed: Optional[IndicatorSeed] = None
         
         # 初始化處理器
-        self.spread_processor = SpreadProcessor(self.plots_dir)
-        self.tick_volume_processor = TickVolumeProcessor(self.plots_dir)
+        self.spread_processor = SpreadProcessor(self.plots_dir, self.renderer)
+        self.tick_volume_processor = TickVolumeProcessor(self.plots_dir, self.renderer)
+
+    def close(self) -> None:
+        """等待背景繪圖完成"""
+        self.renderer.close()
 
     def process_spread(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -231,7 +448,9 @@ class DataProcessor:
         Returns:
             pd.DataFrame: 處理後的數據框
         """
-        return self.spread_processor.process(df)
+        df_processed = self.spread_processor.process(df)
+        self.plot_summaries['spread_distribution'] = self.spread_processor.plot_summary
+        return df_processed
 
     def process_tick_volume(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -242,29 +461,44 @@ class DataProcessor:
         Returns:
             pd.DataFrame: 處理後的數據框
         """
-        return self.tick_volume_processor.process(df)
+        df_processed = self.tick_volume_processor.process(df)
+        self.plot_summaries['tick_volume_distribution'] = self.tick_volume_processor.plot_summary
+        return df_processed
 
-    def check_data_quality(self, df: pd.DataFrame) -> None:
+    def check_data_quality(self, df: pd.DataFrame, cache_key: Optional[str] = None) -> Dict:
         """
         檢查數據質量
         
         Args:
             df (pd.DataFrame): 要檢查的數據框
+            cache_key (str, optional): df 內容的鍵值 (例如 last_chain_key)，未指定且啟用快取時會雜湊 df
+        Returns:
+            Dict: 檢查結果 (missing_values, outliers, gaps)
         """
         self.logger.info("開始數據質量檢查")
         
         try:
-            # 檢查缺漏值
-            self.logger.info("1. 缺漏值檢查:")
-            self.quality_checker.check_missing_values(df)
+            def check_values() -> Dict:
+                # 檢查缺漏值
+                self.logger.info("1. 缺漏值檢查:")
+                missing_values = self.quality_checker.check_missing_values(df)
+                
+                # 檢查異常值
+                self.logger.info("2. 異常值檢查:")
+                outliers = self.quality_checker.check_outliers(df)
+                return {'missing_values': missing_values, 'outliers': outliers}
             
-            # 檢查異常值
-            self.logger.info("2. 異常值檢查:")
-            self.quality_checker.check_outliers(df)
+            if self.cache is None:
+                results = check_values()
+            else:
+                _, results = self.cache.run('quality', cache_key or fingerprint_frame(df), {}, check_values)
             
             # 檢查時間序列連續性
             self.logger.info("3. 時間序列連續性檢查:")
-            self.quality_checker.check_time_series_continuity(df)
+            # 保存間隔索引，後續步驟可直接使用 (例如 gap_index.segment_ids)
+            self.gap_index = self.quality_checker.check_time_series_continuity(df, self.timeframe)
+            results['gaps'] = self.gap_index.summary() if self.gap_index is not None else None
+            return results
                 
         except Exception as e:
             self.logger.error("數據質量檢查時發生錯誤: %s", str(e))
@@ -280,39 +514,172 @@ class DataProcessor:
         Returns:
             pd.DataFrame: 添加了相對價格變動和波動率的數據框
         """
+        return pd.concat([df, self.compute_price_change_columns(df)], axis=1)
+
+    def compute_price_change_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        計算相對價格變動和波動率的新增欄位 (不複製原始數據框)
+        
+        Args:
+            df (pd.DataFrame): 包含 close 欄位的數據框
+            
+        Returns:
+            pd.DataFrame: 只包含新增欄位的數據框 (與 df 相同索引)
+        """
         self.logger.info("開始處理相對價格變動和波動率")
         
         try:
-            df_processed = df.copy()
+            close = df['close']
+            columns = pd.DataFrame(index=df.index)
             
             # 計算相對價格變動
-            df_processed['price_change_pct'] = df['close'].pct_change()
-            df_processed['price_change_pct_abs'] = df_processed['price_change_pct'].abs()
+            columns['price_change_pct'] = close.pct_change()
+            columns['price_change_pct_abs'] = columns['price_change_pct'].abs()
+            
+            # 滾動統計由快取計算，同一個 (序列, 窗口, 統計量) 只計算一次
+            pct = columns['price_change_pct']
+            window = self.PRICE_CHANGE_WINDOW
             
             # 計算波動率（使用20個週期的滾動標準差）
-            df_processed['volatility'] = df_processed['price_change_pct'].rolling(window=20).std()
+            columns['volatility'] = self.rolling_cache.get(pct, 'price_change_pct', window, 'std')
             
             # 計算標準化價格（使用波動率標準化）
-            df_processed['normalized_price'] = (df['close'] - df['close'].rolling(window=20).mean()) / df_processed['volatility']
+            close_mean = self.rolling_cache.get(close, 'close', window, 'mean')
+            columns['normalized_price'] = (close - close_mean) / columns['volatility']
             
             # 計算價格變動的移動平均
-            df_processed['price_change_ma'] = df_processed['price_change_pct'].rolling(window=20).mean()
+            columns['price_change_ma'] = self.rolling_cache.get(pct, 'price_change_pct', window, 'mean')
             
             # 計算價格變動的波動率
-            df_processed['price_change_volatility'] = df_processed['price_change_pct'].rolling(window=20).std()
+            columns['price_change_volatility'] = self.rolling_cache.get(pct, 'price_change_pct', window, 'std')
             
             # 記錄統計資訊
-            self._log_price_statistics(df_processed)
+            self._log_price_statistics(columns)
             
-            # 繪製分布圖
-            self._plot_price_distributions(df_processed)
+            # 產生分布圖摘要 (由繪製器決定是否以及何時繪圖)
+            self.summarize_price_changes(df, columns)
             
-            return df_processed
+            return columns
             
         except Exception as e:
             self.logger.error(f"處理相對價格變動時發生錯誤: {str(e)}")
             raise
+
+    def summarize_price_changes(self, df: pd.DataFrame, columns: pd.DataFrame) -> None:
+        """
+        產生價格變動分布圖摘要並交給繪製器 (處理階段快取命中時以快取的欄位呼叫)
+        
+        Args:
+            df (pd.DataFrame): 原始數據框 (未使用，與其他步驟的摘要函數參數相同)
+            columns (pd.DataFrame): compute_price_change_columns 的結果
+        """
+        self.plot_summaries['price_distributions'] = self._summarize_price_distributions(columns)
+        self.renderer.submit(os.path.join(self.plots_dir, 'price_distributions.png'),
+                             self.plot_summaries['price_distributions'])
+
+    def process_chain(
+        self,
+        df: pd.DataFrame,
+        calculator=None,
+        input_key: Optional[str] = None,
+        seed: Optional[IndicatorSeed] = None
+    ) -> pd.DataFrame:
+        """
+        執行完整的處理鏈，各步驟只計算新增欄位，最後一次合併
+        
+        與依序呼叫 process_spread、process_tick_volume、process_price_changes 的結果相同，
+        但不會在每個步驟複製整個數據框。處理鏈的峰值記憶體保存在 last_peak_memory_mb。
+        
+        啟用快取時，每個步驟的新增欄位以 (輸入數據, 步驟參數) 為鍵值保存，
+        例如只修改技術指標參數時，其他步驟直接讀取快取。整個處理鏈的鍵值保存在 last_chain_key。
+        
+        各步驟與技術指標計算器共用 rolling_cache，相同的滾動統計在處理鏈中只計算一次。
+        
+        指定 dtype_policy 時，各步驟仍以原本的型別 (float64) 計算與快取，輸出時才轉換為精簡型別。
+        
+        最後一列的 EMA 與 MACD 信號線 (轉換型別前的 float64 值) 保存在 last_indicator_seed，
+        分段處理時作為下一段的 seed (見 ChunkedProcessor)。
+        
+        Args:
+            df (pd.DataFrame): 原始數據框 (不會被修改)
+            calculator (TechnicalIndicatorCalculator, optional): 指定時一併計算技術指標
+            input_key (str, optional): df 內容的鍵值，未指定且啟用快取時會雜湊 df
+            seed (IndicatorSeed, optional): EMA 與 MACD 信號線的已知狀態，從 df 的第 seed.row 列接續計算
+            
+        Returns:
+            pd.DataFrame: 原始欄位加上所有新增欄位的數據框
+        """
+        spread_params = {'threshold': self.spread_processor.OUTLIER_THRESHOLD}
+        tick_volume_params = {}
+        # 固定的 IQR 上下限會改變異常值旗標，快取鍵值也要區分
+        if self.spread_processor.iqr_bounds is not None:
+            spread_params['iqr_bounds'] = list(self.spread_processor.iqr_bounds)
+        if self.tick_volume_processor.iqr_bounds is not None:
+            tick_volume_params['iqr_bounds'] = list(self.tick_volume_processor.iqr_bounds)
+        # (步驟名稱, 參數, 計算函數, 快取命中時以快取的欄位產生圖表摘要的函數)
+        stages = [
+            ('spread', spread_params, self.spread_processor.compute_columns, self.spread_processor.summarize),
+            ('tick_volume', tick_volume_params, self.tick_volume_processor.compute_columns,
+             self.tick_volume_processor.summarize),
+            ('price_changes', {'window': self.PRICE_CHANGE_WINDOW}, self.compute_price_change_columns,
+             self.summarize_price_changes)
+        ]
+        if calculator is not None:
+            # 技術指標與價格變動共用滾動統計 (例如 close 的 rolling(20).mean())
+            compute_indicators = partial(calculator.compute_indicator_columns, rolling_cache=self.rolling_cache,
+                                         seed=seed)
+            params = calculator.config
+            groups = calculator.resolve_groups()
+            if len(groups) < len(calculator.INDICATOR_GROUPS):
+                # 只計算部分指標群組時，快取鍵值也要區分
+                params = {**params, 'groups': groups}
+            if seed is not None:
+                params = {**params, 'seed': vars(seed)}
+            stages.append(('indicators', params, compute_indicators, None))
+        
+        with PeakMemoryTracker('數據處理鏈') as tracker:
+            if self.cache is not None and input_key is None:
+                input_key = fingerprint_frame(df)
+            
+            blocks = []
+            stage_keys = []
+            self.last_indicator_seed = None
+            for stage, params, compute, summarize in stages:
+                if self.cache is None:
+                    block = compute(df)
+                else:
+                    hits = self.cache.hits
+                    key, block = self.cache.run(stage, input_key, params, compute, df)
+                    stage_keys.append(key)
+                    if self.cache.hits > hits and summarize is not None:
+                        # 快取命中時計算函數沒有執行，以快取的欄位重新產生圖表摘要 (不沿用上一次的摘要)
+                        summarize(df, block)
+                if stage == 'indicators':
+                    self.last_indicator_seed = calculator.seed_from(block)
+                if self.dtype_policy is not None:
+                    # 每個步驟的輸出立即轉換，不同時保留所有步驟的 float64 結果
+                    block = self.dtype_policy.apply(block, stage)
+                blocks.append(block)
             
+            if self.spread_processor.plot_summary is not None:
+                self.plot_summaries['spread_distribution'] = self.spread_processor.plot_summary
+            if self.tick_volume_processor.plot_summary is not None:
+                self.plot_summaries['tick_volume_distribution'] = self.tick_volume_processor.plot_summary
+            
+            # 重新計算的欄位以新值為準
+            new_columns = [col for block in blocks for col in block.columns]
+            base = df.drop(columns=df.columns.intersection(new_columns)) if df.columns.isin(new_columns).any() else df
+            if self.dtype_policy is not None:
+                base = self.dtype_policy.apply(base, 'raw')
+            result = pd.concat([base] + blocks, axis=1)
+        
+        # 滾動統計只在同一次處理鏈中共用，結束後釋放
+        self.logger.info(f"滾動統計快取: 命中 {self.rolling_cache.hits} 次，計算 {self.rolling_cache.misses} 次")
+        self.rolling_cache.clear()
+        self.last_chain_key = StageCache.key('chain', input_key, {'stages': stage_keys}) if self.cache is not None else None
+        self.last_peak_memory_mb = tracker.peak_mb
+        return result
+
     def _log_price_statistics(self, df: pd.DataFrame) -> None:
         """記錄價格變動的統計資訊"""
         stats = {
@@ -324,42 +691,17 @@ class DataProcessor:
         for name, stat in stats.items():
             self.logger.info(f"{name} 統計量:\n{stat}")
             
-    def _plot_price_distributions(self, df: pd.DataFrame) -> None:
-        """繪製價格變動的分布圖"""
-        plt.figure(figsize=(15, 10))
-        
-        # 價格變動百分比分布
-        plt.subplot(2, 2, 1)
-        plt.hist(df['price_change_pct'].dropna(), bins=50, alpha=0.7)
-        plt.title('Price Change Percentage Distribution')
-        plt.xlabel('Price Change Percentage')
-        plt.ylabel('Frequency')
-        
-        # 波動率分布
-        plt.subplot(2, 2, 2)
-        plt.hist(df['volatility'].dropna(), bins=50, alpha=0.7)
-        plt.title('Volatility Distribution')
-        plt.xlabel('Volatility')
-        plt.ylabel('Frequency')
-        
-        # 標準化價格分布
-        plt.subplot(2, 2, 3)
-        plt.hist(df['normalized_price'].dropna(), bins=50, alpha=0.7)
-        plt.title('Normalized Price Distribution')
-        plt.xlabel('Normalized Price')
-        plt.ylabel('Frequency')
-        
-        # 價格變動的移動平均
-        plt.subplot(2, 2, 4)
-        plt.plot(df.index, df['price_change_ma'], label='Moving Average')
-        plt.plot(df.index, df['price_change_pct'], label='Actual Change', alpha=0.3)
-        plt.title('Price Change Moving Average')
-        plt.xlabel('Time')
-        plt.ylabel('Price Change')
-        plt.legend()
-        
-        plt.tight_layout()
-        output_file = os.path.join(self.plots_dir, 'price_distributions.png')
-        plt.savefig(output_file)
-        self.logger.info(f"已生成價格分布圖: {output_file}")
-        plt.close() 
\ No newline at end of file
+    def _summarize_price_distributions(self, df: pd.DataFrame) -> dict:
+        """產生價格變動分布圖摘要 (時間序列降採樣，不繪製每一根 K 線)"""
+        return {'figsize': (15, 10), 'layout': (2, 2), 'panels': [
+            {'kind': 'hist', 'title': 'Price Change Percentage Distribution', 'xlabel': 'Price Change Percentage',
+             'ylabel': 'Frequency', 'series': [histogram_summary(df['price_change_pct'])]},
+            {'kind': 'hist', 'title': 'Volatility Distribution', 'xlabel': 'Volatility',
+             'ylabel': 'Frequency', 'series': [histogram_summary(df['volatility'])]},
+            {'kind': 'hist', 'title': 'Normalized Price Distribution', 'xlabel': 'Normalized Price',
+             'ylabel': 'Frequency', 'series': [histogram_summary(df['normalized_price'])]},
+            {'kind': 'line', 'title': 'Price Change Moving Average', 'xlabel': 'Time', 'ylabel': 'Price Change', 'series': [
+                downsample_series(df.index, df['price_change_ma'], label='Moving Average'),
+                downsample_series(df.index, df['price_change_pct'], label='Actual Change', alpha=0.3)
+            ]}
+        ]}
@@ -0,0 +1,257 @@
+"""
+精簡數據型別模組
+
+處理流程預設以 float64 / int64 保存所有欄位，包括只有 0/1 的旗標欄位 (例如 is_spread_outlier_threshold)。
+此模組提供整個流程共用的型別政策：
+1. 價格、技術指標與特徵的浮點欄位保存為 float32 (計算仍使用 float64，只在每個階段輸出時轉換)
+2. 整數欄位的型別由欄位名稱決定，不隨數據內容改變，分段處理的每一段與每個 Parquet 分區的結構都相同:
+   名稱以 is_ 開頭的旗標欄位保存為 int8 (或 bool)，宣告的整數欄位 (tick_volume、spread、real_volume)
+   保存為 integer_dtypes 中的型別，其他整數欄位不轉換
+3. 每個浮點欄位轉換前與 float64 的原始值比較，誤差以欄位的標準差正規化:
+       drift = max|float32 - float64| / std(float64)
+   超過 max_drift 的欄位保留 float64 (例如變動遠小於數值大小的序列)；此判斷與數據有關，
+   分段處理時若需要固定的結構，將這類欄位加入 exclude
+4. 記錄每個階段轉換前後的記憶體用量與節省的大小
+
+float32 約有 7 位有效數字，外匯報價 (例如 1.08745 或 150.123) 的轉換誤差遠小於最小報價單位。
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .utils import setup_logger
+
+# 旗標欄位的名稱前綴 (例如 is_spread_outlier_iqr)
+FLAG_PREFIX = 'is_'
+
+# 宣告的整數欄位 -> 保存的型別 (MT5 K 線的成交量與點差)
+DEFAULT_INTEGER_DTYPES: Dict[str, type] = {
+    'tick_volume': np.int32,
+    'spread': np.int32,
+    'real_volume': np.int64
+}
+
+
+@dataclass
+class StageDtypeReport:
+    """單一階段的型別轉換結果"""
+    stage: str
+    before_bytes: int
+    after_bytes: int
+    converted: Dict[str, str] = field(default_factory=dict)
+    kept: List[str] = field(default_factory=list)
+    max_drift: float = 0.0
+
+    @property
+    def saved_bytes(self) -> int:
+        """節省的記憶體"""
+        return self.before_bytes - self.after_bytes
+
+
+class DtypePolicy:
+    """
+    精簡數據型別政策類別
+
+    範例:
+        >>> policy = DtypePolicy()
+        >>> processor = DataProcessor(data_dir, dtype_policy=policy)
+        >>> df = process_frame(df, processor, calculator)
+        >>> policy.summary()
+    """
+
+    def __init__(
+        self,
+        float_dtype: type = np.float32,
+        flag_dtype: type = np.int8,
+        integer_dtypes: Optional[Dict[str, type]] = None,
+        max_drift: float = 1e-3,
+        exclude: Iterable[str] = ()
+    ):
+        """
+        初始化型別政策
+
+        Args:
+            float_dtype (type): 浮點欄位的型別
+            flag_dtype (type): 旗標欄位 (名稱以 is_ 開頭) 的型別 (np.int8 或 bool)
+            integer_dtypes (Dict[str, type], optional): 整數欄位 -> 保存的型別，預設為 DEFAULT_INTEGER_DTYPES
+            max_drift (float): 浮點欄位可接受的最大誤差 (以欄位標準差正規化)，超過時保留 float64
+            exclude (Iterable[str]): 不轉換的欄位
+        """
+        if max_drift < 0:
+            raise ValueError("max_drift 不可為負數")
+        self.logger = setup_logger('DtypePolicy')
+        self.float_dtype = np.dtype(float_dtype)
+        self.flag_dtype = np.dtype(flag_dtype)
+        self.integer_dtypes = {
+            name: np.dtype(dtype)
+            for name, dtype in (DEFAULT_INTEGER_DTYPES if integer_dtypes is None else integer_dtypes).items()
+        }
+        self.max_drift = max_drift
+        self.exclude = set(exclude)
+        self.reports: List[StageDtypeReport] = []
+
+    @staticmethod
+    def drift(reference: np.ndarray, candidate: np.ndarray) -> float:
+        """
+        計算與 float64 參考值的正規化誤差
+
+        Args:
+            reference (np.ndarray): float64 的參考值
+            candidate (np.ndarray): 要比較的數值 (例如轉換為 float32 後的值)
+
+        Returns:
+            float: max|candidate - reference| / std(reference)，標準差為 0 時以最大絕對值正規化
+        """
+        reference = np.asarray(reference, dtype=np.float64)
+        candidate = np.asarray(candidate, dtype=np.float64)
+        finite = np.isfinite(reference)
+        if not finite.any():
+            return 0.0
+        if not np.array_equal(finite, np.isfinite(candidate)):
+            # 轉換後出現溢位 (inf) 或 NaN
+            return np.inf
+        error = np.abs(candidate[finite] - reference[finite]).max()
+        if error == 0:
+            return 0.0
+        scale = reference[finite].std()
+        if not scale > 0:
+            scale = np.abs(reference[finite]).max()
+        return float(error / scale)
+
+    @staticmethod
+    def _fits(values: np.ndarray, dtype: np.dtype) -> bool:
+        """數值是否可以無損轉換為 dtype (旗標只能是 0/1，整數不可有 NaN、小數或超出範圍)"""
+        if len(values) == 0 or values.dtype == bool:
+            return True
+        if dtype == bool:
+            return bool(((values == 0) | (values == 1)).all())
+        if pd.api.types.is_float_dtype(values.dtype):
+            if not (np.isfinite(values).all() and (values == np.round(values)).all()):
+                return False
+        elif not pd.api.types.is_integer_dtype(values.dtype):
+            return False
+        info = np.iinfo(dtype)
+        return bool(values.min() >= info.min and values.max() <= info.max)
+
+    def _cast(self, series: pd.Series, dtype: np.dtype, report: StageDtypeReport) -> pd.Series:
+        """轉換為宣告的型別，數值無法無損轉換時保留原型別並記錄警告"""
+        name = str(series.name)
+        if series.dtype == dtype:
+            return series
+        values = series.to_numpy()
+        # 旗標以 0/1 檢查範圍 (int8 的範圍更大，但旗標不應有其他數值)
+        if not self._fits(values, np.dtype(bool) if name.startswith(FLAG_PREFIX) else dtype):
+            report.kept.append(name)
+            self.logger.warning(f"{report.stage}: {name} 的數值無法無損轉換為 {dtype}，保留原型別 {series.dtype}")
+            return series
+        report.converted[name] = str(dtype)
+        return series.astype(dtype)
+
+    def target_dtype(self, name: str) -> Optional[np.dtype]:
+        """
+        由欄位名稱決定的整數型別
+
+        Args:
+            name (str): 欄位名稱
+
+        Returns:
+            np.dtype: 旗標欄位為 flag_dtype，宣告的整數欄位為 integer_dtypes 中的型別，其他欄位為 None
+        """
+        if name.startswith(FLAG_PREFIX):
+            return self.flag_dtype
+        return self.integer_dtypes.get(name)
+
+    def _convert(self, series: pd.Series, report: StageDtypeReport) -> pd.Series:
+        """轉換單一欄位"""
+        name = str(series.name)
+        target = self.target_dtype(name)
+        if target is not None:
+            return self._cast(series, target, report)
+
+        if pd.api.types.is_float_dtype(series.dtype) and series.dtype.itemsize > self.float_dtype.itemsize:
+            values = series.to_numpy()
+            converted = values.astype(self.float_dtype)
+            drift = self.drift(values, converted)
+            if drift > self.max_drift:
+                report.kept.append(name)
+                self.logger.warning(f"{report.stage}: {name} 轉換為 {self.float_dtype} 的誤差 {drift:.2e} 超過上限，保留原型別")
+                return series
+            report.max_drift = max(report.max_drift, drift)
+            report.converted[name] = str(self.float_dtype)
+            return pd.Series(converted, index=series.index, name=series.name, copy=False)
+        return series
+
+    def apply(self, df: pd.DataFrame, stage: str = 'data') -> pd.DataFrame:
+        """
+        依政策轉換數據框的欄位型別並記錄該階段的結果
+
+        Args:
+            df (pd.DataFrame): 要轉換的數據框 (不會被修改)
+            stage (str): 階段名稱 (記錄在報告中)
+
+        Returns:
+            pd.DataFrame: 轉換後的數據框 (未轉換的欄位不複製)
+        """
+        before = int(df.memory_usage(index=False).sum())
+        report = StageDtypeReport(stage, before, before)
+        columns = {
+            col: df[col] if col in self.exclude else self._convert(df[col], report)
+            for col in df.columns
+        }
+        result = pd.DataFrame(columns, index=df.index, copy=False) if len(df.columns) else df
+        report.after_bytes = int(result.memory_usage(index=False).sum())
+        self.reports.append(report)
+        self.logger.info(
+            f"{stage}: {before / 1024 ** 2:.1f} MB -> {report.after_bytes / 1024 ** 2:.1f} MB "
+            f"(節省 {report.saved_bytes / 1024 ** 2:.1f} MB，轉換 {len(report.converted)} 欄，"
+            f"最大誤差 {report.max_drift:.2e})"
+        )
+        return result
+
+    def validate(self, reference: pd.DataFrame, candidate: pd.DataFrame) -> pd.Series:
+        """
+        比較兩個結果的正規化誤差，例如以精簡型別執行的流程與 float64 流程的輸出
+
+        Args:
+            reference (pd.DataFrame): float64 的參考結果
+            candidate (pd.DataFrame): 要驗證的結果 (相同的索引與欄位)
+
+        Returns:
+            pd.Series: 每個共同數值欄位的誤差；超過 max_drift 的欄位會記錄警告
+        """
+        candidate = candidate.reindex(reference.index)
+        drifts = {}
+        for col in reference.columns.intersection(candidate.columns):
+            if pd.api.types.is_numeric_dtype(reference[col]) and pd.api.types.is_numeric_dtype(candidate[col]):
+                drifts[col] = self.drift(reference[col].to_numpy(dtype=np.float64),
+                                         candidate[col].to_numpy(dtype=np.float64))
+        drifts = pd.Series(drifts, dtype=np.float64)
+        exceeded = drifts[drifts > self.max_drift]
+        if len(exceeded):
+            self.logger.warning(f"以下欄位的誤差超過 {self.max_drift:g}: {exceeded.to_dict()}")
+        return drifts
+
+    def summary(self) -> pd.DataFrame:
+        """
+        每個階段的記憶體用量 (MB) 與轉換結果
+
+        Returns:
+            pd.DataFrame: 每個階段一列 (before_mb, after_mb, saved_mb, converted, kept, max_drift)
+        """
+        return pd.DataFrame([
+            {'stage': report.stage,
+             'before_mb': report.before_bytes / 1024 ** 2,
+             'after_mb': report.after_bytes / 1024 ** 2,
+             'saved_mb': report.saved_bytes / 1024 ** 2,
+             'converted': len(report.converted),
+             'kept': len(report.kept),
+             'max_drift': report.max_drift}
+            for report in self.reports
+        ], columns=['stage', 'before_mb', 'after_mb', 'saved_mb', 'converted', 'kept', 'max_drift'])
+
+    def clear(self) -> None:
+        """清除所有階段的報告"""
+        self.reports = []
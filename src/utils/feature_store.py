@@ -0,0 +1,343 @@
+"""
+特徵儲存模組
+
+此模組以技術指標的實際參數作為版本，保存與讀取指標欄位：
+1. 每個指標群組 (TechnicalIndicatorCalculator.INDICATOR_GROUPS) 依影響結果的參數計算版本鍵值，
+   不同參數的結果分開儲存，不會互相覆蓋
+2. 每個版本附帶 meta.json，記錄參數、欄位、數據範圍與建立時間
+3. 以群組名稱與參數 (或計算器配置) 讀取，時間範圍已完整保存時直接重複使用，不需要重新計算
+
+目錄結構:
+    <root>/features/<group>/<version>/symbol=<symbol>/timeframe=<timeframe>/date=<date>/data.parquet
+    <root>/features/<group>/<version>/symbol=<symbol>/timeframe=<timeframe>/meta.json
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from .storage import ParquetStore
+from .technical_indicators import TechnicalIndicatorCalculator
+from .utils import setup_logger
+
+
+class FeatureStore:
+    """
+    版本化特徵儲存類別
+
+    範例:
+        >>> store = FeatureStore('data')
+        >>> calculator = TechnicalIndicatorCalculator({'rsi': {'period': 21}})
+        >>> features = store.compute_or_load(df, 'EURUSD', 'M5', calculator)   # 第一次計算並保存
+        >>> rsi = store.load_group('EURUSD', 'M5', 'rsi', {'rsi': {'period': 21}}, qualified=True)  # 欄位 rsi_21
+    """
+
+    DATASET = 'features'
+    META_FILE = 'meta.json'
+
+    def __init__(self, root_dir: str, compression: str = 'zstd', partition_freq: str = 'M'):
+        """
+        初始化特徵儲存
+
+        Args:
+            root_dir (str): 儲存根目錄 (與 ParquetStore 相同，可與 K 線數據共用)
+            compression (str): 壓縮方式
+            partition_freq (str): 日期分區頻率 ('D' 日, 'M' 月, 'Y' 年)
+        """
+        self.store = ParquetStore(root_dir, compression=compression, partition_freq=partition_freq)
+        self.logger = setup_logger('FeatureStore')
+
+    # ---------- 版本 ----------
+    @staticmethod
+    def version_key(group: str, params: Dict) -> str:
+        """
+        計算群組與參數的版本鍵值
+
+        Args:
+            group (str): 群組名稱
+            params (dict): 影響結果的參數
+
+        Returns:
+            str: 16 個字元的十六進位雜湊
+        """
+        payload = json.dumps({'group': group, 'params': params}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    @staticmethod
+    def qualified_name(column: str, params: Dict) -> str:
+        """
+        加上參數後綴的欄位名稱，例如 rsi + {'rsi': {'period': 14}} -> rsi_14
+
+        Args:
+            column (str): 欄位名稱
+            params (dict): 群組參數
+
+        Returns:
+            str: 欄位名稱
+        """
+        values = []
+        for value in params.values():
+            values.extend(value.values() if isinstance(value, dict) else [value])
+        return '_'.join([column] + [f"{value:g}" if isinstance(value, float) else str(value) for value in values])
+
+    def _dataset(self, group: str, params: Dict) -> str:
+        """取得群組版本對應的數據集名稱"""
+        return f"{self.DATASET}/{group}/{self.version_key(group, params)}"
+
+    def _meta_path(self, symbol: str, timeframe: str, group: str, params: Dict) -> str:
+        """取得版本說明檔路徑"""
+        return os.path.join(self.store.series_dir(symbol, timeframe, self._dataset(group, params)), self.META_FILE)
+
+    def _read_meta(self, path: str) -> Optional[Dict]:
+        """讀取版本說明檔，不存在時為 None"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self, path: str, meta: Dict) -> None:
+        """寫入版本說明檔 (先寫入暫存檔再取代)"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2, default=str)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _group_params(calculator: TechnicalIndicatorCalculator, groups: Optional[Sequence[str]]) -> Dict[str, Dict]:
+        """取得各群組的參數 (預設為計算器實際計算的群組)"""
+        groups = list(groups or calculator.resolve_groups())
+        return {group: calculator.group_params(group) for group in groups}
+
+    # ---------- 寫入 ----------
+    def save_group(
+        self,
+        features: pd.DataFrame,
+        symbol: str,
+        timeframe: str,
+        group: str,
+        params: Dict,
+        columns: Optional[List[str]] = None
+    ) -> str:
+        """
+        保存單一群組的特徵欄位
+
+        與既有數據以時間合併 (重複的時間保留新的數據)。
+
+        Args:
+            features (pd.DataFrame): 以時間為索引的特徵數據
+            symbol (str): 交易品種
+            timeframe (str): 時間週期
+            group (str): 群組名稱
+            params (dict): 產生這些欄位的參數
+            columns (List[str], optional): 要保存的欄位，預設為 INDICATOR_GROUPS 中的欄位 (非指標群組時為全部欄位)
+
+        Returns:
+            str: 版本鍵值
+        """
+        if columns is None:
+            columns = TechnicalIndicatorCalculator.INDICATOR_GROUPS.get(group, (list(features.columns), []))[0]
+        missing = [col for col in columns if col not in features.columns]
+        if missing:
+            self.logger.error(f"缺少 {group} 的特徵欄位: {', '.join(missing)}")
+            raise ValueError(f"缺少 {group} 的特徵欄位: {', '.join(missing)}")
+
+        dataset = self._dataset(group, params)
+        self.store.write(features[columns], symbol, timeframe, dataset=dataset)
+
+        # 更新版本說明 (範圍涵蓋所有已保存的數據)
+        meta_path = self._meta_path(symbol, timeframe, group, params)
+        meta = self._read_meta(meta_path) or {
+            'group': group,
+            'params': params,
+            'columns': columns,
+            'created': datetime.now().isoformat(timespec='seconds')
+        }
+        start, end = features.index.min(), features.index.max()
+        if meta.get('start') is not None:
+            start = min(start, pd.Timestamp(meta['start']))
+            end = max(end, pd.Timestamp(meta['end']))
+        meta.update({
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'updated': datetime.now().isoformat(timespec='seconds')
+        })
+        self._write_meta(meta_path, meta)
+        return self.version_key(group, params)
+
+    def save(
+        self,
+        features: pd.DataFrame,
+        symbol: str,
+        timeframe: str,
+        calculator: TechnicalIndicatorCalculator,
+        groups: Optional[Sequence[str]] = None
+    ) -> Dict[str, str]:
+        """
+        保存計算器產生的指標欄位，每個群組依各自的參數分別保存
+
+        Args:
+            features (pd.DataFrame): 含有指標欄位的數據
+            symbol (str): 交易品種
+            timeframe (str): 時間週期
+            calculator (TechnicalIndicatorCalculator): 產生指標的計算器 (用於取得參數)
+            groups (Sequence[str], optional): 要保存的群組，預設為計算器實際計算的群組 (calculator.resolve_groups())
+
+        Returns:
+            Dict[str, str]: {群組: 版本鍵值}
+        """
+        versions = {}
+        for group, params in self._group_params(calculator, groups).items():
+            versions[group] = self.save_group(features, symbol, timeframe, group, params)
+        self.logger.info(f"已保存 {symbol} {timeframe} 特徵: {', '.join(versions)}")
+        return versions
+
+    # ---------- 讀取 ----------
+    def load_group(
+        self,
+        symbol: str,
+        timeframe: str,
+        group: str,
+        params: Dict,
+        columns: Optional[List[str]] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        qualified: bool = False
+    ) -> Optional[pd.DataFrame]:
+        """
+        讀取單一群組指定參數的特徵欄位
+
+        Args:
+            symbol (str): 交易品種
+            timeframe (str): 時間週期
+            group (str): 群組名稱
+            params (dict): 參數
+            columns (List[str], optional): 只讀取的欄位
+            start_time (datetime, optional): 開始時間 (包含)
+            end_time (datetime, optional): 結束時間 (包含)
+            qualified (bool): 欄位名稱是否加上參數後綴 (例如 rsi_14)，方便合併不同參數的版本
+
+        Returns:
+            Optional[pd.DataFrame]: 特徵數據，沒有此版本時為 None
+        """
+        df = self.store.read(symbol, timeframe, dataset=self._dataset(group, params), columns=columns,
+                             start_time=start_time, end_time=end_time)
+        if df is not None and qualified:
+            df = df.rename(columns={col: self.qualified_name(col, params) for col in df.columns})
+        return df
+
+    def load(
+        self,
+        symbol: str,
+        timeframe: str,
+        calculator: TechnicalIndicatorCalculator,
+        groups: Optional[Sequence[str]] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        qualified: bool = False
+    ) -> Optional[pd.DataFrame]:
+        """
+        依計算器的配置讀取多個群組的特徵欄位
+
+        Args:
+            symbol (str): 交易品種
+            timeframe (str): 時間週期
+            calculator (TechnicalIndicatorCalculator): 提供參數的計算器
+            groups (Sequence[str], optional): 要讀取的群組，預設為計算器實際計算的群組 (calculator.resolve_groups())
+            start_time (datetime, optional): 開始時間 (包含)
+            end_time (datetime, optional): 結束時間 (包含)
+            qualified (bool): 欄位名稱是否加上參數後綴
+
+        Returns:
+            Optional[pd.DataFrame]: 合併後的特徵數據，任一群組沒有保存時為 None
+        """
+        frames = []
+        for group, params in self._group_params(calculator, groups).items():
+            df = self.load_group(symbol, timeframe, group, params, start_time=start_time,
+                                 end_time=end_time, qualified=qualified)
+            if df is None:
+                return None
+            frames.append(df)
+        return pd.concat(frames, axis=1)
+
+    def compute_or_load(
+        self,
+        df: pd.DataFrame,
+        symbol: str,
+        timeframe: str,
+        calculator: TechnicalIndicatorCalculator,
+        groups: Optional[Sequence[str]] = None
+    ) -> pd.DataFrame:
+        """
+        取得 df 時間範圍的指標欄位，已完整保存的群組直接讀取，其他群組計算後保存
+
+        注意: EMA 等遞迴指標與計算起點有關，重複使用的前提是保存的數據來自相同 (或更早) 的起點。
+
+        Args:
+            df (pd.DataFrame): 含有 high、low、close 的 K 線數據
+            symbol (str): 交易品種
+            timeframe (str): 時間週期
+            calculator (TechnicalIndicatorCalculator): 技術指標計算器
+            groups (Sequence[str], optional): 需要的群組，預設為計算器實際計算的群組 (calculator.resolve_groups())
+
+        Returns:
+            pd.DataFrame: 與 df 索引對齊的指標欄位
+        """
+        if len(df) == 0:
+            raise ValueError("數據框為空")
+
+        frames = {}
+        pending = []
+        for group, params in self._group_params(calculator, groups).items():
+            loaded = self.load_group(symbol, timeframe, group, params,
+                                     start_time=df.index[0], end_time=df.index[-1])
+            if loaded is not None and len(loaded) == len(df) and loaded.index.equals(df.index):
+                frames[group] = loaded
+            else:
+                pending.append(group)
+
+        if pending:
+            self.logger.info(f"{symbol} {timeframe} 需要計算的特徵群組: {', '.join(pending)}")
+            # 只計算缺少的群組 (與其相依的群組)
+            computed = calculator.compute_indicator_columns(df, features=pending)
+            self.save(computed, symbol, timeframe, calculator, groups=pending)
+            for group in pending:
+                frames[group] = computed[calculator.INDICATOR_GROUPS[group][0]]
+        else:
+            self.logger.info(f"{symbol} {timeframe} 特徵全部由儲存讀取")
+
+        return pd.concat(list(frames.values()), axis=1)
+
+    def versions(self, symbol: str, timeframe: str, group: Optional[str] = None) -> pd.DataFrame:
+        """
+        列出已保存的特徵版本
+
+        Args:
+            symbol (str): 交易品種
+            timeframe (str): 時間週期
+            group (str, optional): 只列出此群組
+
+        Returns:
+            pd.DataFrame: 每個版本一列 (group, version, params, columns, start, end, created, updated)
+        """
+        base = os.path.join(self.store.root_dir, self.DATASET)
+        groups = [group] if group else (sorted(os.listdir(base)) if os.path.isdir(base) else [])
+        records = []
+        for name in groups:
+            group_dir = os.path.join(base, name)
+            if not os.path.isdir(group_dir):
+                continue
+            for version in sorted(os.listdir(group_dir)):
+                meta = self._read_meta(os.path.join(
+                    group_dir, version, f"symbol={symbol}", f"timeframe={timeframe}", self.META_FILE
+                ))
+                if meta is not None:
+                    records.append({'version': version, **meta})
+        return pd.DataFrame(records, columns=['group', 'version', 'params', 'columns', 'start', 'end',
+                                              'created', 'updated'])
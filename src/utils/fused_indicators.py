@@ -0,0 +1,292 @@
+"""
+融合技術指標核心模組
+
+此模組直接在 float64 陣列上計算 TechnicalIndicatorCalculator 的所有指標欄位，取代五次獨立的 pandas 運算：
+1. EMA 快線、慢線與 MACD 信號線為遞迴計算，使用與原本相同的 ewm(adjust=False)，結果完全相同
+2. RSI 與 ATR 在同一次分塊掃描中完成：每個區塊把漲幅、跌幅與真實範圍放在同一個 (序列, 區塊長度) 陣列，
+   以一次 cumsum 取得所有前綴和，各指標的滾動和都只需要一次相減
+3. 每個區塊的前綴和從 0 重新開始 (與上一區塊重疊一個視窗)，浮點誤差只與區塊長度有關而與總長度無關，
+   區塊也能留在 CPU 快取中
+4. 布林通道使用與原本相同的 pandas rolling().mean() / .std() (或 RollingStatsCache 中已計算的結果)，
+   結果完全相同；收盤價平方的前綴和在低波動時會嚴重抵銷，不適合計算標準差
+
+漲幅、跌幅與真實範圍都是非負且與視窗和同數量級的數值，前綴和相減的結果與 pandas 的滾動平均只有
+最後幾位的浮點差異。另外以同一個前綴和累計非零的個數，視窗內全為 0 時滾動和為精確的 0 (與 pandas 相同)。
+輸入含有 NaN 或無限值時 (滾動視窗需要跳過)，請使用 pandas 的實作，見 supports()。
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .utils import setup_logger
+
+OUTPUT_COLUMNS = [
+    'ema_fast', 'ema_slow', 'macd', 'macd_signal', 'rsi',
+    'bb_middle', 'bb_std', 'bb_upper', 'bb_lower', 'atr'
+]
+
+# 分塊掃描中每一列的序列
+_GAIN, _LOSS, _TRUE_RANGE, _GAIN_COUNT, _LOSS_COUNT, _RANGE_COUNT = range(6)
+
+
+@dataclass
+class IndicatorSeed:
+    """
+    遞迴指標 (EMA 快線、慢線與 MACD 信號線) 的已知狀態，分段計算時由上一段的結果接續
+
+    第 row 列的指標值為下列數值，之後的列從這些數值以相同的遞迴公式計算 (與整段計算的結果完全相同)，
+    之前的列為 NaN。
+    """
+    row: int
+    ema_fast: float
+    ema_slow: float
+    macd_signal: float
+
+
+def ewm_mean(values: np.ndarray, span: int, row: int = 0, initial: Optional[float] = None) -> np.ndarray:
+    """
+    與 pd.Series(values).ewm(span=span, adjust=False).mean() 相同，指定 initial 時從第 row 列的已知值接續
+
+    Args:
+        values (np.ndarray): 輸入序列
+        span (int): EMA 週期
+        row (int): initial 所在的列
+        initial (float, optional): 第 row 列的 EMA 值
+
+    Returns:
+        np.ndarray: EMA (新的可寫入陣列；指定 initial 時 row 之前的列為 NaN)
+    """
+    if initial is None:
+        # copy-on-write 下 to_numpy() 回傳唯讀的視圖，直接放入數據框後欄位無法修改
+        return pd.Series(values, copy=False).ewm(span=span, adjust=False).mean().to_numpy(copy=True)
+    if not 0 <= row < len(values):
+        raise ValueError(f"起始列 {row} 超出序列範圍 (長度 {len(values)})")
+    # adjust=False 的第一個結果就是第一個輸入值，把起始列換成已知的 EMA 值即可接續遞迴
+    tail = np.array(values[row:], dtype=np.float64)
+    tail[0] = initial
+    result = np.full(len(values), np.nan)
+    result[row:] = pd.Series(tail, copy=False).ewm(span=span, adjust=False).mean().to_numpy()
+    return result
+
+
+class FusedIndicatorKernel:
+    """
+    融合技術指標核心類別
+
+    範例:
+        >>> kernel = FusedIndicatorKernel(calculator.config)
+        >>> columns = kernel.compute(df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy())
+        >>> columns['rsi']
+    """
+
+    def __init__(self, config: Dict, block_size: int = 16384):
+        """
+        初始化核心
+
+        Args:
+            config (Dict): 與 TechnicalIndicatorCalculator.config 相同格式的參數
+            block_size (int): 分塊掃描每個區塊的 K 線數量
+        """
+        if block_size < 1:
+            raise ValueError("block_size 必須大於 0")
+        self.logger = setup_logger('FusedIndicatorKernel')
+        self.config = config
+        self.block_size = block_size
+
+    @staticmethod
+    def supports(df: pd.DataFrame) -> bool:
+        """
+        數據框是否可以使用融合核心 (包含 high、low、close 且沒有 NaN 或無限值)
+
+        Args:
+            df (pd.DataFrame): K 線數據
+
+        Returns:
+            bool: 可以使用時為 True
+        """
+        if not all(col in df.columns for col in ('high', 'low', 'close')):
+            return False
+        return all(np.isfinite(df[col].to_numpy(dtype=np.float64)).all() for col in ('high', 'low', 'close'))
+
+    def compute(
+        self,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        bollinger: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+        seed: Optional[IndicatorSeed] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        計算所有指標
+
+        Args:
+            high (np.ndarray): 最高價
+            low (np.ndarray): 最低價
+            close (np.ndarray): 收盤價
+            bollinger (Tuple, optional): 已計算的收盤價滾動 (平均, 標準差)，例如 RollingStatsCache 的結果；
+                指定時直接使用，不再計算布林通道
+            seed (IndicatorSeed, optional): EMA 與 MACD 信號線的已知狀態 (分段計算時接續上一段)
+
+        Returns:
+            Dict[str, np.ndarray]: OUTPUT_COLUMNS 的所有欄位 (順序相同)
+        """
+        high = np.ascontiguousarray(high, dtype=np.float64)
+        low = np.ascontiguousarray(low, dtype=np.float64)
+        close = np.ascontiguousarray(close, dtype=np.float64)
+        if not len(high) == len(low) == len(close):
+            raise ValueError("high、low、close 的長度必須相同")
+
+        result = self._ema_columns(close, seed)
+        result.update(self._window_columns(high, low, close, bollinger))
+        # 輸出的陣列直接放入數據框 (不複製)，必須是可寫入的獨立陣列
+        readonly = [col for col in OUTPUT_COLUMNS if not result[col].flags.writeable]
+        if readonly:
+            raise ValueError(f"融合核心的輸出欄位為唯讀: {readonly}")
+        return {col: result[col] for col in OUTPUT_COLUMNS}
+
+    # ---------- 遞迴指標 ----------
+    def _ema_columns(self, close: np.ndarray, seed: Optional[IndicatorSeed] = None) -> Dict[str, np.ndarray]:
+        """EMA 快線、慢線、MACD 與信號線 (與 ewm(span=..., adjust=False) 相同)"""
+        row = seed.row if seed is not None else 0
+        ema_fast = ewm_mean(close, self.config['ema']['fast'], row, seed.ema_fast if seed is not None else None)
+        ema_slow = ewm_mean(close, self.config['ema']['slow'], row, seed.ema_slow if seed is not None else None)
+        macd = ema_fast - ema_slow
+        signal = ewm_mean(macd, self.config['macd']['signal'], row, seed.macd_signal if seed is not None else None)
+        return {'ema_fast': ema_fast, 'ema_slow': ema_slow, 'macd': macd, 'macd_signal': signal}
+
+    # ---------- 滾動視窗指標 ----------
+    def _window_columns(
+        self,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        bollinger: Optional[Tuple[np.ndarray, np.ndarray]]
+    ) -> Dict[str, np.ndarray]:
+        """RSI 與 ATR (一次分塊掃描)，布林通道使用 pandas 的滾動平均與標準差"""
+        n = len(close)
+        rsi_period = self.config['rsi']['period']
+        atr_period = self.config['atr']['period']
+        longest = max(rsi_period, atr_period)
+
+        out = {}
+        for col, period in {'rsi': rsi_period, 'atr': atr_period}.items():
+            # 每個位置都會被寫入，只需要把視窗不足的開頭設為 NaN
+            out[col] = np.empty(n)
+            out[col][:period - 1] = np.nan
+        scratch = np.empty((6, self.block_size + longest))
+
+        for start in range(0, n, self.block_size):
+            end = min(start + self.block_size, n)
+            # 區塊前面重疊一個視窗，前綴和從 0 開始
+            region = max(0, start - longest + 1)
+            length = end - region
+            prefix = scratch[:, :length + 1]
+            self._fill_block(prefix, high, low, close, region, end)
+            np.cumsum(prefix, axis=1, out=prefix)
+
+            def window_sum(row: int, period: int, lo: int) -> np.ndarray:
+                """區塊中 [lo, end) 每個位置往前 period 個值的和"""
+                first = lo - region + 1
+                return prefix[row, first:length + 1] - prefix[row, first - period:length + 1 - period]
+
+            # RSI: 漲幅與跌幅的滾動平均
+            lo = max(start, rsi_period - 1)
+            if lo < end:
+                gain = self._nonnegative(window_sum(_GAIN, rsi_period, lo), window_sum(_GAIN_COUNT, rsi_period, lo))
+                loss = self._nonnegative(window_sum(_LOSS, rsi_period, lo), window_sum(_LOSS_COUNT, rsi_period, lo))
+                gain /= rsi_period
+                loss /= rsi_period
+                rsi = out['rsi'][lo:end]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    np.divide(gain, loss, out=rsi)
+                    rsi += 1
+                    np.divide(100, rsi, out=rsi)
+                    np.subtract(100, rsi, out=rsi)
+
+            # ATR: 真實範圍的滾動平均
+            lo = max(start, atr_period - 1)
+            if lo < end:
+                total = self._nonnegative(
+                    window_sum(_TRUE_RANGE, atr_period, lo), window_sum(_RANGE_COUNT, atr_period, lo)
+                )
+                np.divide(total, atr_period, out=out['atr'][lo:end])
+
+        out.update(self._bollinger_columns(close, bollinger))
+        return out
+
+    def _bollinger_columns(
+        self,
+        close: np.ndarray,
+        bollinger: Optional[Tuple[np.ndarray, np.ndarray]]
+    ) -> Dict[str, np.ndarray]:
+        """
+        布林通道 (與 rolling(period).mean() / .std() 相同)
+
+        收盤價的平方和在價格遠大於視窗內變動時 (例如低波動的趨勢) 會嚴重抵銷，
+        因此標準差不使用前綴和，而是使用 pandas 的線上演算法。
+        """
+        period = self.config['bollinger']['period']
+        std_dev = self.config['bollinger']['std_dev']
+        if bollinger is None:
+            rolling = pd.Series(close, copy=False).rolling(window=period)
+            middle = rolling.mean().to_numpy(copy=True)
+            std = rolling.std().to_numpy(copy=True)
+        else:
+            # 輸出的陣列不與傳入的結果共用記憶體
+            middle, std = (np.array(values, dtype=np.float64) for values in bollinger)
+            if not len(middle) == len(std) == len(close):
+                raise ValueError("布林通道的長度必須與收盤價相同")
+        return {
+            'bb_middle': middle,
+            'bb_std': std,
+            'bb_upper': middle + std_dev * std,
+            'bb_lower': middle - std_dev * std
+        }
+
+    @staticmethod
+    def _fill_block(
+        prefix: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        region: int,
+        end: int
+    ) -> None:
+        """
+        填入區塊 [region, end) 的序列 (第 0 欄為 0，cumsum 後即為前綴和)
+
+        第一根 K 線的漲跌為 0，真實範圍為最高價減最低價 (與 pandas 版本的 NaN 處理相同)。
+        """
+        prefix[:, 0] = 0.0
+        block_close = close[region:end]
+        previous = np.empty_like(block_close)
+        previous[1:] = block_close[:-1]
+        previous[0] = close[region - 1] if region > 0 else block_close[0]
+
+        delta = prefix[_TRUE_RANGE, 1:]  # 暫存，稍後覆寫為真實範圍
+        np.subtract(block_close, previous, out=delta)
+        np.maximum(delta, 0.0, out=prefix[_GAIN, 1:])
+        np.maximum(-delta, 0.0, out=prefix[_LOSS, 1:])
+        np.greater(delta, 0.0, out=prefix[_GAIN_COUNT, 1:])
+        np.less(delta, 0.0, out=prefix[_LOSS_COUNT, 1:])
+
+        block_high = high[region:end]
+        block_low = low[region:end]
+        true_range = prefix[_TRUE_RANGE, 1:]
+        np.subtract(block_high, block_low, out=true_range)
+        if region == 0:
+            # 第一根 K 線沒有前一根收盤價
+            previous[0] = np.nan
+        np.fmax(true_range, np.abs(block_high - previous), out=true_range)
+        np.fmax(true_range, np.abs(block_low - previous), out=true_range)
+        np.not_equal(true_range, 0.0, out=prefix[_RANGE_COUNT, 1:])
+
+    @staticmethod
+    def _nonnegative(total: np.ndarray, count: np.ndarray) -> np.ndarray:
+        """非負序列的滾動和: 消除前綴和相減的微小負值，視窗內全為 0 時結果為 0"""
+        np.maximum(total, 0.0, out=total)
+        total[count == 0] = 0.0
+        return total
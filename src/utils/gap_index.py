@@ -0,0 +1,273 @@
+"""
+時間間隔索引模組
+
+此模組依實際的時間週期與外匯市場的週末休市，預先計算 K 線序列的時間間隔與連續區段：
+1. 只有下一根 K 線晚於上一根 K 線收盤時間才視為間隔 (M5 數據不會因為相隔 5 分鐘而被標記)
+2. 間隔分類為週末休市 (weekend)、假日 (holiday) 與缺漏 (missing)
+3. 提供區段編號、區段內位置等陣列，下游的窗口建立與滾動指標可直接使用，
+   不需要重新掃描時間索引
+
+時間以 K 線本身的時間 (通常為券商伺服器時間) 計算，週末判斷只要求間隔涵蓋星期六，
+因此不論伺服器時區為 UTC 或 UTC+2/+3 都適用。
+"""
+
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .bar_aggregation import TickBarAggregator
+from .utils import TIMEFRAME_DELTAS, setup_logger
+
+MS_PER_DAY = 86400 * 1000
+
+# 週末休市最長的間隔 (超過時視為缺漏，例如週末加上連續停機)
+MAX_WEEKEND_MS = 3 * MS_PER_DAY
+
+# 假日休市最長的間隔 (假日與週末相連時可達 4 天)
+MAX_HOLIDAY_MS = 4 * MS_PER_DAY
+
+# 外匯市場休市的固定假日 (月, 日)
+FX_HOLIDAYS = [(12, 25), (1, 1)]
+
+GAP_KINDS = ('weekend', 'holiday', 'missing')
+
+
+class GapIndex:
+    """
+    時間間隔索引類別
+
+    範例:
+        >>> gaps = GapIndex(df.index, 'M5')
+        >>> gaps.summary()                                   # 每個間隔一列
+        >>> df['ma'] = gaps.mask_rolling(df['close'].rolling(20).mean(), 20)
+        >>> X, y = fe.windowed_array(X, y, 64, segment_ids=gaps.segment_ids)
+    """
+
+    def __init__(
+        self,
+        index: pd.DatetimeIndex,
+        timeframe: Optional[str] = None,
+        split_on: Sequence[str] = ('missing',),
+        max_missing_bars: int = 0
+    ):
+        """
+        建立時間間隔索引
+
+        Args:
+            index (pd.DatetimeIndex): K 線開盤時間 (依時間排序)
+            timeframe (str, optional): MT5 時間週期 (M1 ~ MN1) 或 pandas 時間長度字串，未指定時由索引推斷
+            split_on (Sequence[str]): 哪些類型的間隔會切分區段，預設只有缺漏會切分 (週末與假日為正常休市)
+            max_missing_bars (int): 缺少的 K 線數量不超過此值的間隔忽略不計 (例如流動性低時沒有報價的 K 線)
+        """
+        if not isinstance(index, pd.DatetimeIndex):
+            raise ValueError("索引必須是 DatetimeIndex")
+        unknown = set(split_on) - set(GAP_KINDS)
+        if unknown:
+            raise ValueError(f"不支援的間隔類型: {', '.join(sorted(unknown))}")
+
+        self.logger = setup_logger('GapIndex')
+        self.index = index
+        self.timeframe = timeframe or self.infer_timeframe(index)
+        self.split_on = tuple(split_on)
+        self.max_missing_bars = max_missing_bars
+        self._aggregator = TickBarAggregator()
+        self._build()
+
+    @staticmethod
+    def infer_timeframe(index: pd.DatetimeIndex) -> str:
+        """
+        由相鄰 K 線最常見的時間差推斷時間週期
+
+        Args:
+            index (pd.DatetimeIndex): K 線時間
+
+        Returns:
+            str: MT5 時間週期，無法對應時為 pandas 時間長度字串 (例如 '90s')
+        """
+        if len(index) < 2:
+            raise ValueError("至少需要兩根 K 線才能推斷時間週期")
+        diffs = np.diff(index.values.astype('datetime64[ms]').astype(np.int64))
+        values, counts = np.unique(diffs, return_counts=True)
+        step = pd.Timedelta(milliseconds=int(values[np.argmax(counts)]))
+        for timeframe, delta in TIMEFRAME_DELTAS.items():
+            if timeframe not in ('W1', 'MN1') and pd.Timedelta(delta) == step:
+                return timeframe
+        return f"{int(step.total_seconds())}s"
+
+    def _build(self) -> None:
+        """計算間隔位置、類型與區段編號"""
+        opens = self.index.values.astype('datetime64[ms]').astype(np.int64)
+        n = len(opens)
+        closes = self._aggregator.bucket_end(opens, self.timeframe)
+
+        # 間隔: 下一根 K 線的開盤時間晚於上一根 K 線的收盤時間
+        gap_start = closes[:-1]
+        gap_end = opens[1:]
+        missing_ms = gap_end - gap_start
+        is_gap = missing_ms > 0
+        if self.max_missing_bars > 0 and self.timeframe not in ('W1', 'MN1'):
+            is_gap &= missing_ms > self.max_missing_bars * self._aggregator.timeframe_ms(self.timeframe)
+
+        positions = np.flatnonzero(is_gap) + 1
+        start, end = gap_start[positions - 1], gap_end[positions - 1]
+        self.gap_positions = positions
+        self.gap_start = start
+        self.gap_end = end
+        self.gap_kinds = self._classify(start, end)
+
+        # 區段: 只有 split_on 中的間隔類型會開始新的區段
+        splits = positions[np.isin(self.gap_kinds, self.split_on)]
+        flags = np.zeros(n, dtype=np.int64)
+        flags[splits] = 1
+        self.segment_ids = np.cumsum(flags)
+        self.segment_starts = np.r_[0, splits].astype(np.int64) if n > 0 else np.empty(0, dtype=np.int64)
+        self.segment_ends = np.r_[splits, n].astype(np.int64) if n > 0 else np.empty(0, dtype=np.int64)
+
+    @staticmethod
+    def _classify(start: np.ndarray, end: np.ndarray) -> np.ndarray:
+        """
+        分類間隔 (start 為缺少時段的開始，end 為結束，Unix 毫秒)
+
+        - holiday: 缺少的時段涵蓋固定假日 (FX_HOLIDAYS)，且不超過 MAX_HOLIDAY_MS
+        - weekend: 缺少的時段涵蓋星期六，且不超過 MAX_WEEKEND_MS
+        - missing: 其他間隔
+        """
+        kinds = np.full(len(start), 'missing', dtype=object)
+        if len(start) == 0:
+            return kinds
+
+        duration = end - start
+        first_day = start // MS_PER_DAY
+        last_day = (end - 1) // MS_PER_DAY
+
+        # 1970-01-01 是星期四 (星期一為 0 時為 3)，找出第一個不早於開始日的星期六
+        weekday = (first_day + 3) % 7
+        saturday = first_day + (5 - weekday) % 7
+        weekend = (duration <= MAX_WEEKEND_MS) & (saturday <= last_day)
+
+        holiday = np.zeros(len(start), dtype=bool)
+        for offset in range(int(MAX_HOLIDAY_MS // MS_PER_DAY) + 1):
+            day = first_day + offset
+            dates = pd.DatetimeIndex(day.astype('datetime64[D]'))
+            on_holiday = np.zeros(len(start), dtype=bool)
+            for month, day_of_month in FX_HOLIDAYS:
+                on_holiday |= (dates.month == month) & (dates.day == day_of_month)
+            holiday |= on_holiday & (day <= last_day)
+        holiday &= duration <= MAX_HOLIDAY_MS
+
+        kinds[weekend] = 'weekend'
+        kinds[holiday] = 'holiday'
+        return kinds
+
+    # ---------- 查詢 ----------
+    @property
+    def n_segments(self) -> int:
+        """區段數量"""
+        return len(self.segment_starts)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        取得所有間隔的摘要
+
+        Returns:
+            pd.DataFrame: 每個間隔一列 (previous_time, time, duration, kind, missing_bars)，
+            time 為間隔後第一根 K 線的時間
+        """
+        if self.timeframe in ('W1', 'MN1'):
+            missing_bars = np.full(len(self.gap_positions), np.nan)
+        else:
+            missing_bars = (self.gap_end - self.gap_start) // self._aggregator.timeframe_ms(self.timeframe)
+        return pd.DataFrame({
+            'previous_time': self.index[self.gap_positions - 1],
+            'time': self.index[self.gap_positions],
+            'duration': pd.to_timedelta(self.gap_end - self.gap_start, unit='ms'),
+            'kind': self.gap_kinds,
+            'missing_bars': missing_bars
+        })
+
+    def counts(self) -> dict:
+        """各類型間隔的數量"""
+        return {kind: int(np.count_nonzero(self.gap_kinds == kind)) for kind in GAP_KINDS}
+
+    def position_in_segment(self) -> np.ndarray:
+        """
+        每根 K 線在所屬區段內的位置 (區段第一根為 0)
+
+        Returns:
+            np.ndarray: 與索引相同長度的整數陣列
+        """
+        return np.arange(len(self.index)) - self.segment_starts[self.segment_ids]
+
+    def valid_window_mask(self, window: int) -> np.ndarray:
+        """
+        以每根 K 線為結尾、長度為 window 的窗口是否完全位於同一區段
+
+        Args:
+            window (int): 窗口長度
+
+        Returns:
+            np.ndarray: 布林陣列
+        """
+        return self.position_in_segment() >= window - 1
+
+    def mask_rolling(
+        self,
+        values: Union[pd.Series, pd.DataFrame, np.ndarray],
+        window: int
+    ) -> Union[pd.Series, pd.DataFrame, np.ndarray]:
+        """
+        將跨越區段的滾動計算結果設為 NaN
+
+        對一般的 rolling 結果套用後，等同於在每個區段內分別計算 (min_periods=window)，
+        但只需要一次完整的 rolling 與一次遮罩。
+
+        Args:
+            values: 滾動計算結果，長度與索引相同
+            window (int): 滾動窗口長度
+
+        Returns:
+            與輸入相同類型的結果
+        """
+        valid = self.valid_window_mask(window)
+        if isinstance(values, pd.DataFrame):
+            return values.where(valid[:, None])
+        if isinstance(values, pd.Series):
+            return values.where(valid)
+        values = np.asarray(values, dtype=np.float64)
+        return np.where(valid.reshape((-1,) + (1,) * (values.ndim - 1)), values, np.nan)
+
+    def segment_slices(self) -> List[slice]:
+        """每個區段的位置範圍"""
+        return [slice(int(start), int(end)) for start, end in zip(self.segment_starts, self.segment_ends)]
+
+    def split(self, df: pd.DataFrame, min_length: int = 1) -> List[pd.DataFrame]:
+        """
+        依區段切分數據框
+
+        Args:
+            df (pd.DataFrame): 與索引對齊的數據框
+            min_length (int): 長度小於此值的區段會被略過
+
+        Returns:
+            List[pd.DataFrame]: 每個區段的數據
+        """
+        if len(df) != len(self.index):
+            raise ValueError("數據框長度與索引不同")
+        return [df.iloc[s] for s in self.segment_slices() if s.stop - s.start >= min_length]
+
+    def log_summary(self) -> None:
+        """記錄間隔統計"""
+        counts = self.counts()
+        total = len(self.gap_positions)
+        if total == 0:
+            self.logger.info(f"{self.timeframe} 時間序列是連續的")
+            return
+        self.logger.info(
+            f"{self.timeframe} 發現 {total} 個時間間隔 "
+            f"(週末 {counts['weekend']}，假日 {counts['holiday']}，缺漏 {counts['missing']})，共 {self.n_segments} 個區段"
+        )
+        missing = self.gap_kinds == 'missing'
+        if missing.any():
+            durations = (self.gap_end - self.gap_start)[missing]
+            self.logger.info(f"最大的缺漏間隔: {pd.Timedelta(milliseconds=int(durations.max()))}")
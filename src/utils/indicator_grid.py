@@ -0,0 +1,371 @@
+"""
+參數網格技術指標模組
+
+此模組一次計算同一種指標的多組參數，供參數優化使用：
+1. 每種指標回傳 (K 線數量, 參數組合數量) 的二維陣列，欄位順序與參數網格相同
+2. 移動平均類指標 (SMA、RSI、ATR) 共用前綴和 (cumulative sum)：
+   前綴和只計算一次，任何窗口長度的滾動平均都只需要一次相減，成本與參數數量成線性而與窗口長度無關
+3. 漲跌幅、真實範圍、EMA 等中間結果只計算一次，多個指標或多次呼叫共用
+4. 多個 span 的 EMA 以分塊的矩陣乘法一次計算 (見 _ema_batch)
+5. 計算結果與 TechnicalIndicatorCalculator 相同 (前綴和與分塊 EMA 的浮點誤差遠小於價格精度)
+
+布林通道的標準差不使用平方的前綴和: 變異數為兩個大數相減，誤差隨序列長度累積，
+因此與 TechnicalIndicatorCalculator 相同，每個週期使用 pandas 的滾動標準差 (週期數量通常很少)。
+"""
+
+from itertools import product
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .utils import setup_logger
+
+
+class IndicatorGrid:
+    """
+    參數網格技術指標類別
+
+    範例:
+        >>> grid = IndicatorGrid(df)
+        >>> ema = grid.ema(range(5, 201))                        # (n, 196)
+        >>> middle, std, upper, lower = grid.bollinger([10, 20, 50], [1.5, 2, 2.5])
+        >>> features = grid.to_frame(grid.rsi([7, 14, 21]), grid.columns('rsi', [7, 14, 21]))
+    """
+
+    # 分塊計算 EMA 的區塊長度
+    EMA_BLOCK = 64
+
+    def __init__(self, df: pd.DataFrame, dtype: type = np.float64):
+        """
+        初始化參數網格計算器
+
+        Args:
+            df (pd.DataFrame): 包含 high、low、close 的 K 線數據 (只需要 close 時可以只有 close)
+            dtype (type): 輸出陣列的型別，大型網格可使用 np.float32 減少一半記憶體 (計算仍使用 float64)
+        """
+        if 'close' not in df.columns:
+            raise ValueError("數據框缺少 close 欄位")
+        self.logger = setup_logger('IndicatorGrid')
+        self.index = df.index
+        self.dtype = dtype
+        self._df = df
+        self.close = df['close'].to_numpy(dtype=np.float64)
+        self.n = len(self.close)
+        # 收盤價前綴和減去的平均價格
+        self._center = float(np.nanmean(self.close)) if np.isfinite(self.close).any() else 0.0
+
+        # 共用的中間結果，第一次使用時計算
+        self._cumsums: Dict[str, np.ndarray] = {}
+        self._ema_cache: Dict[float, np.ndarray] = {}
+
+    # ---------- 共用的中間結果 ----------
+    def _cumsum(self, name: str) -> np.ndarray:
+        """
+        取得中間序列的前綴和 (開頭補 0，長度為 n + 1)
+
+        - close: 收盤價 (減去平均價格)，用於 SMA
+        - gain / loss: 漲幅與跌幅 (第一根 K 線為 0)，用於 RSI
+        - true_range: 真實範圍，用於 ATR
+        """
+        if name not in self._cumsums:
+            if name == 'close':
+                values = self.close - self._center
+            elif name in ('gain', 'loss'):
+                delta = np.diff(self.close, prepend=np.nan)
+                values = np.where(delta > 0, delta, 0.0) if name == 'gain' else np.where(delta < 0, -delta, 0.0)
+            elif name == 'true_range':
+                values = self._true_range()
+            else:
+                raise ValueError(f"不支援的中間序列: {name}")
+            cumsum = np.empty(self.n + 1, dtype=np.float64)
+            cumsum[0] = 0.0
+            np.cumsum(values, out=cumsum[1:])
+            self._cumsums[name] = cumsum
+        return self._cumsums[name]
+
+    def _true_range(self) -> np.ndarray:
+        """真實範圍 (與 TechnicalIndicatorCalculator.calculate_atr 相同，第一根 K 線為最高價減最低價)"""
+        for col in ('high', 'low'):
+            if col not in self._df.columns:
+                raise ValueError(f"數據框缺少 {col} 欄位")
+        high = self._df['high'].to_numpy(dtype=np.float64)
+        low = self._df['low'].to_numpy(dtype=np.float64)
+        prev_close = np.r_[np.nan, self.close[:-1]]
+        return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+    def _rolling_sum(self, name: str, windows: Sequence[int]) -> np.ndarray:
+        """
+        以前綴和計算多個窗口長度的滾動總和
+
+        Returns:
+            np.ndarray: (n, len(windows))，窗口未填滿的位置為 NaN
+        """
+        cumsum = self._cumsum(name)
+        # 以 (參數, 時間) 配置後轉置，每個參數寫入連續的記憶體 (回傳 Fortran 順序的 (n, k) 陣列)
+        out = np.full((len(windows), self.n), np.nan)
+        for j, window in enumerate(windows):
+            if window < 1:
+                raise ValueError(f"窗口長度必須大於 0: {window}")
+            if window <= self.n:
+                np.subtract(cumsum[window:], cumsum[:-window], out=out[j, window - 1:])
+        return out.T
+
+    def _ema(self, span: float) -> np.ndarray:
+        """單一 span 的 EMA (與 ewm(span=..., adjust=False) 相同)，結果會被快取"""
+        if span not in self._ema_cache:
+            self._ema_batch([span])
+        return self._ema_cache[span]
+
+    def _ema_batch(self, spans: Sequence[float]) -> None:
+        """
+        計算尚未快取的 span 的 EMA 並存入快取
+
+        pandas 的 ewm 每次只能計算一個 span，逐一呼叫時每個 span 都要完整掃描一次序列。
+        此處把序列切成長度 L 的區塊 (m 個)，EMA 的遞迴 y[t] = d·y[t-1] + a·x[t] 在區塊內展開為
+        y[b, p] = Σ_q a·d^(p-q)·x[b, q] + d^(p+1)·c[b-1]，其中 c[b-1] 為前一區塊最後的 EMA：
+        1. 每個區塊最後一列的區塊內加權和為一次矩陣與向量相乘
+        2. c 為以 d^L 遞迴的 m 個數值，轉換為 ewm(alpha=1-d^L) 一次計算
+        3. 把 c 附加在區塊矩陣的最後一欄，整個 EMA 為一次 (m, L+1) @ (L+1, L) 的矩陣乘法
+        收盤價含 NaN 或無限值時 (ewm 的 NaN 處理無法展開) 改為逐一使用 pandas。
+        """
+        spans = [span for span in dict.fromkeys(spans) if span not in self._ema_cache]
+        if not spans:
+            return
+        for span in spans:
+            if span < 1:
+                raise ValueError(f"span 必須大於或等於 1: {span}")
+        if self.n == 0 or not np.isfinite(self.close).all():
+            for span in spans:
+                self._ema_cache[span] = pd.Series(self.close).ewm(span=span, adjust=False).mean().to_numpy(copy=True)
+            return
+
+        L = self.EMA_BLOCK
+        m = -(-self.n // L)
+        # 區塊矩陣: 前 L 欄為收盤價 (最後一個區塊以 0 補齊)，最後一欄為前一區塊最後的 EMA
+        padded = np.zeros(m * L)
+        padded[:self.n] = self.close
+        blocks = np.empty((m, L + 1))
+        blocks[:, :L] = padded.reshape(m, L)
+        positions = np.arange(L)
+        # lags[q, p] = p - q
+        lags = positions[None, :] - positions[:, None]
+        carry = np.empty(m + 1)
+        out = np.empty((len(spans), m * L))
+        for j, span in enumerate(spans):
+            alpha = 2.0 / (span + 1.0)
+            decay = 1.0 - alpha
+            # weights[q, p] = a·d^(p-q) (q <= p)，最後一列為 d^(p+1)
+            weights = np.empty((L + 1, L))
+            weights[:L] = np.where(lags >= 0, alpha * decay ** np.maximum(lags, 0), 0.0)
+            weights[L] = decay ** (positions + 1)
+
+            # 區塊之間的遞迴: c[b] = d^L·c[b-1] + 區塊內加權和；第一個輸出等於第一個收盤價 (c[-1] = x[0])
+            block_alpha = 1.0 - decay ** L
+            carry[0] = self.close[0]
+            np.divide(blocks[:, :L] @ weights[:L, L - 1], block_alpha, out=carry[1:])
+            carry = pd.Series(carry, copy=False).ewm(alpha=block_alpha, adjust=False).mean().to_numpy(copy=True)
+
+            blocks[:, L] = carry[:-1]
+            np.matmul(blocks, weights, out=out[j].reshape(m, L))
+            self._ema_cache[span] = out[j, :self.n]
+
+    def _output(self, values: np.ndarray) -> np.ndarray:
+        """轉換為輸出型別"""
+        return values.astype(self.dtype, copy=False)
+
+    # ---------- 指標 ----------
+    def sma(self, periods: Sequence[int]) -> np.ndarray:
+        """
+        簡單移動平均
+
+        Args:
+            periods (Sequence[int]): 週期列表
+
+        Returns:
+            np.ndarray: (n, len(periods))
+        """
+        periods = [int(period) for period in periods]
+        return self._output(self._rolling_sum('close', periods) / np.asarray(periods) + self._center)
+
+    def ema(self, spans: Sequence[float]) -> np.ndarray:
+        """
+        指數移動平均 (與 calculate_ema 相同)
+
+        Args:
+            spans (Sequence[float]): span 列表
+
+        Returns:
+            np.ndarray: (n, len(spans))
+        """
+        self._ema_batch(spans)
+        out = np.empty((len(spans), self.n), dtype=self.dtype)
+        for j, span in enumerate(spans):
+            out[j] = self._ema_cache[span]
+        return out.T
+
+    def macd(
+        self,
+        fast_spans: Sequence[float],
+        slow_spans: Sequence[float],
+        signal_spans: Sequence[float]
+    ) -> Tuple[np.ndarray, np.ndarray, List[Tuple[float, float, float]]]:
+        """
+        MACD 與信號線 (只計算 fast < slow 的組合)
+
+        所有 span 的 EMA 一次計算；同一個信號線 span 的所有 MACD 序列以一次 ewm 呼叫計算。
+
+        Args:
+            fast_spans (Sequence[float]): 快線 span 列表
+            slow_spans (Sequence[float]): 慢線 span 列表
+            signal_spans (Sequence[float]): 信號線 span 列表
+
+        Returns:
+            Tuple: (macd, macd_signal, 參數列表 [(fast, slow, signal), ...])，陣列形狀為 (n, 組合數量)
+        """
+        pairs = [(fast, slow) for fast, slow in product(fast_spans, slow_spans) if fast < slow]
+        if not pairs:
+            raise ValueError("沒有 fast < slow 的 EMA 組合")
+
+        self._ema_batch(list(fast_spans) + list(slow_spans))
+        lines = np.empty((len(pairs), self.n), dtype=np.float64)
+        for j, (fast, slow) in enumerate(pairs):
+            np.subtract(self._ema(fast), self._ema(slow), out=lines[j])
+        lines = lines.T
+
+        params = []
+        macd = np.empty((len(pairs) * len(signal_spans), self.n), dtype=self.dtype).T
+        signal = np.empty_like(macd)
+        for k, span in enumerate(signal_spans):
+            columns = slice(k * len(pairs), (k + 1) * len(pairs))
+            macd[:, columns] = lines
+            signal[:, columns] = pd.DataFrame(lines, copy=False).ewm(span=span, adjust=False).mean().to_numpy()
+            params.extend((fast, slow, span) for fast, slow in pairs)
+        return macd, signal, params
+
+    def rsi(self, periods: Sequence[int]) -> np.ndarray:
+        """
+        RSI (與 calculate_rsi 相同的簡單移動平均版本)
+
+        漲幅與跌幅的前綴和共用，所有週期只需要各一次相減。
+
+        Args:
+            periods (Sequence[int]): 週期列表
+
+        Returns:
+            np.ndarray: (n, len(periods))
+        """
+        periods = [int(period) for period in periods]
+        gain = self._rolling_sum('gain', periods)
+        loss = self._rolling_sum('loss', periods)
+        # 週期相同時平均值的比例等於總和的比例
+        with np.errstate(divide='ignore', invalid='ignore'):
+            np.divide(gain, loss, out=gain)
+            gain += 1
+            np.divide(100, gain, out=gain)
+            np.subtract(100, gain, out=gain)
+        return self._output(gain)
+
+    def bollinger(
+        self,
+        periods: Sequence[int],
+        std_devs: Sequence[float]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        布林通道 (與 calculate_bollinger_bands 相同，標準差 ddof=1)
+
+        中線與標準差只依週期計算 (與 calculate_bollinger_bands 相同使用 pandas 的 rolling，結果完全相同)，
+        上下軌為 週期 × 倍數 的所有組合。
+
+        Args:
+            periods (Sequence[int]): 週期列表
+            std_devs (Sequence[float]): 標準差倍數列表
+
+        Returns:
+            Tuple: (bb_middle, bb_std, bb_upper, bb_lower)
+                bb_middle 與 bb_std 為 (n, len(periods))，
+                bb_upper 與 bb_lower 為 (n, len(periods) * len(std_devs))，順序為 product(periods, std_devs)
+        """
+        periods = [int(period) for period in periods]
+        # 以 (參數, 時間) 配置後轉置，與 _rolling_sum 相同
+        middle = np.empty((len(periods), self.n))
+        std = np.empty((len(periods), self.n))
+        close = pd.Series(self.close, copy=False)
+        for j, period in enumerate(periods):
+            if period < 1:
+                raise ValueError(f"窗口長度必須大於 0: {period}")
+            rolling = close.rolling(window=period)
+            middle[j] = rolling.mean().to_numpy()
+            std[j] = rolling.std().to_numpy()
+        middle, std = middle.T, std.T
+
+        # 上下軌: 每個 (週期, 倍數) 組合寫入連續的記憶體，欄位順序為 product(periods, std_devs)
+        multipliers = np.asarray(std_devs, dtype=np.float64)
+        upper = np.empty((len(periods), len(multipliers), self.n), dtype=self.dtype)
+        lower = np.empty_like(upper)
+        for k, multiplier in enumerate(multipliers):
+            width = std.T * multiplier
+            np.add(middle.T, width, out=upper[:, k])
+            np.subtract(middle.T, width, out=lower[:, k])
+        return (self._output(middle), self._output(std),
+                upper.reshape(-1, self.n).T, lower.reshape(-1, self.n).T)
+
+    def atr(self, periods: Sequence[int]) -> np.ndarray:
+        """
+        ATR (與 calculate_atr 相同的簡單移動平均版本)
+
+        Args:
+            periods (Sequence[int]): 週期列表
+
+        Returns:
+            np.ndarray: (n, len(periods))
+        """
+        periods = [int(period) for period in periods]
+        return self._output(self._rolling_sum('true_range', periods) / np.asarray(periods))
+
+    # ---------- 輸出 ----------
+    @staticmethod
+    def columns(name: str, *grids: Sequence) -> List[str]:
+        """
+        產生與陣列欄位對應的名稱 (多個網格時依 product 順序)，例如 columns('bb_upper', [20], [2, 2.5])
+        -> ['bb_upper_20_2', 'bb_upper_20_2.5']
+
+        Args:
+            name (str): 指標名稱
+            *grids: 參數網格
+
+        Returns:
+            List[str]: 欄位名稱
+        """
+        def fmt(value) -> str:
+            return f"{value:g}" if isinstance(value, float) else str(value)
+        return ['_'.join([name] + [fmt(value) for value in values]) for values in product(*grids)]
+
+    def to_frame(self, values: np.ndarray, columns: List[str]) -> pd.DataFrame:
+        """
+        將二維陣列轉換為與輸入數據相同索引的數據框 (不複製數據)
+
+        Args:
+            values (np.ndarray): 指標陣列
+            columns (List[str]): 欄位名稱
+
+        Returns:
+            pd.DataFrame: 數據框
+        """
+        if values.shape[1] != len(columns):
+            raise ValueError(f"欄位數量不符: 陣列 {values.shape[1]}，名稱 {len(columns)}")
+        return pd.DataFrame(values, index=self.index, columns=columns, copy=False)
+
+    def clear(self, spans: Optional[Sequence[float]] = None) -> None:
+        """
+        釋放快取的中間結果
+
+        Args:
+            spans (Sequence[float], optional): 只釋放這些 span 的 EMA，未指定時釋放全部
+        """
+        if spans is None:
+            self._cumsums.clear()
+            self._ema_cache.clear()
+            return
+        for span in spans:
+            self._ema_cache.pop(span, None)
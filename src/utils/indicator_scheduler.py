@@ -0,0 +1,135 @@
+"""
+相依圖排程模組
+
+此模組依任務之間的相依關係，在執行緒池中平行執行互相獨立的計算：
+1. 每個任務宣告其相依的任務，只執行要求的任務與其 (遞移) 相依任務，其他任務不會執行
+2. 相依任務全部完成後才提交，互相獨立的任務同時執行
+   (pandas 的滾動與 ewm 運算以及大型 numpy 陣列運算會釋放 GIL，因此執行緒可以真正平行)
+3. 任一任務失敗時取消尚未開始的任務，並將錯誤拋出給呼叫端
+
+任務函數接收 {相依任務名稱: 結果}，回傳任務的結果。
+
+TechnicalIndicatorCalculator.calculate_indicators 在無法使用融合核心時以此排程指標群組：
+只需要部分群組 (例如 FeatureStore.compute_or_load 只計算儲存中缺少的群組)、
+數據含有 NaN 或無限值，或以 fused=False 建立計算器。
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from .utils import setup_logger
+
+
+class DependencyScheduler:
+    """
+    相依圖排程類別
+
+    範例:
+        >>> scheduler = DependencyScheduler(max_workers=4)
+        >>> scheduler.add('ema', lambda deps: compute_ema(close))
+        >>> scheduler.add('macd', lambda deps: compute_macd(deps['ema']), depends_on=['ema'])
+        >>> scheduler.add('rsi', lambda deps: compute_rsi(close))
+        >>> results = scheduler.run(['macd'])          # 只執行 ema 與 macd
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        初始化排程器
+
+        Args:
+            max_workers (int, optional): 執行緒數量，預設為 CPU 核心數 (1 時在呼叫端的執行緒依序執行)
+        """
+        self.logger = setup_logger('DependencyScheduler')
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._tasks: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+        self._depends_on: Dict[str, List[str]] = {}
+
+    def add(self, name: str, func: Callable[[Dict[str, Any]], Any], depends_on: Sequence[str] = ()) -> None:
+        """
+        新增任務
+
+        Args:
+            name (str): 任務名稱
+            func (Callable): 任務函數，參數為 {相依任務名稱: 結果}
+            depends_on (Sequence[str]): 相依的任務名稱
+        """
+        if name in self._tasks:
+            raise ValueError(f"任務 {name} 已存在")
+        self._tasks[name] = func
+        self._depends_on[name] = list(depends_on)
+
+    def resolve(self, names: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        取得需要執行的任務 (依相依關係排序)
+
+        Args:
+            names (Iterable[str], optional): 要求的任務，預設為全部
+
+        Returns:
+            List[str]: 要求的任務與其相依任務，相依任務排在前面
+        """
+        order: List[str] = []
+        visiting = set()
+
+        def visit(name: str) -> None:
+            if name in order:
+                return
+            if name not in self._tasks:
+                raise ValueError(f"未知的任務: {name}")
+            if name in visiting:
+                raise ValueError(f"任務 {name} 的相依關係有循環")
+            visiting.add(name)
+            for dependency in self._depends_on[name]:
+                visit(dependency)
+            visiting.discard(name)
+            order.append(name)
+
+        for name in (self._tasks if names is None else names):
+            visit(name)
+        return order
+
+    def run(self, names: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        執行要求的任務
+
+        Args:
+            names (Iterable[str], optional): 要求的任務，預設為全部
+
+        Returns:
+            Dict[str, Any]: {任務名稱: 結果}，包含執行的相依任務
+        """
+        order = self.resolve(names)
+        results: Dict[str, Any] = {}
+        if self.max_workers <= 1 or len(order) <= 1:
+            for name in order:
+                results[name] = self._call(name, results)
+            return results
+
+        remaining = list(order)
+        running: Dict[Future, str] = {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(order)),
+                                thread_name_prefix='scheduler') as executor:
+            try:
+                while remaining or running:
+                    # 提交相依任務都已完成的任務
+                    for name in [name for name in remaining
+                                 if all(dep in results for dep in self._depends_on[name])]:
+                        remaining.remove(name)
+                        running[executor.submit(self._call, name, dict(results))] = name
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        results[running.pop(future)] = future.result()
+            except Exception:
+                for future in running:
+                    future.cancel()
+                raise
+        return results
+
+    def _call(self, name: str, results: Dict[str, Any]) -> Any:
+        """執行單一任務"""
+        try:
+            return self._tasks[name]({dep: results[dep] for dep in self._depends_on[name]})
+        except Exception as e:
+            self.logger.error(f"任務 {name} 執行失敗: {str(e)}")
+            raise
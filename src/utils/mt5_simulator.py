@@ -0,0 +1,613 @@
+"""
+MT5 模擬後端模組
+
+此模組提供一個不需要 MT5 終端機的模擬後端，實作與 MetaTrader5 模組相同的函數與常數，
+可以傳給 MT5Connection(backend=...) 使用，用於離線執行與壓力測試：
+1. 從已儲存的 K 線與報價數據提供 copy_rates_* / copy_ticks_*
+2. 模擬帳戶與持倉
+3. 以目前報價成交 order_send 的市價單
+
+範例:
+    >>> sim = SimulatedMT5()
+    >>> sim.add_rates("EURUSD", "M5", df)
+    >>> connection = MT5Connection(backend=sim)
+    >>> connection.connect()
+    >>> df = MT5History(connection).get_historical_data("EURUSD", "M5", count=1000)
+"""
+
+import itertools
+import time as time_module
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .utils import setup_logger
+
+# ==================== MT5 常數 ====================
+# 數值與 MetaTrader5 模組相同
+TIMEFRAME_M1 = 1
+TIMEFRAME_M5 = 5
+TIMEFRAME_M15 = 15
+TIMEFRAME_M30 = 30
+TIMEFRAME_H1 = 16385
+TIMEFRAME_H4 = 16388
+TIMEFRAME_D1 = 16408
+TIMEFRAME_W1 = 32769
+TIMEFRAME_MN1 = 49153
+
+TIMEFRAME_CODES: Dict[str, int] = {
+    'M1': TIMEFRAME_M1,
+    'M5': TIMEFRAME_M5,
+    'M15': TIMEFRAME_M15,
+    'M30': TIMEFRAME_M30,
+    'H1': TIMEFRAME_H1,
+    'H4': TIMEFRAME_H4,
+    'D1': TIMEFRAME_D1,
+    'W1': TIMEFRAME_W1,
+    'MN1': TIMEFRAME_MN1
+}
+
+# 固定長度時間週期的秒數 (MN1 的長度不固定，另外處理)
+TIMEFRAME_SECONDS: Dict[int, int] = {
+    TIMEFRAME_M1: 60,
+    TIMEFRAME_M5: 300,
+    TIMEFRAME_M15: 900,
+    TIMEFRAME_M30: 1800,
+    TIMEFRAME_H1: 3600,
+    TIMEFRAME_H4: 14400,
+    TIMEFRAME_D1: 86400,
+    TIMEFRAME_W1: 604800
+}
+
+ORDER_TYPE_BUY = 0
+ORDER_TYPE_SELL = 1
+ORDER_TYPE_BUY_LIMIT = 2
+ORDER_TYPE_SELL_LIMIT = 3
+ORDER_TYPE_BUY_STOP = 4
+ORDER_TYPE_SELL_STOP = 5
+
+POSITION_TYPE_BUY = 0
+POSITION_TYPE_SELL = 1
+
+TRADE_ACTION_DEAL = 1
+TRADE_ACTION_PENDING = 5
+TRADE_ACTION_SLTP = 6
+TRADE_ACTION_MODIFY = 7
+TRADE_ACTION_REMOVE = 8
+
+ORDER_TIME_GTC = 0
+
+ORDER_FILLING_FOK = 0
+ORDER_FILLING_IOC = 1
+ORDER_FILLING_RETURN = 2
+
+TRADE_RETCODE_REQUOTE = 10004
+TRADE_RETCODE_REJECT = 10006
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_DONE_PARTIAL = 10010
+TRADE_RETCODE_INVALID = 10013
+TRADE_RETCODE_INVALID_VOLUME = 10014
+TRADE_RETCODE_INVALID_PRICE = 10015
+TRADE_RETCODE_NO_MONEY = 10019
+TRADE_RETCODE_PRICE_OFF = 10021
+TRADE_RETCODE_POSITION_CLOSED = 10036
+
+COPY_TICKS_ALL = -1
+COPY_TICKS_INFO = 1
+COPY_TICKS_TRADE = 2
+
+# copy_rates_* 與 copy_ticks_* 回傳的結構化陣列格式
+RATES_DTYPE = np.dtype([
+    ('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+    ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8')
+])
+TICKS_DTYPE = np.dtype([
+    ('time', '<i8'), ('bid', '<f8'), ('ask', '<f8'), ('last', '<f8'), ('volume', '<u8'),
+    ('time_msc', '<i8'), ('flags', '<u4'), ('volume_real', '<f8')
+])
+
+# 錯誤代碼
+RES_S_OK = 1
+RES_E_FAIL = -1
+RES_E_INVALID_PARAMS = -2
+RES_E_NOT_FOUND = -4
+
+
+def _to_seconds(value: Any) -> int:
+    """將 datetime / Timestamp / 整數秒數轉換為 Unix 秒數 (不含時區的時間視為 UTC)"""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert('UTC').tz_localize(None)
+    return int(ts.value // 10**9)
+
+
+def _frame_to_records(df: pd.DataFrame, dtype: np.dtype, time_column: str = 'time') -> np.ndarray:
+    """將以時間為索引的數據框轉換為 MT5 結構化陣列"""
+    if time_column not in df.columns:
+        df = df.reset_index()
+    times = df[time_column]
+    if np.issubdtype(times.dtype, np.datetime64):
+        seconds = times.to_numpy(dtype='datetime64[s]').astype(np.int64)
+    else:
+        seconds = times.to_numpy(dtype=np.int64)
+
+    records = np.zeros(len(df), dtype=dtype)
+    records['time'] = seconds
+    for name in dtype.names:
+        if name != 'time' and name in df.columns:
+            records[name] = df[name].to_numpy()
+    if 'time_msc' in dtype.names and 'time_msc' not in df.columns:
+        records['time_msc'] = seconds * 1000
+    return records
+
+
+def _closed_count(times: np.ndarray, now: int, timeframe: int) -> int:
+    """計算開盤時間為 times (已排序) 的 K 線中，在 now 之前已收盤的數量"""
+    if timeframe == TIMEFRAME_MN1:
+        # 月 K 線在下個月初收盤: 開盤時間早於 now 所在月份月初的 K 線都已收盤
+        month_start = np.datetime64(now, 's').astype('datetime64[M]').astype('datetime64[s]').astype(np.int64)
+        return int(np.searchsorted(times, month_start, side='left'))
+    return int(np.searchsorted(times, now - TIMEFRAME_SECONDS[timeframe], side='right'))
+
+
+class SimulatedMT5:
+    """
+    模擬 MT5 後端類別
+
+    - K 線：copy_rates_* 只回傳模擬時鐘 (current_time) 之前已收盤的 K 線，
+      尚未收盤的 K 線的最高、最低與收盤價是未來的數據
+    - 報價：symbol_info_tick 回傳模擬時鐘當下最新的報價；有報價數據時使用報價，
+      否則以最小時間週期 K 線推算 (尚未收盤的 K 線使用開盤價，已收盤的使用收盤價)
+    - 損益：以報價貨幣計算 (價差 × 手數 × 合約大小)，假設與帳戶貨幣相同
+    - 成交：市價單以目前報價全部成交，可設定 latency 模擬終端機的往返延遲
+    """
+
+    REQUIRES_CREDENTIALS = False
+
+    def __init__(
+        self,
+        balance: float = 10000.0,
+        currency: str = 'USD',
+        leverage: int = 100,
+        latency: float = 0.0
+    ):
+        """
+        初始化模擬後端
+
+        Args:
+            balance (float): 初始餘額
+            currency (str): 帳戶貨幣
+            leverage (int): 槓桿
+            latency (float): 每次呼叫的模擬延遲 (秒)
+        """
+        self.logger = setup_logger('SimulatedMT5')
+        self.latency = latency
+        self.current_time: Optional[pd.Timestamp] = None
+
+        self._initialized = False
+        self._last_error: Tuple[int, str] = (RES_S_OK, 'Success')
+        self._symbols: Dict[str, SimpleNamespace] = {}
+        self._rates: Dict[Tuple[str, int], np.ndarray] = {}
+        self._ticks: Dict[str, np.ndarray] = {}
+
+        self._balance = balance
+        self._currency = currency
+        self._leverage = leverage
+        self._positions: Dict[int, SimpleNamespace] = {}
+        self._tickets = itertools.count(1)
+        self.deals: List[Dict[str, Any]] = []
+
+        # 匯出常數，讓此物件可以直接取代 MetaTrader5 模組
+        for name, value in globals().items():
+            if name.isupper() and isinstance(value, int):
+                setattr(self, name, value)
+
+    # ==================== 數據載入 ====================
+    def add_symbol(
+        self,
+        symbol: str,
+        point: float = 0.00001,
+        digits: int = 5,
+        contract_size: float = 100000.0,
+        volume_min: float = 0.01,
+        volume_max: float = 100.0,
+        volume_step: float = 0.01
+    ) -> None:
+        """
+        新增或更新交易品種規格
+
+        Args:
+            symbol (str): 交易品種
+            point (float): 最小報價單位
+            digits (int): 小數位數
+            contract_size (float): 合約大小
+            volume_min (float): 最小手數
+            volume_max (float): 最大手數
+            volume_step (float): 手數間距
+        """
+        self._symbols[symbol] = SimpleNamespace(
+            name=symbol, point=point, digits=digits, trade_contract_size=contract_size,
+            volume_min=volume_min, volume_max=volume_max, volume_step=volume_step,
+            visible=True, select=True
+        )
+
+    def add_rates(self, symbol: str, timeframe: str, df: pd.DataFrame) -> None:
+        """
+        載入 K 線數據 (格式與 MT5History.get_historical_data 的結果相同)
+
+        Args:
+            symbol (str): 交易品種
+            timeframe (str): 時間週期 (M1, M5, ..., MN1)
+            df (pd.DataFrame): 以時間為索引的 K 線數據
+        """
+        if timeframe not in TIMEFRAME_CODES:
+            raise ValueError(f"不支援的時間週期: {timeframe}")
+        if symbol not in self._symbols:
+            self.add_symbol(symbol)
+        records = _frame_to_records(df, RATES_DTYPE)
+        self._rates[(symbol, TIMEFRAME_CODES[timeframe])] = np.sort(records, order='time', kind='stable')
+        self.logger.info(f"已載入 {symbol} {timeframe} K 線 {len(records)} 筆")
+
+    def add_ticks(self, symbol: str, df: pd.DataFrame) -> None:
+        """
+        載入報價數據 (格式與 MT5History.get_ticks 的結果相同)
+
+        Args:
+            symbol (str): 交易品種
+            df (pd.DataFrame): 以時間為索引的報價數據
+        """
+        if symbol not in self._symbols:
+            self.add_symbol(symbol)
+        records = _frame_to_records(df, TICKS_DTYPE)
+        self._ticks[symbol] = np.sort(records, order='time_msc', kind='stable')
+        self.logger.info(f"已載入 {symbol} 報價 {len(records)} 筆")
+
+    def load_store(self, store, symbol: str, timeframe: str, dataset: str = 'raw') -> None:
+        """
+        從 ParquetStore 載入 K 線數據
+
+        Args:
+            store (ParquetStore): 數據儲存
+            symbol (str): 交易品種
+            timeframe (str): 時間週期
+            dataset (str): 數據集名稱
+        """
+        df = store.read(symbol, timeframe, dataset)
+        if df is None:
+            raise ValueError(f"儲存中沒有 {symbol} {timeframe} {dataset} 數據")
+        self.add_rates(symbol, timeframe, df)
+
+    def set_time(self, current_time: Optional[datetime]) -> None:
+        """
+        設定模擬時鐘，只有此時間之前已收盤的 K 線與時間不晚於此的報價可以被讀取；None 表示使用全部數據
+
+        Args:
+            current_time (datetime, optional): 模擬的目前時間
+        """
+        self.current_time = pd.Timestamp(current_time) if current_time is not None else None
+
+    # ==================== 內部工具 ====================
+    def _call(self) -> None:
+        """模擬終端機延遲"""
+        if self.latency > 0:
+            time_module.sleep(self.latency)
+
+    def _fail(self, code: int, message: str) -> None:
+        """記錄錯誤並回傳 None"""
+        self._last_error = (code, message)
+        return None
+
+    def _ok(self) -> None:
+        """記錄成功"""
+        self._last_error = (RES_S_OK, 'Success')
+
+    def _now_seconds(self) -> Optional[int]:
+        """模擬時鐘對應的 Unix 秒數"""
+        return _to_seconds(self.current_time) if self.current_time is not None else None
+
+    def _visible_rates(self, symbol: str, timeframe: int) -> Optional[np.ndarray]:
+        """取得模擬時鐘之前已收盤的 K 線"""
+        rates = self._rates.get((symbol, timeframe))
+        if rates is None:
+            return None
+        now = self._now_seconds()
+        if now is None:
+            return rates
+        return rates[:_closed_count(rates['time'], now, timeframe)]
+
+    def _visible_ticks(self, symbol: str) -> Optional[np.ndarray]:
+        """取得模擬時鐘之前的報價"""
+        ticks = self._ticks.get(symbol)
+        if ticks is None:
+            return None
+        now = self._now_seconds()
+        if now is None:
+            return ticks
+        return ticks[:np.searchsorted(ticks['time_msc'], now * 1000, side='right')]
+
+    def _current_tick(self, symbol: str) -> Optional[SimpleNamespace]:
+        """取得目前報價"""
+        ticks = self._visible_ticks(symbol)
+        if ticks is not None and len(ticks) > 0:
+            tick = ticks[-1]
+            return SimpleNamespace(**{name: tick[name].item() for name in TICKS_DTYPE.names})
+
+        # 沒有報價數據時，使用最小時間週期的 K 線推算
+        spec = self._symbols[symbol]
+        now = self._now_seconds()
+        for code in sorted(code for sym, code in self._rates if sym == symbol):
+            rates = self._rates[(symbol, code)]
+            if now is not None:
+                rates = rates[:np.searchsorted(rates['time'], now, side='right')]
+            if len(rates) == 0:
+                continue
+            bar = rates[-1]
+            # 尚未收盤的 K 線只有開盤價是已知的報價
+            closed = now is None or _closed_count(rates['time'][-1:], now, code) > 0
+            bid = float(bar['close'] if closed else bar['open'])
+            return SimpleNamespace(
+                time=int(bar['time']), bid=bid, ask=bid + int(bar['spread']) * spec.point,
+                last=0.0, volume=0, time_msc=int(bar['time']) * 1000, flags=0, volume_real=0.0
+            )
+        return None
+
+    def _position_profit(self, position: SimpleNamespace) -> float:
+        """以目前報價計算持倉浮動損益"""
+        tick = self._current_tick(position.symbol)
+        if tick is None:
+            return 0.0
+        spec = self._symbols[position.symbol]
+        if position.type == POSITION_TYPE_BUY:
+            diff = tick.bid - position.price_open
+        else:
+            diff = position.price_open - tick.ask
+        return diff * position.volume * spec.trade_contract_size
+
+    def _margin(self, symbol: str, volume: float, price: float) -> float:
+        """計算所需保證金"""
+        return volume * self._symbols[symbol].trade_contract_size * price / self._leverage
+
+    # ==================== 連接 ====================
+    def initialize(self, *args, **kwargs) -> bool:
+        """初始化模擬終端機"""
+        self._call()
+        self._initialized = True
+        self._ok()
+        return True
+
+    def login(self, login: int = 0, password: str = "", server: str = "", **kwargs) -> bool:
+        """模擬登入，任何憑證都會成功"""
+        self._call()
+        if not self._initialized:
+            self._fail(RES_E_FAIL, 'Terminal: not initialized')
+            return False
+        self._ok()
+        return True
+
+    def shutdown(self) -> None:
+        """關閉模擬終端機"""
+        self._initialized = False
+
+    def last_error(self) -> Tuple[int, str]:
+        """取得最後一次錯誤"""
+        return self._last_error
+
+    def terminal_info(self) -> Optional[SimpleNamespace]:
+        """取得終端機資訊，未初始化時回傳 None"""
+        if not self._initialized:
+            return self._fail(RES_E_FAIL, 'Terminal: not initialized')
+        return SimpleNamespace(connected=True, trade_allowed=True, name='SimulatedMT5')
+
+    # ==================== 帳戶與持倉 ====================
+    def account_info(self) -> Optional[SimpleNamespace]:
+        """取得模擬帳戶資訊"""
+        self._call()
+        if not self._initialized:
+            return self._fail(RES_E_FAIL, 'Terminal: not initialized')
+        profit = sum(self._position_profit(pos) for pos in self._positions.values())
+        margin = sum(self._margin(pos.symbol, pos.volume, pos.price_open) for pos in self._positions.values())
+        equity = self._balance + profit
+        self._ok()
+        return SimpleNamespace(
+            login=0, balance=self._balance, equity=equity, profit=profit, margin=margin,
+            margin_free=equity - margin, margin_level=(equity / margin * 100) if margin > 0 else 0.0,
+            currency=self._currency, leverage=self._leverage
+        )
+
+    def positions_get(self, symbol: Optional[str] = None, ticket: Optional[int] = None, **kwargs) -> Tuple:
+        """取得模擬持倉"""
+        self._call()
+        if not self._initialized:
+            return self._fail(RES_E_FAIL, 'Terminal: not initialized')
+        result = []
+        for pos in self._positions.values():
+            if symbol is not None and pos.symbol != symbol:
+                continue
+            if ticket is not None and pos.ticket != ticket:
+                continue
+            pos.profit = self._position_profit(pos)
+            result.append(SimpleNamespace(**vars(pos)))
+        self._ok()
+        return tuple(result)
+
+    # ==================== 交易品種與報價 ====================
+    def symbol_info(self, symbol: str) -> Optional[SimpleNamespace]:
+        """取得交易品種規格"""
+        self._call()
+        if symbol not in self._symbols:
+            return self._fail(RES_E_NOT_FOUND, f'Symbol {symbol} not found')
+        self._ok()
+        return self._symbols[symbol]
+
+    def symbol_info_tick(self, symbol: str) -> Optional[SimpleNamespace]:
+        """取得目前報價"""
+        self._call()
+        if symbol not in self._symbols:
+            return self._fail(RES_E_NOT_FOUND, f'Symbol {symbol} not found')
+        tick = self._current_tick(symbol)
+        if tick is None:
+            return self._fail(RES_E_NOT_FOUND, f'No quotes for {symbol}')
+        self._ok()
+        return tick
+
+    # ==================== 歷史數據 ====================
+    def copy_rates_from_pos(self, symbol: str, timeframe: int, start_pos: int, count: int) -> Optional[np.ndarray]:
+        """取得從最新 K 線 (位置 0) 往回數的 K 線"""
+        self._call()
+        rates = self._visible_rates(symbol, timeframe)
+        if rates is None:
+            return self._fail(RES_E_NOT_FOUND, f'No rates for {symbol} timeframe {timeframe}')
+        end = max(len(rates) - start_pos, 0)
+        self._ok()
+        return rates[max(end - count, 0):end].copy()
+
+    def copy_rates_from(self, symbol: str, timeframe: int, date_from: Any, count: int) -> Optional[np.ndarray]:
+        """取得 date_from 之前 (含) 的 count 根 K 線"""
+        self._call()
+        rates = self._visible_rates(symbol, timeframe)
+        if rates is None:
+            return self._fail(RES_E_NOT_FOUND, f'No rates for {symbol} timeframe {timeframe}')
+        end = np.searchsorted(rates['time'], _to_seconds(date_from), side='right')
+        self._ok()
+        return rates[max(end - count, 0):end].copy()
+
+    def copy_rates_range(self, symbol: str, timeframe: int, date_from: Any, date_to: Any) -> Optional[np.ndarray]:
+        """取得時間範圍內的 K 線"""
+        self._call()
+        rates = self._visible_rates(symbol, timeframe)
+        if rates is None:
+            return self._fail(RES_E_NOT_FOUND, f'No rates for {symbol} timeframe {timeframe}')
+        start = np.searchsorted(rates['time'], _to_seconds(date_from), side='left')
+        end = np.searchsorted(rates['time'], _to_seconds(date_to), side='right')
+        self._ok()
+        return rates[start:end].copy()
+
+    def copy_ticks_from(self, symbol: str, date_from: Any, count: int, flags: int) -> Optional[np.ndarray]:
+        """取得從 date_from 開始的 count 筆報價"""
+        self._call()
+        ticks = self._visible_ticks(symbol)
+        if ticks is None:
+            return self._fail(RES_E_NOT_FOUND, f'No ticks for {symbol}')
+        start = np.searchsorted(ticks['time_msc'], _to_seconds(date_from) * 1000, side='left')
+        self._ok()
+        return ticks[start:start + count].copy()
+
+    def copy_ticks_range(self, symbol: str, date_from: Any, date_to: Any, flags: int) -> Optional[np.ndarray]:
+        """取得時間範圍內的報價"""
+        self._call()
+        ticks = self._visible_ticks(symbol)
+        if ticks is None:
+            return self._fail(RES_E_NOT_FOUND, f'No ticks for {symbol}')
+        start = np.searchsorted(ticks['time_msc'], _to_seconds(date_from) * 1000, side='left')
+        end = np.searchsorted(ticks['time_msc'], _to_seconds(date_to) * 1000, side='right')
+        self._ok()
+        return ticks[start:end].copy()
+
+    # ==================== 交易 ====================
+    def _result(self, retcode: int, request: Dict[str, Any], comment: str, **kwargs) -> SimpleNamespace:
+        """建立 order_send 的回傳結果"""
+        values = dict(retcode=retcode, deal=0, order=0, volume=0.0, price=0.0, bid=0.0, ask=0.0,
+                      comment=comment, request=request)
+        values.update(kwargs)
+        return SimpleNamespace(**values)
+
+    def order_send(self, request: Dict[str, Any]) -> SimpleNamespace:
+        """
+        送出交易請求
+
+        支援 TRADE_ACTION_DEAL 市價單 (開倉，或指定 position 平倉) 與 TRADE_ACTION_SLTP 修改止損止盈。
+        """
+        self._call()
+        action = request.get('action')
+        symbol = request.get('symbol')
+        if not self._initialized:
+            return self._result(TRADE_RETCODE_REJECT, request, 'Terminal: not initialized')
+
+        if action == TRADE_ACTION_SLTP:
+            position = self._positions.get(request.get('position'))
+            if position is None:
+                return self._result(TRADE_RETCODE_POSITION_CLOSED, request, 'Position not found')
+            position.sl = float(request.get('sl', position.sl))
+            position.tp = float(request.get('tp', position.tp))
+            return self._result(TRADE_RETCODE_DONE, request, 'Request executed')
+
+        if action != TRADE_ACTION_DEAL:
+            return self._result(TRADE_RETCODE_INVALID, request, 'Unsupported trade action')
+        if symbol not in self._symbols:
+            return self._result(TRADE_RETCODE_INVALID, request, f'Symbol {symbol} not found')
+
+        tick = self._current_tick(symbol)
+        if tick is None:
+            return self._result(TRADE_RETCODE_PRICE_OFF, request, 'No quotes')
+
+        spec = self._symbols[symbol]
+        volume = float(request.get('volume', 0.0))
+        if volume <= 0 or volume < spec.volume_min - 1e-12 or volume > spec.volume_max + 1e-12:
+            return self._result(TRADE_RETCODE_INVALID_VOLUME, request, 'Invalid volume')
+        # 手數必須是 volume_step 的整數倍
+        steps = volume / spec.volume_step
+        if abs(steps - round(steps)) > 1e-6:
+            return self._result(TRADE_RETCODE_INVALID_VOLUME, request, 'Invalid volume')
+
+        order_type = request.get('type')
+        if order_type not in (ORDER_TYPE_BUY, ORDER_TYPE_SELL):
+            return self._result(TRADE_RETCODE_INVALID, request, 'Unsupported order type')
+        fill_price = tick.ask if order_type == ORDER_TYPE_BUY else tick.bid
+
+        # 成交價偏離請求價格超過 deviation 點時拒絕 (重新報價)
+        requested = float(request.get('price', 0.0) or 0.0)
+        deviation = int(request.get('deviation', 0) or 0)
+        if requested > 0 and abs(fill_price - requested) > deviation * spec.point + 1e-12:
+            return self._result(TRADE_RETCODE_REQUOTE, request, 'Requote', bid=tick.bid, ask=tick.ask)
+
+        ticket = request.get('position')
+        if ticket:
+            return self._close(request, ticket, volume, order_type, fill_price, tick)
+        return self._open(request, volume, order_type, fill_price, tick)
+
+    def _open(self, request, volume, order_type, fill_price, tick) -> SimpleNamespace:
+        """開倉"""
+        symbol = request['symbol']
+        account = self.account_info()
+        if self._margin(symbol, volume, fill_price) > account.margin_free:
+            return self._result(TRADE_RETCODE_NO_MONEY, request, 'No money')
+
+        ticket = next(self._tickets)
+        self._positions[ticket] = SimpleNamespace(
+            ticket=ticket, symbol=symbol, volume=volume, price_open=fill_price,
+            type=POSITION_TYPE_BUY if order_type == ORDER_TYPE_BUY else POSITION_TYPE_SELL,
+            sl=float(request.get('sl', 0.0)), tp=float(request.get('tp', 0.0)), profit=0.0,
+            magic=int(request.get('magic', 0)), comment=request.get('comment', ''),
+            time=int(tick.time), time_msc=int(tick.time_msc)
+        )
+        self.deals.append({'ticket': ticket, 'symbol': symbol, 'type': order_type, 'entry': 'in',
+                           'volume': volume, 'price': fill_price, 'profit': 0.0, 'time_msc': int(tick.time_msc)})
+        return self._result(TRADE_RETCODE_DONE, request, 'Request executed', deal=len(self.deals),
+                            order=ticket, volume=volume, price=fill_price, bid=tick.bid, ask=tick.ask)
+
+    def _close(self, request, ticket, volume, order_type, fill_price, tick) -> SimpleNamespace:
+        """平倉 (可部分平倉)"""
+        position = self._positions.get(ticket)
+        if position is None:
+            return self._result(TRADE_RETCODE_POSITION_CLOSED, request, 'Position not found')
+        closing_type = ORDER_TYPE_SELL if position.type == POSITION_TYPE_BUY else ORDER_TYPE_BUY
+        if order_type != closing_type or volume > position.volume + 1e-12:
+            return self._result(TRADE_RETCODE_INVALID, request, 'Invalid close request')
+
+        spec = self._symbols[position.symbol]
+        direction = 1.0 if position.type == POSITION_TYPE_BUY else -1.0
+        profit = direction * (fill_price - position.price_open) * volume * spec.trade_contract_size
+        self._balance += profit
+        position.volume = round(position.volume - volume, 8)
+        if position.volume <= 0:
+            del self._positions[ticket]
+
+        self.deals.append({'ticket': ticket, 'symbol': position.symbol, 'type': order_type, 'entry': 'out',
+                           'volume': volume, 'price': fill_price, 'profit': profit, 'time_msc': int(tick.time_msc)})
+        return self._result(TRADE_RETCODE_DONE, request, 'Request executed', deal=len(self.deals),
+                            order=ticket, volume=volume, price=fill_price, bid=tick.bid, ask=tick.ask)
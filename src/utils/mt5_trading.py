@@ -8,20 +8,55 @@ MT5 交易平台整合模組
 4. 歷史數據管理
 """
 
-import MetaTrader5 as mt5
 import json
 import os
 import sys
 import pandas as pd
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Protocol
+
+# MetaTrader5 只能在 Windows 上安裝，其他平台可改用模擬後端 (utils.mt5_simulator)
+try:
+    import MetaTrader5 as mt5
+except ImportError:
+    mt5 = None
 
 # 添加專案根目錄到 Python 路徑
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from utils.utils import setup_logger, get_project_root
 
+# ==================== 後端介面 ====================
+class MT5Backend(Protocol):
+    """
+    MT5 後端介面
+
+    MetaTrader5 模組本身即符合此介面；模擬後端 (SimulatedMT5) 也實作相同的函數與常數，
+    因此各管理類別只透過 connection.backend 呼叫，不直接依賴 MetaTrader5 模組。
+    常數 (TIMEFRAME_*、ORDER_TYPE_*、POSITION_TYPE_*、TRADE_* 等) 也必須由後端提供。
+    """
+
+    def initialize(self, *args, **kwargs) -> bool: ...
+    def login(self, login: int, password: str, server: str) -> bool: ...
+    def shutdown(self) -> None: ...
+    def last_error(self) -> Any: ...
+    def terminal_info(self) -> Any: ...
+    def account_info(self) -> Any: ...
+    def positions_get(self, **kwargs) -> Any: ...
+    def symbol_info(self, symbol: str) -> Any: ...
+    def symbol_info_tick(self, symbol: str) -> Any: ...
+    def order_send(self, request: Dict[str, Any]) -> Any: ...
+    def copy_rates_range(self, symbol: str, timeframe: int, date_from: Any, date_to: Any) -> Any: ...
+    def copy_rates_from_pos(self, symbol: str, timeframe: int, start_pos: int, count: int) -> Any: ...
+    def copy_ticks_range(self, symbol: str, date_from: Any, date_to: Any, flags: int) -> Any: ...
+    def copy_ticks_from(self, symbol: str, date_from: Any, count: int, flags: int) -> Any: ...
+
+
+def _backend_of(connection: Any) -> Any:
+    """取得連接使用的後端，未指定時使用 MetaTrader5 模組"""
+    return getattr(connection, 'backend', None) or mt5
+
 # ==================== 連接管理 ====================
 class MT5Connection:
     """
@@ -33,23 +68,34 @@ class MT5Connection:
     - 日誌記錄
     """
     
-    def __init__(self, credentials_file: str = "credential.json"):
+    def __init__(self, credentials_file: str = "credential.json", backend: Optional[MT5Backend] = None):
         """
         初始化 MT5 連接管理器
         
         Args:
             credentials_file (str): 憑證檔案的名稱，預設為 "credential.json"
+            backend (MT5Backend, optional): MT5 後端，預設為 MetaTrader5 模組
         """
         self._is_connected = False  # 連接狀態標記
         
         self.logger = setup_logger('MT5Connection')
         self.logger.info("初始化 MT5Connection")
         
+        self.backend = backend or mt5
+        if self.backend is None:
+            self.logger.error("未安裝 MetaTrader5，請指定 backend")
+            raise ImportError("未安裝 MetaTrader5，請指定 backend")
+        self.mt5 = self.backend
+        
         # 取得專案根目錄的路徑
         project_root = get_project_root()
         # 設定憑證檔案的路徑
         self.credentials_path = os.path.join(project_root, "config", credentials_file)
-        self._load_credentials(self.credentials_path)
+        if getattr(self.backend, 'REQUIRES_CREDENTIALS', True):
+            self._load_credentials(self.credentials_path)
+        else:
+            # 模擬後端不需要真實憑證
+            self.login, self.password, self.server = 0, "", ""
         
     def _load_credentials(self, file: str) -> None:
         """
@@ -79,18 +125,18 @@ class MT5Connection:
         """
         try:
             self.logger.info("正在初始化 MT5 連接")
-            if not mt5.initialize():
-                error = mt5.last_error()
+            if not self.mt5.initialize():
+                error = self.mt5.last_error()
                 self.logger.error(f"初始化失敗: {error}")
                 raise ConnectionError(f"初始化失敗: {error}")
                 
             self.logger.info("正在登入 MT5")
-            if not mt5.login(
+            if not self.mt5.login(
                 login=self.login,
                 password=self.password,
                 server=self.server
             ):
-                error = mt5.last_error()
+                error = self.mt5.last_error()
                 self.logger.error(f"登入失敗: {error}")
                 raise ConnectionError(f"登入失敗: {error}")
                 
@@ -108,7 +154,7 @@ class MT5Connection:
         try:
             if self._is_connected:
                 self.logger.info("正在斷開 MT5 連接")
-                mt5.shutdown()
+                self.mt5.shutdown()
                 self._is_connected = False
                 self.logger.info("MT5 連接已斷開")
         except Exception as e:
@@ -119,7 +165,7 @@ class MT5Connection:
         """
         檢查當前是否與 MT5 平台保持連接
         """
-        return self._is_connected and mt5.terminal_info() is not None
+        return self._is_connected and self.mt5.terminal_info() is not None
             
     def __enter__(self):
         """
@@ -187,6 +233,7 @@ class MT5Account:
         初始化 MT5 帳戶管理器
         """
         self.connection = connection
+        self.mt5 = _backend_of(connection)
         self.logger = setup_logger('MT5Account')
         self.logger.info("初始化 MT5Account")
         
@@ -199,9 +246,9 @@ class MT5Account:
             raise ConnectionError("MT5 未連接")
             
         try:
-            account_info = mt5.account_info()
+            account_info = self.mt5.account_info()
             if account_info is None:
-                error = mt5.last_error()
+                error = self.mt5.last_error()
                 self.logger.error(f"無法獲取帳戶信息: {error}")
                 raise ValueError(f"無法獲取帳戶信息: {error}")
                 
@@ -237,6 +284,7 @@ class MT5Positions:
         初始化 MT5 持倉管理器
         """
         self.connection = connection
+        self.mt5 = _backend_of(connection)
         self.logger = setup_logger('MT5Positions')
         self.logger.info("初始化 MT5Positions")
         
@@ -250,9 +298,9 @@ class MT5Positions:
             
         try:
             self.logger.info(f"正在獲取持倉信息，交易品種: {symbol if symbol else '所有'}")
-            positions = mt5.positions_get(symbol=symbol) if symbol else mt5.positions_get()
+            positions = self.mt5.positions_get(symbol=symbol) if symbol else self.mt5.positions_get()
             if positions is None:
-                error = mt5.last_error()
+                error = self.mt5.last_error()
                 self.logger.error(f"無法獲取持倉信息: {error}")
                 raise ValueError(f"無法獲取持倉信息: {error}")
                 
@@ -261,7 +309,7 @@ class MT5Positions:
                 result.append(PositionInfo(
                     ticket=pos.ticket,
                     symbol=pos.symbol,
-                    type="BUY" if pos.type == mt5.POSITION_TYPE_BUY else "SELL",
+                    type="BUY" if pos.type == self.mt5.POSITION_TYPE_BUY else "SELL",
                     volume=pos.volume,
                     price=pos.price_open,
                     sl=pos.sl,
@@ -287,30 +335,30 @@ class MT5Positions:
             
         try:
             self.logger.info(f"正在關閉持倉 {ticket}")
-            position = mt5.positions_get(ticket=ticket)
+            position = self.mt5.positions_get(ticket=ticket)
             if position is None or len(position) == 0:
-                error = mt5.last_error()
+                error = self.mt5.last_error()
                 self.logger.error(f"找不到持倉 {ticket}: {error}")
                 return False
                 
             position = position[0]
             
             request = {
-                "action": mt5.TRADE_ACTION_DEAL,
+                "action": self.mt5.TRADE_ACTION_DEAL,
                 "symbol": position.symbol,
                 "volume": position.volume,
-                "type": mt5.ORDER_TYPE_SELL if position.type == mt5.POSITION_TYPE_BUY else mt5.ORDER_TYPE_BUY,
+                "type": self.mt5.ORDER_TYPE_SELL if position.type == self.mt5.POSITION_TYPE_BUY else self.mt5.ORDER_TYPE_BUY,
                 "position": ticket,
-                "price": mt5.symbol_info_tick(position.symbol).bid if position.type == mt5.POSITION_TYPE_BUY else mt5.symbol_info_tick(position.symbol).ask,
+                "price": self.mt5.symbol_info_tick(position.symbol).bid if position.type == self.mt5.POSITION_TYPE_BUY else self.mt5.symbol_info_tick(position.symbol).ask,
                 "deviation": 10,
                 "magic": position.magic,
                 "comment": "Close position",
-                "type_time": mt5.ORDER_TIME_GTC,
-                "type_filling": mt5.ORDER_FILLING_IOC,
+                "type_time": self.mt5.ORDER_TIME_GTC,
+                "type_filling": self.mt5.ORDER_FILLING_IOC,
             }
             
-            result = mt5.order_send(request)
-            if result.retcode != mt5.TRADE_RETCODE_DONE:
+            result = self.mt5.order_send(request)
+            if result.retcode != self.mt5.TRADE_RETCODE_DONE:
                 self.logger.error(f"關閉持倉失敗: {result.comment}")
                 return False
                 
@@ -339,11 +387,17 @@ class MT5History:
     MT5 歷史數據管理類別
     """
     
-    def __init__(self, connection):
+    def __init__(self, connection, tick_store: Optional[Any] = None):
         """
         初始化 MT5 歷史數據管理器
+        
+        Args:
+            connection: MT5 連接
+            tick_store (TickStore, optional): 指定時 get_ticks 獲取的報價會附加到此儲存
         """
         self.connection = connection
+        self.mt5 = _backend_of(connection)
+        self.tick_store = tick_store
         self.logger = setup_logger('MT5History')
         self.logger.info("初始化 MT5History")
         
@@ -380,22 +434,22 @@ class MT5History:
             self.logger.info(f"正在獲取 {symbol} 的歷史數據，時間週期: {timeframe}")
             
             # 檢查交易品種
-            symbol_info = mt5.symbol_info(symbol)
+            symbol_info = self.mt5.symbol_info(symbol)
             if symbol_info is None:
                 self.logger.error(f"交易品種 {symbol} 不存在")
                 raise ValueError(f"交易品種 {symbol} 不存在")
                 
             # 時間週期映射
             timeframe_map = {
-                'M1': mt5.TIMEFRAME_M1,
-                'M5': mt5.TIMEFRAME_M5,
-                'M15': mt5.TIMEFRAME_M15,
-                'M30': mt5.TIMEFRAME_M30,
-                'H1': mt5.TIMEFRAME_H1,
-                'H4': mt5.TIMEFRAME_H4,
-                'D1': mt5.TIMEFRAME_D1,
-                'W1': mt5.TIMEFRAME_W1,
-                'MN1': mt5.TIMEFRAME_MN1
+                'M1': self.mt5.TIMEFRAME_M1,
+                'M5': self.mt5.TIMEFRAME_M5,
+                'M15': self.mt5.TIMEFRAME_M15,
+                'M30': self.mt5.TIMEFRAME_M30,
+                'H1': self.mt5.TIMEFRAME_H1,
+                'H4': self.mt5.TIMEFRAME_H4,
+                'D1': self.mt5.TIMEFRAME_D1,
+                'W1': self.mt5.TIMEFRAME_W1,
+                'MN1': self.mt5.TIMEFRAME_MN1
             }
             
             if timeframe not in timeframe_map:
@@ -403,12 +457,12 @@ class MT5History:
                 raise ValueError(f"不支援的時間週期: {timeframe}")
                 
             # 獲取歷史數據
-            rates = mt5.copy_rates_range(
+            rates = self.mt5.copy_rates_range(
                 symbol,
                 timeframe_map[timeframe],
                 start_time or datetime(1970, 1, 1),
                 end_time or datetime.now()
-            ) if start_time or end_time else mt5.copy_rates_from_pos(
+            ) if start_time or end_time else self.mt5.copy_rates_from_pos(
                 symbol,
                 timeframe_map[timeframe],
                 0,
@@ -416,7 +470,7 @@ class MT5History:
             )
             
             if rates is None:
-                error = mt5.last_error()
+                error = self.mt5.last_error()
                 self.logger.error(f"無法獲取歷史數據: {error}")
                 raise ValueError(f"無法獲取歷史數據: {error}")
                 
@@ -463,29 +517,33 @@ class MT5History:
             self.logger.info(f"正在獲取 {symbol} 的即時報價數據")
             
             # 檢查交易品種
-            symbol_info = mt5.symbol_info(symbol)
+            symbol_info = self.mt5.symbol_info(symbol)
             if symbol_info is None:
                 self.logger.error(f"交易品種 {symbol} 不存在")
                 raise ValueError(f"交易品種 {symbol} 不存在")
                 
             # 獲取即時報價
-            ticks = mt5.copy_ticks_range(
+            ticks = self.mt5.copy_ticks_range(
                 symbol,
                 start_time or datetime(1970, 1, 1),
                 end_time or datetime.now(),
-                mt5.COPY_TICKS_ALL
-            ) if start_time or end_time else mt5.copy_ticks_from(
+                self.mt5.COPY_TICKS_ALL
+            ) if start_time or end_time else self.mt5.copy_ticks_from(
                 symbol,
                 0,
                 count or 1000,
-                mt5.COPY_TICKS_ALL
+                self.mt5.COPY_TICKS_ALL
             )
             
             if ticks is None:
-                error = mt5.last_error()
+                error = self.mt5.last_error()
                 self.logger.error(f"無法獲取即時報價: {error}")
                 raise ValueError(f"無法獲取即時報價: {error}")
                 
+            # 附加到本地報價儲存
+            if self.tick_store is not None:
+                self.tick_store.append(symbol, ticks)
+                
             # 轉換為 DataFrame
             df = pd.DataFrame(ticks)
             df['time'] = pd.to_datetime(df['time'], unit='s')
@@ -0,0 +1,147 @@
+"""
+多時間週期特徵模組
+
+此模組從單一基礎週期 (例如 M1) 的 K 線建立多個較高時間週期的特徵：
+1. 以同一組基礎陣列一次聚合出所有較高週期的 K 線
+2. 分別計算各週期的技術指標 (只在較小的高週期數據上計算)
+3. 以 as-of 方式對齊回基礎週期：每根基礎 K 線只看得到已經收盤的高週期 K 線，不會偷看未來
+4. 所有週期的欄位最後一次合併成一個寬表
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .bar_aggregation import TickBarAggregator
+from .technical_indicators import TechnicalIndicatorCalculator
+from .utils import setup_logger
+
+# K 線本身的欄位，其餘欄位視為技術指標
+BAR_COLUMNS = ['open', 'high', 'low', 'close', 'tick_volume', 'spread', 'real_volume']
+
+
+class MultiTimeframeFeatures:
+    """
+    多時間週期特徵類別
+
+    範例:
+        >>> mtf = MultiTimeframeFeatures(['H1', 'H4'], base_timeframe='M1')
+        >>> wide = mtf.build(df)   # 新增 h1_ema_fast, h4_rsi, ... 等欄位
+    """
+
+    def __init__(
+        self,
+        timeframes: List[str],
+        base_timeframe: str = 'M1',
+        config: Optional[Dict] = None,
+        columns: Optional[List[str]] = None
+    ):
+        """
+        初始化多時間週期特徵
+
+        Args:
+            timeframes (List[str]): 較高的時間週期，例如 ['H1', 'H4']
+            base_timeframe (str): 基礎數據的時間週期，例如 'M1'
+            config (dict, optional): 技術指標配置，格式與 TechnicalIndicatorCalculator 相同
+            columns (List[str], optional): 要對齊回基礎週期的欄位，預設為收盤價與所有技術指標
+        """
+        self.logger = setup_logger('MultiTimeframeFeatures')
+        self.timeframes = timeframes
+        self.base_timeframe = base_timeframe
+        self.calculator = TechnicalIndicatorCalculator(config)
+        self.columns = columns
+        self.aggregator = TickBarAggregator()
+
+    def resample(self, df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """
+        將基礎 K 線聚合為所有較高時間週期
+
+        只從數據框取出一次 numpy 陣列，各週期共用，不會複製整個數據框。
+
+        Args:
+            df (pd.DataFrame): 以時間為索引的基礎 K 線 (open, high, low, close，可含 tick_volume, spread, real_volume)
+
+        Returns:
+            Dict[str, pd.DataFrame]: 各時間週期的 K 線，時間為開盤時間
+        """
+        times_msc = df.index.values.astype('datetime64[ms]').astype(np.int64)
+        arrays = {col: df[col].to_numpy() for col in BAR_COLUMNS if col in df.columns}
+
+        result = {}
+        for timeframe in self.timeframes:
+            buckets = self.aggregator.bucket_start(times_msc, timeframe)
+            starts = np.r_[0, np.flatnonzero(np.diff(buckets)) + 1]
+            ends = np.r_[starts[1:], len(times_msc)]
+
+            bars = {
+                'open': arrays['open'][starts],
+                'high': np.maximum.reduceat(arrays['high'], starts),
+                'low': np.minimum.reduceat(arrays['low'], starts),
+                'close': arrays['close'][ends - 1]
+            }
+            if 'tick_volume' in arrays:
+                bars['tick_volume'] = np.add.reduceat(arrays['tick_volume'], starts)
+            if 'spread' in arrays:
+                bars['spread'] = np.minimum.reduceat(arrays['spread'], starts)
+            if 'real_volume' in arrays:
+                bars['real_volume'] = np.add.reduceat(arrays['real_volume'], starts)
+
+            index = pd.DatetimeIndex(pd.to_datetime(buckets[starts], unit='ms'), name=df.index.name)
+            result[timeframe] = pd.DataFrame(bars, index=index)
+        return result
+
+    def align(self, df: pd.DataFrame, timeframe: str, htf: pd.DataFrame) -> pd.DataFrame:
+        """
+        將高週期數據以 as-of 方式對齊到基礎 K 線
+
+        基礎 K 線在收盤時 (開盤時間 + 基礎週期) 只能看到收盤時間不晚於此的高週期 K 線。
+
+        Args:
+            df (pd.DataFrame): 基礎 K 線
+            timeframe (str): 高週期的時間週期
+            htf (pd.DataFrame): 高週期數據 (時間為開盤時間)
+
+        Returns:
+            pd.DataFrame: 與 df 相同索引的欄位，欄位名稱加上時間週期前綴 (例如 h1_rsi)
+        """
+        base_close = df.index.values.astype('datetime64[ms]').astype(np.int64) + self.aggregator.timeframe_ms(self.base_timeframe)
+        htf_open = htf.index.values.astype('datetime64[ms]').astype(np.int64)
+        htf_close = self.aggregator.bucket_end(htf_open, timeframe)
+
+        # 每根基礎 K 線對應最後一根已收盤的高週期 K 線
+        positions = np.searchsorted(htf_close, base_close, side='right') - 1
+        available = positions >= 0
+        positions = np.clip(positions, 0, None)
+
+        columns = self.columns or ['close'] + [col for col in htf.columns if col not in BAR_COLUMNS]
+        prefix = timeframe.lower()
+        aligned = {}
+        for col in columns:
+            values = htf[col].to_numpy(dtype=np.float64)[positions]
+            values[~available] = np.nan
+            aligned[f"{prefix}_{col}"] = values
+        return pd.DataFrame(aligned, index=df.index)
+
+    def build(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        建立包含所有時間週期特徵的寬表
+
+        Args:
+            df (pd.DataFrame): 以時間為索引的基礎 K 線
+
+        Returns:
+            pd.DataFrame: 原始欄位加上各高週期的技術指標欄位
+        """
+        self.logger.info(f"開始建立多時間週期特徵: {', '.join(self.timeframes)}")
+
+        blocks = []
+        for timeframe, htf in self.resample(df).items():
+            htf = self.calculator.calculate_all_indicators(htf)
+            blocks.append(self.align(df, timeframe, htf))
+            self.logger.info(f"{timeframe}: {len(htf)} 根 K 線")
+
+        # 所有週期的欄位一次合併
+        result = pd.concat([df] + blocks, axis=1)
+        self.logger.info(f"多時間週期特徵建立完成，共 {result.shape[1]} 個欄位")
+        return result
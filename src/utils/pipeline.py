@@ -0,0 +1,366 @@
+"""
+數據處理管線模組
+
+此模組將 main.py 的「獲取數據 → 數據處理 → 技術指標 → 儲存」流程封裝為可重複使用的管線，
+並提供多交易品種的平行執行器：
+1. 每個 (交易品種, 時間週期) 為一個任務，分派到行程池 (process pool) 執行，
+   數據處理與指標計算可以使用所有 CPU 核心
+2. 以跨行程的信號量限制同時連接 MT5 終端機的數量
+3. 每個任務各自捕捉錯誤，單一交易品種失敗不影響其他任務
+4. 所有任務結束後彙整執行摘要
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from .bar_cache import BarCache
+from .data_processing import DataProcessor
+from .dtype_policy import DtypePolicy
+from .feature_store import FeatureStore
+from .mt5_trading import MT5Connection, MT5History
+from .stage_cache import StageCache
+from .storage import ParquetStore
+from .technical_indicators import TechnicalIndicatorCalculator
+from .utils import setup_logger
+
+# 模型使用的特徵欄位
+SELECTED_FEATURES = [
+    'open', 'high', 'low', 'close', 'tick_volume_log',
+    'is_tick_volume_outlier', 'is_spread_outlier_threshold',
+    'ema_fast', 'ema_slow', 'ema_gap',
+    'rsi', 'macd', 'macd_signal',
+    'bb_middle', 'bb_upper', 'bb_lower',
+    'atr',
+    'price_change_pct', 'volatility', 'normalized_price',
+    'price_change_ma', 'price_change_volatility'
+]
+
+logger = setup_logger('pipeline')
+
+# 由行程池初始化函數設定，限制同時連接終端機的工作行程數量
+_terminal_semaphore = None
+
+
+def fetch_bars(
+    symbol: str,
+    timeframe: str,
+    count: int = 99000,
+    data_dir: Optional[str] = None,
+    backend=None
+) -> Optional[pd.DataFrame]:
+    """
+    從 MT5 獲取指定交易品種的歷史數據
+
+    指定 data_dir 時會使用本地 K 線快取，只向 MT5 下載快取中缺少的數據；
+    指定 backend (例如 SimulatedMT5) 時可在沒有 MT5 終端機的環境執行
+
+    Args:
+        symbol (str): 交易品種
+        timeframe (str): 時間週期
+        count (int): K 線數量
+        data_dir (str, optional): 數據目錄 (K 線快取位置)
+        backend (optional): MT5 後端
+
+    Returns:
+        Optional[pd.DataFrame]: K 線數據，失敗時為 None
+    """
+    logger.info(f"開始從 MT5 獲取 {symbol} {timeframe} 數據")
+
+    connection = MT5Connection(backend=backend)
+    connection.connect()
+
+    try:
+        history = MT5History(connection)
+        if data_dir is not None:
+            history = BarCache(history, ParquetStore(data_dir))
+
+        df = history.get_historical_data(symbol, timeframe, count=count)
+
+        if df is None:
+            logger.error(f"獲取 {symbol} {timeframe} 數據失敗")
+            return None
+
+        logger.info(f"成功獲取 {symbol} {timeframe} {len(df)} 筆數據")
+        return df
+
+    except Exception as e:
+        logger.error(f"獲取 {symbol} {timeframe} 數據時發生錯誤: {str(e)}")
+        return None
+    finally:
+        connection.disconnect()
+
+
+def process_frame(
+    df: pd.DataFrame,
+    processor: DataProcessor,
+    calculator: TechnicalIndicatorCalculator,
+    features: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    對 K 線數據執行完整的特徵處理流程
+
+    Args:
+        df (pd.DataFrame): 原始 K 線數據
+        processor (DataProcessor): 數據處理器
+        calculator (TechnicalIndicatorCalculator): 技術指標計算器
+        features (List[str], optional): 需要完整的特徵欄位 (含 NaN 的列會被去除)，預設為 SELECTED_FEATURES
+
+    Returns:
+        pd.DataFrame: 處理後的數據框
+    """
+    # 數據處理與技術指標：各步驟只計算新增欄位，最後一次合併
+    df = processor.process_chain(df, calculator)
+
+    # 檢查數據質量 (啟用快取時以處理鏈的鍵值查詢，不需要重新雜湊數據框)
+    processor.check_data_quality(df, cache_key=processor.last_chain_key)
+    return add_derived_features(df, features)
+
+
+def add_derived_features(df: pd.DataFrame, features: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    加入自創特徵並去除特徵不完整的列 (process_frame 的最後一步，分段處理時套用在每一段)
+
+    Args:
+        df (pd.DataFrame): process_chain 的結果 (會被修改)
+        features (List[str], optional): 需要完整的特徵欄位，預設為 SELECTED_FEATURES
+
+    Returns:
+        pd.DataFrame: 處理後的數據框
+    """
+    # 自創特徵：EMA 差距 (即 MACD 線)；已有以 float64 計算的 macd 時直接使用，
+    # 避免以精簡型別 (float32) 的兩條 EMA 相減造成的精度損失
+    if "macd" in df.columns:
+        df["ema_gap"] = df["macd"]
+    else:
+        df["ema_gap"] = df["ema_fast"] - df["ema_slow"]
+    logger.info("已計算 EMA 差距特徵")
+
+    # 去除 NaN（技術指標開頭幾筆資料可能為空）
+    df.dropna(subset=features or SELECTED_FEATURES, inplace=True)
+    logger.info(f"去除 NaN 後剩餘 {len(df)} 筆數據")
+    return df
+
+
+@dataclass
+class PipelineTask:
+    """單一管線任務"""
+    symbol: str
+    timeframe: str
+    count: int = 99000
+
+
+@dataclass
+class PipelineResult:
+    """單一管線任務的執行結果"""
+    symbol: str
+    timeframe: str
+    success: bool
+    rows: int = 0
+    fetch_seconds: float = 0.0
+    process_seconds: float = 0.0
+    peak_memory_mb: float = 0.0
+    dtype_saved_mb: float = 0.0
+    error: Optional[str] = None
+
+
+def _init_worker(semaphore) -> None:
+    """行程池初始化函數：保存跨行程共用的終端機信號量"""
+    global _terminal_semaphore
+    _terminal_semaphore = semaphore
+
+
+def _run_task(
+    task: PipelineTask,
+    data_dir: str,
+    config: Optional[Dict],
+    backend_factory: Optional[Callable],
+    render_plots: bool = True,
+    use_cache: bool = True,
+    compact_dtypes: bool = False
+) -> PipelineResult:
+    """
+    在工作行程中執行單一任務
+
+    所有錯誤都在這裡捕捉並記錄在結果中，不會讓其他任務中斷。
+    """
+    result = PipelineResult(task.symbol, task.timeframe, success=False)
+    try:
+        # 只有獲取數據的階段需要佔用終端機連線
+        started = time.perf_counter()
+        backend = backend_factory() if backend_factory is not None else None
+        if _terminal_semaphore is not None:
+            with _terminal_semaphore:
+                df = fetch_bars(task.symbol, task.timeframe, task.count, data_dir, backend)
+        else:
+            df = fetch_bars(task.symbol, task.timeframe, task.count, data_dir, backend)
+        result.fetch_seconds = time.perf_counter() - started
+
+        if df is None or df.empty:
+            result.error = "無法獲取數據"
+            return result
+
+        started = time.perf_counter()
+        store = ParquetStore(data_dir)
+        store.write(df, task.symbol, task.timeframe, dataset='raw')
+
+        # 每個任務使用各自的圖表目錄，避免平行寫入同名檔案
+        task_dir = os.path.join(data_dir, 'runs', f"{task.symbol}_{task.timeframe}")
+        cache = StageCache(os.path.join(data_dir, 'cache')) if use_cache else None
+        dtype_policy = DtypePolicy() if compact_dtypes else None
+        processor = DataProcessor(task_dir, render_plots=render_plots, timeframe=task.timeframe, cache=cache,
+                                  dtype_policy=dtype_policy)
+        # 只計算模型使用的特徵需要的指標群組
+        calculator = TechnicalIndicatorCalculator(config, features=SELECTED_FEATURES)
+        try:
+            df = process_frame(df, processor, calculator)
+            store.write(df, task.symbol, task.timeframe, dataset='processed', mode='overwrite')
+            FeatureStore(data_dir).save(df, task.symbol, task.timeframe, calculator)
+        finally:
+            processor.close()
+        result.process_seconds = time.perf_counter() - started
+        result.rows = len(df)
+        result.peak_memory_mb = processor.last_peak_memory_mb
+        if dtype_policy is not None:
+            result.dtype_saved_mb = float(dtype_policy.summary()['saved_mb'].sum())
+        result.success = True
+
+    except Exception as e:
+        logger.error(f"{task.symbol} {task.timeframe} 管線執行失敗: {str(e)}")
+        result.error = str(e)
+    return result
+
+
+class MultiSymbolPipelineRunner:
+    """
+    多交易品種管線執行器類別
+
+    範例:
+        >>> runner = MultiSymbolPipelineRunner(data_dir, max_workers=8, max_terminal_connections=2)
+        >>> results = runner.run(['EURUSD', 'GBPUSD', 'USDJPY'], ['M5', 'H1'])
+        >>> runner.summarize(results)
+    """
+
+    def __init__(
+        self,
+        data_dir: str,
+        max_workers: Optional[int] = None,
+        max_terminal_connections: int = 2,
+        count: int = 99000,
+        config: Optional[Dict] = None,
+        backend_factory: Optional[Callable] = None,
+        render_plots: bool = True,
+        use_cache: bool = True,
+        compact_dtypes: bool = False
+    ):
+        """
+        初始化管線執行器
+
+        Args:
+            data_dir (str): 數據目錄
+            max_workers (int, optional): 工作行程數量，預設為 CPU 核心數
+            max_terminal_connections (int): 同時連接 MT5 終端機的最大數量
+            count (int): 每個任務獲取的 K 線數量
+            config (dict, optional): 技術指標配置
+            backend_factory (Callable, optional): 在工作行程中建立 MT5 後端的函數
+                (必須可被 pickle，例如模組層級的函數)，預設使用 MetaTrader5 套件
+            render_plots (bool): 是否繪製診斷圖表
+            use_cache (bool): 是否使用處理階段快取 (<data_dir>/cache，所有任務共用)
+            compact_dtypes (bool): 是否以精簡型別 (DtypePolicy: float32 / int8) 保存處理後的數據
+        """
+        if max_terminal_connections < 1:
+            raise ValueError("max_terminal_connections 必須大於 0")
+        self.logger = setup_logger('MultiSymbolPipelineRunner')
+        self.data_dir = data_dir
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_terminal_connections = max_terminal_connections
+        self.count = count
+        self.config = config
+        self.backend_factory = backend_factory
+        self.render_plots = render_plots
+        self.use_cache = use_cache
+        self.compact_dtypes = compact_dtypes
+
+    def tasks(self, symbols: List[str], timeframes: List[str]) -> List[PipelineTask]:
+        """
+        建立所有 (交易品種, 時間週期) 任務
+
+        Args:
+            symbols (List[str]): 交易品種列表
+            timeframes (List[str]): 時間週期列表
+
+        Returns:
+            List[PipelineTask]: 任務列表
+        """
+        return [PipelineTask(symbol, timeframe, self.count) for symbol in symbols for timeframe in timeframes]
+
+    def run(self, symbols: List[str], timeframes: List[str]) -> List[PipelineResult]:
+        """
+        以行程池平行執行所有任務
+
+        Args:
+            symbols (List[str]): 交易品種列表
+            timeframes (List[str]): 時間週期列表
+
+        Returns:
+            List[PipelineResult]: 每個任務的結果 (依任務順序排列)
+        """
+        tasks = self.tasks(symbols, timeframes)
+        if not tasks:
+            return []
+
+        workers = min(self.max_workers, len(tasks))
+        self.logger.info(f"開始執行 {len(tasks)} 個管線任務 (工作行程 {workers}，終端機連線上限 {self.max_terminal_connections})")
+        started = time.perf_counter()
+
+        semaphore = multiprocessing.Semaphore(self.max_terminal_connections)
+        results: Dict[int, PipelineResult] = {}
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(semaphore,)) as executor:
+            futures = {
+                executor.submit(_run_task, task, self.data_dir, self.config, self.backend_factory,
+                                self.render_plots, self.use_cache, self.compact_dtypes): i
+                for i, task in enumerate(tasks)
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                task = tasks[i]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    # 工作行程異常終止等無法在任務內捕捉的錯誤
+                    results[i] = PipelineResult(task.symbol, task.timeframe, success=False, error=str(e))
+
+                result = results[i]
+                if result.success:
+                    self.logger.info(f"{task.symbol} {task.timeframe} 完成: {result.rows} 筆")
+                else:
+                    self.logger.error(f"{task.symbol} {task.timeframe} 失敗: {result.error}")
+
+        ordered = [results[i] for i in range(len(tasks))]
+        succeeded = sum(result.success for result in ordered)
+        self.logger.info(
+            f"管線執行完成: 成功 {succeeded}/{len(ordered)}，耗時 {time.perf_counter() - started:.1f} 秒"
+        )
+        return ordered
+
+    def summarize(self, results: List[PipelineResult]) -> pd.DataFrame:
+        """
+        彙整執行結果
+
+        Args:
+            results (List[PipelineResult]): run() 的回傳值
+
+        Returns:
+            pd.DataFrame: 每個任務一列的摘要表
+        """
+        summary = pd.DataFrame([vars(result) for result in results],
+                               columns=['symbol', 'timeframe', 'success', 'rows',
+                                        'fetch_seconds', 'process_seconds', 'peak_memory_mb',
+                                        'dtype_saved_mb', 'error'])
+        self.logger.info(f"管線執行摘要:\n{summary.to_string(index=False)}")
+        return summary
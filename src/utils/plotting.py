@@ -0,0 +1,181 @@
+"""
+診斷圖表模組
+
+數據處理器只產生精簡的圖表摘要 (直方圖的分箱計數、降採樣的時間序列)，
+實際繪圖由此模組的 DiagnosticPlotRenderer 負責：
+1. 可在背景執行緒繪圖，數據處理不需要等待圖表輸出
+2. 可完全關閉，此時不會載入 matplotlib
+3. 使用 matplotlib 的物件導向 API (Figure + Agg)，不依賴 pyplot 的全域狀態，可安全地在背景執行緒使用
+
+摘要格式:
+    {
+        'figsize': (寬, 高),
+        'layout': (列數, 欄數),
+        'panels': [
+            {'kind': 'hist', 'title': ..., 'xlabel': ..., 'ylabel': ...,
+             'series': [{'counts': ..., 'edges': ..., 'color': ..., 'label': ...}]},
+            {'kind': 'line', 'title': ..., 'xlabel': ..., 'ylabel': ...,
+             'series': [{'x': ..., 'y': ..., 'label': ..., 'alpha': ...}]}
+        ]
+    }
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .utils import setup_logger
+
+
+def histogram_summary(
+    values,
+    bins: int = 50,
+    edges: Optional[np.ndarray] = None,
+    **style: Any
+) -> Dict[str, Any]:
+    """
+    計算直方圖摘要 (忽略 NaN 與無限值)
+
+    Args:
+        values: 數值序列
+        bins (int): 分箱數量 (未指定 edges 時使用)
+        edges (np.ndarray, optional): 指定分箱邊界，多個序列共用時使用
+        **style: 繪圖樣式，例如 color、label
+
+    Returns:
+        Dict[str, Any]: 包含 counts 與 edges 的摘要
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    counts, edges = np.histogram(values, bins=edges if edges is not None else bins)
+    return {'counts': counts, 'edges': edges, **style}
+
+
+def downsample_series(index, values, max_points: int = 2000, **style: Any) -> Dict[str, Any]:
+    """
+    將時間序列降採樣為固定點數 (每段取平均值)
+
+    Args:
+        index: 時間索引
+        values: 數值序列
+        max_points (int): 最多保留的點數
+        **style: 繪圖樣式，例如 label、alpha
+
+    Returns:
+        Dict[str, Any]: 包含 x 與 y 的摘要
+    """
+    x = np.asarray(index)
+    y = np.asarray(values, dtype=np.float64)
+    if len(y) > max_points:
+        starts = np.linspace(0, len(y), max_points, endpoint=False).astype(np.int64)
+        finite = np.isfinite(y)
+        sums = np.add.reduceat(np.where(finite, y, 0.0), starts)
+        counts = np.add.reduceat(finite.astype(np.int64), starts)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            y = sums / counts
+        x = x[starts]
+    return {'x': x, 'y': y, **style}
+
+
+class DiagnosticPlotRenderer:
+    """
+    診斷圖表繪製器類別
+
+    範例:
+        >>> renderer = DiagnosticPlotRenderer(background=True)
+        >>> renderer.submit('plots/spread_distribution.png', summary)
+        >>> renderer.close()   # 等待背景繪圖完成
+    """
+
+    def __init__(self, enabled: bool = True, background: bool = True, dpi: int = 100):
+        """
+        初始化繪製器
+
+        Args:
+            enabled (bool): 是否繪圖，False 時 submit 不做任何事
+            background (bool): 是否在背景執行緒繪圖
+            dpi (int): 輸出圖檔解析度
+        """
+        self.logger = setup_logger('DiagnosticPlotRenderer')
+        self.enabled = enabled
+        self.background = background
+        self.dpi = dpi
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._futures: List[Future] = []
+
+    def submit(self, output_file: str, summary: Dict[str, Any]) -> None:
+        """
+        提交一張圖表
+
+        Args:
+            output_file (str): 輸出圖檔路徑
+            summary (Dict[str, Any]): 圖表摘要
+        """
+        if not self.enabled:
+            return
+        if not self.background:
+            self._render_safely(output_file, summary)
+            return
+        if self._executor is None:
+            # 單一執行緒依序繪圖，避免多個 matplotlib 呼叫互相競爭
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='plot')
+        self._futures = [future for future in self._futures if not future.done()]
+        self._futures.append(self._executor.submit(self._render_safely, output_file, summary))
+
+    def wait(self) -> None:
+        """等待所有已提交的圖表完成"""
+        for future in self._futures:
+            future.result()
+        self._futures = []
+
+    def close(self) -> None:
+        """等待所有圖表完成並關閉背景執行緒"""
+        self.wait()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _render_safely(self, output_file: str, summary: Dict[str, Any]) -> None:
+        """繪圖失敗只記錄錯誤，不影響數據處理"""
+        try:
+            self.render(output_file, summary)
+        except Exception as e:
+            self.logger.error(f"繪製圖表 {output_file} 時發生錯誤: {str(e)}")
+
+    def render(self, output_file: str, summary: Dict[str, Any]) -> None:
+        """
+        依摘要繪製圖表並保存
+
+        Args:
+            output_file (str): 輸出圖檔路徑
+            summary (Dict[str, Any]): 圖表摘要
+        """
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        rows, cols = summary.get('layout', (1, len(summary['panels'])))
+        figure = Figure(figsize=summary.get('figsize', (6 * cols, 5 * rows)))
+        FigureCanvasAgg(figure)
+
+        for i, panel in enumerate(summary['panels']):
+            ax = figure.add_subplot(rows, cols, i + 1)
+            if panel['kind'] == 'hist':
+                for series in panel['series']:
+                    ax.stairs(series['counts'], series['edges'], fill=True, alpha=0.7,
+                              color=series.get('color'), label=series.get('label'))
+            elif panel['kind'] == 'line':
+                for series in panel['series']:
+                    ax.plot(series['x'], series['y'], label=series.get('label'), alpha=series.get('alpha', 1.0))
+            else:
+                raise ValueError(f"不支援的圖表類型: {panel['kind']}")
+
+            ax.set_title(panel.get('title', ''))
+            ax.set_xlabel(panel.get('xlabel', ''))
+            ax.set_ylabel(panel.get('ylabel', ''))
+            if any(series.get('label') for series in panel['series']):
+                ax.legend()
+
+        figure.tight_layout()
+        figure.savefig(output_file, dpi=self.dpi)
+        self.logger.info(f"已生成圖表: {output_file}")
@@ -0,0 +1,182 @@
+"""
+近似分位數模組
+
+此模組提供可合併的近似分位數 sketch (KLL 演算法的簡化版本)：
+1. 逐批更新，記憶體用量與數據量無關 (最多約 3k 個數值)，可處理無法一次載入記憶體的數據
+2. 兩個 sketch 可以合併，平行的工作行程各自建立 sketch 後再合併即可得到整體的分位數
+3. 尚未壓縮時 (數據量小於容量) 結果與 numpy 的線性內插分位數完全相同
+
+演算法:
+    第 h 層的每個數值代表 2^h 個原始數值。某一層超過容量時，將該層排序後隨機保留奇數或偶數位置的數值，
+    提升到上一層 (權重加倍)。層數越低容量越小 (每低一層乘以 2/3)，排名誤差約為 O(1/k)。
+"""
+
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+ArrayLike = Union[float, List[float], np.ndarray]
+
+
+class QuantileSketch:
+    """
+    可合併的近似分位數 sketch 類別
+
+    範例:
+        >>> sketch = QuantileSketch(k=1000)
+        >>> for chunk in chunks:
+        ...     sketch.update(chunk['close'].to_numpy())
+        >>> q1, q3 = sketch.quantile([0.25, 0.75])
+        >>> merged = QuantileSketch().merge(sketch_a).merge(sketch_b)
+    """
+
+    def __init__(self, k: int = 1000, seed: Optional[int] = None):
+        """
+        初始化 sketch
+
+        Args:
+            k (int): 最高層的容量，越大越精確 (k=1000 時排名誤差約 0.3%)
+            seed (int, optional): 壓縮時隨機選擇的種子
+        """
+        if k < 8:
+            raise ValueError("k 必須至少為 8")
+        self.k = k
+        self.levels: List[np.ndarray] = [np.empty(0, dtype=np.float64)]
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._rng = np.random.default_rng(seed)
+
+    # ---------- 更新 ----------
+    def update(self, values: ArrayLike) -> 'QuantileSketch':
+        """
+        加入一批數值 (忽略 NaN)
+
+        Args:
+            values: 數值序列
+
+        Returns:
+            QuantileSketch: self，方便串接
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        """
+        合併另一個 sketch (other 不會被修改)
+
+        Args:
+            other (QuantileSketch): 要合併的 sketch
+
+        Returns:
+            QuantileSketch: self，方便串接
+        """
+        if other.count == 0:
+            return self
+
+        self.k = min(self.k, other.k)
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _capacity(self, level: int) -> int:
+        """第 level 層的容量 (最高層為 k，每低一層乘以 2/3)"""
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * (2.0 / 3.0) ** depth)), 2)
+
+    def _compress(self) -> None:
+        """壓縮所有超過容量的層，直到每一層都在容量內"""
+        while True:
+            full = [level for level in range(len(self.levels)) if len(self.levels[level]) > self._capacity(level)]
+            if not full:
+                return
+            level = full[0]
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0, dtype=np.float64))
+            self._compact(level)
+
+    def _compact(self, level: int) -> None:
+        """將一層排序後，隨機保留一半的數值提升到上一層 (權重加倍，總權重不變)"""
+        items = np.sort(self.levels[level])
+        # 奇數個時保留一個在原層，其餘兩兩壓縮
+        kept, items = items[:len(items) % 2], items[len(items) % 2:]
+        offset = int(self._rng.integers(2))
+        self.levels[level] = kept
+        self.levels[level + 1] = np.concatenate([self.levels[level + 1], items[offset::2]])
+
+    # ---------- 查詢 ----------
+    @property
+    def is_exact(self) -> bool:
+        """是否尚未壓縮 (所有原始數值都還在)"""
+        return len(self.levels) == 1
+
+    def sorted_items(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        取得所有保留的數值與其權重 (依數值排序)
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (數值, 權重)
+        """
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2 ** h, dtype=np.int64) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], weights[order]
+
+    def quantile(self, q: ArrayLike) -> np.ndarray:
+        """
+        計算近似分位數
+
+        Args:
+            q: 介於 0 與 1 之間的分位數 (單一數值或序列)
+
+        Returns:
+            np.ndarray: 分位數，沒有數據時為 NaN
+        """
+        q = np.asarray(q, dtype=np.float64)
+        if self.count == 0:
+            return np.full(q.shape, np.nan)
+        if self.is_exact:
+            return np.quantile(self.levels[0], q)
+
+        items, weights = self.sorted_items()
+        cumulative = np.cumsum(weights)
+        positions = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+        result = items[np.clip(positions, 0, len(items) - 1)]
+        # 兩端使用精確的最小值與最大值
+        result = np.where(q <= 0, self.min, np.where(q >= 1, self.max, result))
+        return result
+
+    def rank(self, value: ArrayLike, side: str = 'left') -> np.ndarray:
+        """
+        估計小於 (side='left') 或小於等於 (side='right') value 的數值數量
+
+        Args:
+            value: 數值 (單一數值或序列)
+            side (str): 'left' 或 'right'
+
+        Returns:
+            np.ndarray: 估計的數量
+        """
+        items, weights = self.sorted_items()
+        cumulative = np.r_[0, np.cumsum(weights)]
+        return cumulative[np.searchsorted(items, value, side=side)]
+
+    def __len__(self) -> int:
+        """保留的數值數量 (sketch 的大小)"""
+        return sum(len(level) for level in self.levels)
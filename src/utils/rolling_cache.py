@@ -0,0 +1,152 @@
+"""
+滾動統計快取模組
+
+數據處理與技術指標會對同一個序列計算相同的滾動統計，例如:
+- DataProcessor.compute_price_change_columns: price_change_pct 的 rolling(20).std() (volatility 與
+  price_change_volatility 兩個欄位)、close 的 rolling(20).mean()
+- TechnicalIndicatorCalculator.calculate_bollinger_bands: close 的 rolling(20).mean() 與 .std()
+
+此模組以 (序列名稱, 窗口, 統計量) 為鍵值保存結果，共用同一個快取的處理器與指標計算器
+在一次處理中每個滾動統計只計算一次。
+
+鍵值另外包含序列的長度與底層陣列的位址，快取項目保留原始陣列的引用 (位址不會被重複使用)，
+因此同名但內容不同的序列 (例如下一個商品的 close) 不會取得舊的結果。
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .utils import setup_logger
+
+# 支援的統計量: 名稱 -> Rolling 物件的計算方法 (與 pandas 的結果完全相同)
+ROLLING_STATS: Dict[str, Callable] = {
+    'mean': lambda rolling: rolling.mean(),
+    'std': lambda rolling: rolling.std(),
+    'var': lambda rolling: rolling.var(),
+    'sum': lambda rolling: rolling.sum(),
+    'min': lambda rolling: rolling.min(),
+    'max': lambda rolling: rolling.max()
+}
+
+SeriesLike = Union[pd.Series, np.ndarray]
+
+
+class RollingStatsCache:
+    """
+    滾動統計快取類別
+
+    範例:
+        >>> cache = RollingStatsCache()
+        >>> volatility = cache.get(pct, 'price_change_pct', 20, 'std')
+        >>> cache.get(pct, 'price_change_pct', 20, 'std')      # 直接回傳快取
+        >>> cache.hits, cache.misses
+        (1, 1)
+    """
+
+    def __init__(self, max_entries: int = 64):
+        """
+        初始化快取
+
+        Args:
+            max_entries (int): 最多保存的結果數量，超過時淘汰最久未使用的項目
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries 必須大於 0")
+        self.logger = setup_logger('RollingStatsCache')
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Tuple, Tuple[np.ndarray, np.ndarray]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _values(series: SeriesLike) -> np.ndarray:
+        """序列的底層陣列"""
+        return series.to_numpy() if isinstance(series, pd.Series) else np.asarray(series)
+
+    @staticmethod
+    def _key(values: np.ndarray, name: str, window: int, stat: str) -> Tuple:
+        """(序列名稱, 窗口, 統計量, 長度, 位址, 間距)"""
+        return (name, window, stat, len(values), values.__array_interface__['data'][0], values.strides)
+
+    def lookup(self, series: SeriesLike, name: str, window: int, stat: str) -> Optional[np.ndarray]:
+        """
+        取得已計算的滾動統計
+
+        Args:
+            series: 原始序列
+            name (str): 序列名稱
+            window (int): 窗口長度
+            stat (str): 統計量 (ROLLING_STATS 中的名稱)
+
+        Returns:
+            np.ndarray: 快取的結果 (唯讀)，沒有時回傳 None
+        """
+        key = self._key(self._values(series), name, window, stat)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, series: SeriesLike, name: str, window: int, stat: str, result: np.ndarray) -> np.ndarray:
+        """
+        保存其他方式計算的滾動統計 (結果須與 pandas 的滾動運算相同)
+
+        Args:
+            series: 原始序列
+            name (str): 序列名稱
+            window (int): 窗口長度
+            stat (str): 統計量
+            result (np.ndarray): 與 series 長度相同的結果
+
+        Returns:
+            np.ndarray: 保存的結果 (唯讀)
+        """
+        values = self._values(series)
+        result = np.asarray(result)
+        if len(result) != len(values):
+            raise ValueError(f"結果長度 {len(result)} 與序列長度 {len(values)} 不同")
+        result.flags.writeable = False
+        key = self._key(values, name, window, stat)
+        # 保留原始陣列的引用，位址在快取項目存在期間不會被其他陣列使用
+        self._entries[key] = (values, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return result
+
+    def get(self, series: SeriesLike, name: str, window: int, stat: str) -> np.ndarray:
+        """
+        取得滾動統計，沒有快取時以 pandas 計算並保存
+
+        Args:
+            series: 原始序列
+            name (str): 序列名稱
+            window (int): 窗口長度
+            stat (str): 統計量 (ROLLING_STATS 中的名稱)
+
+        Returns:
+            np.ndarray: 與 series.rolling(window).<stat>() 相同的結果 (唯讀)
+        """
+        if stat not in ROLLING_STATS:
+            raise ValueError(f"不支援的滾動統計量: {stat}")
+        result = self.lookup(series, name, window, stat)
+        if result is not None:
+            return result
+        self.misses += 1
+        values = self._values(series)
+        rolling = pd.Series(values, copy=False).rolling(window=window)
+        return self.put(series, name, window, stat, ROLLING_STATS[stat](rolling).to_numpy())
+
+    def clear(self) -> None:
+        """清除所有結果與計數"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,238 @@
+"""
+處理階段快取模組
+
+此模組將處理流程中每個階段的輸出以內容定址 (content-addressed) 的方式保存在磁碟：
+1. 鍵值為輸入數據的雜湊、階段名稱與階段參數 (例如 TechnicalIndicatorCalculator.config) 的 SHA-256
+2. 輸入數據只在流程開始時雜湊一次，之後的階段以上一個鍵值串接，不需要重新雜湊大型數據框
+3. 總大小超過上限時，依最近使用時間淘汰最舊的項目 (LRU)
+
+目錄結構:
+    <cache_dir>/<key>.pkl
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .utils import setup_logger
+
+# 處理邏輯改變時遞增，使舊的快取全部失效
+# 2: 技術指標改由融合核心計算 (RSI、ATR 的浮點結果不同)
+STAGE_CACHE_VERSION = 2
+
+
+def fingerprint_frame(df: pd.DataFrame) -> str:
+    """
+    計算數據框內容的雜湊值
+
+    數值欄位直接雜湊底層的位元組，其他欄位使用 pandas 的 hash_pandas_object。
+
+    Args:
+        df (pd.DataFrame): 數據框
+
+    Returns:
+        str: 十六進位的 SHA-256
+    """
+    digest = hashlib.sha256()
+    digest.update(repr((list(map(str, df.columns)), list(map(str, df.dtypes)), df.shape)).encode())
+
+    index = df.index
+    if isinstance(index, pd.DatetimeIndex):
+        digest.update(np.ascontiguousarray(index.asi8).view(np.uint8))
+    elif np.issubdtype(index.dtype, np.number):
+        digest.update(np.ascontiguousarray(index.to_numpy()).view(np.uint8))
+    else:
+        digest.update(pd.util.hash_pandas_object(index.to_series(), index=False).to_numpy().view(np.uint8))
+
+    for col in df.columns:
+        values = df[col].to_numpy()
+        if values.dtype.kind in 'biufcmM':
+            digest.update(np.ascontiguousarray(values).view(np.uint8))
+        else:
+            digest.update(pd.util.hash_pandas_object(df[col], index=False).to_numpy().view(np.uint8))
+    return digest.hexdigest()
+
+
+class StageCache:
+    """
+    處理階段快取類別
+
+    範例:
+        >>> cache = StageCache('data/cache', max_bytes=2 * 1024**3)
+        >>> raw_key = fingerprint_frame(df)
+        >>> key, columns = cache.run('indicators', raw_key, calculator.config,
+        ...                          calculator.compute_indicator_columns, df)
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 2 * 1024 ** 3):
+        """
+        初始化快取
+
+        Args:
+            cache_dir (str): 快取目錄
+            max_bytes (int): 快取總大小上限 (bytes)，預設 2 GB
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.logger = setup_logger('StageCache')
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(stage: str, input_key: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        計算階段輸出的鍵值
+
+        Args:
+            stage (str): 階段名稱
+            input_key (str): 輸入數據的鍵值 (fingerprint_frame 或上一個階段的鍵值)
+            params (dict, optional): 影響輸出的參數
+
+        Returns:
+            str: 十六進位的 SHA-256
+        """
+        payload = json.dumps(
+            {'version': STAGE_CACHE_VERSION, 'stage': stage, 'input': input_key, 'params': params or {}},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        """取得鍵值對應的檔案路徑"""
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        讀取快取
+
+        Args:
+            key (str): 鍵值
+
+        Returns:
+            Optional[Any]: 快取的物件，不存在或無法讀取時為 None
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.warning(f"快取 {key[:12]} 無法讀取，將重新計算: {str(e)}")
+            return None
+
+        # 更新修改時間作為最近使用時間 (LRU)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        寫入快取 (先寫入暫存檔再取代，其他行程不會讀到寫到一半的檔案)
+
+        Args:
+            key (str): 鍵值
+            value (Any): 可被 pickle 的物件
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def run(
+        self,
+        stage: str,
+        input_key: str,
+        params: Optional[Dict[str, Any]],
+        func: Callable,
+        *args,
+        **kwargs
+    ) -> Tuple[str, Any]:
+        """
+        執行階段，已有快取時直接讀取
+
+        Args:
+            stage (str): 階段名稱
+            input_key (str): 輸入數據的鍵值
+            params (dict, optional): 影響輸出的參數
+            func (Callable): 計算函數
+            *args, **kwargs: 傳給 func 的參數
+
+        Returns:
+            Tuple[str, Any]: (此階段的鍵值，可作為下一階段的 input_key, 輸出)
+        """
+        key = self.key(stage, input_key, params)
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            self.logger.info(f"{stage} 使用快取 ({key[:12]})")
+            return key, value
+
+        self.misses += 1
+        value = func(*args, **kwargs)
+        self.put(key, value)
+        return key, value
+
+    def size(self) -> int:
+        """快取總大小 (bytes)"""
+        return sum(size for _, size, _ in self._entries())
+
+    def _entries(self):
+        """列出所有快取檔案 (路徑, 大小, 最近使用時間)"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.pkl'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def evict(self) -> int:
+        """
+        總大小超過上限時，刪除最久未使用的項目
+
+        Returns:
+            int: 刪除的項目數量
+        """
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        if removed:
+            self.logger.info(f"已淘汰 {removed} 個快取項目，目前大小 {total / 1024 ** 2:.1f} MB")
+        return removed
+
+    def clear(self) -> None:
+        """刪除所有快取"""
+        for path, _, _ in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
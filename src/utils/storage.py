@@ -0,0 +1,253 @@
+"""
+列式儲存模組
+
+此模組提供以 Parquet 格式儲存 K 線與處理後數據的功能，包括：
+1. 依 數據集/交易品種/時間週期/日期 分區儲存
+2. 保留欄位型別與時間索引
+3. 壓縮與欄位投影 (只讀取需要的欄位)
+4. 依時間範圍只讀取需要的分區
+
+目錄結構:
+    <root>/<dataset>/symbol=<symbol>/timeframe=<timeframe>/date=<date>/data.parquet
+"""
+
+import importlib.util
+import os
+import shutil
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from .utils import setup_logger
+
+
+class ParquetStore:
+    """
+    Parquet 列式儲存類別
+
+    寫入時會依照時間索引切分為日期分區，預設與既有分區合併 (以時間去除重複，保留最新的數據)，
+    因此同一份數據重複寫入不會產生重複的 K 線。每次都是完整結果的數據集 (例如處理後的數據)
+    使用 mode='overwrite'，不與之前的執行 (可能是不同的欄位或型別) 混合。
+    """
+
+    WRITE_MODES = ('merge', 'overwrite')
+
+    # 分區頻率與對應的日期格式
+    PARTITION_FORMATS: Dict[str, str] = {
+        'D': '%Y-%m-%d',
+        'M': '%Y-%m',
+        'Y': '%Y'
+    }
+
+    DATA_FILE = 'data.parquet'
+
+    def __init__(self, root_dir: str, compression: str = 'zstd', partition_freq: str = 'M'):
+        """
+        初始化 Parquet 儲存
+
+        Args:
+            root_dir (str): 儲存根目錄
+            compression (str): 壓縮方式 (zstd, snappy, gzip 等)，預設為 zstd
+            partition_freq (str): 日期分區頻率 ('D' 日, 'M' 月, 'Y' 年)，預設為 'M'
+
+        Raises:
+            ImportError: 未安裝 pyarrow
+            ValueError: 不支援的分區頻率
+        """
+        if importlib.util.find_spec('pyarrow') is None:
+            raise ImportError("ParquetStore 需要安裝 pyarrow: pip install pyarrow")
+        if partition_freq not in self.PARTITION_FORMATS:
+            raise ValueError(f"不支援的分區頻率: {partition_freq}")
+
+        self.root_dir = root_dir
+        self.compression = compression
+        self.partition_freq = partition_freq
+        self.logger = setup_logger('ParquetStore')
+        os.makedirs(root_dir, exist_ok=True)
+
+    def series_dir(self, symbol: str, timeframe: str, dataset: str) -> str:
+        """取得交易品種與時間週期的目錄"""
+        return os.path.join(self.root_dir, dataset, f"symbol={symbol}", f"timeframe={timeframe}")
+
+    def _partition_key(self, time: datetime) -> str:
+        """取得時間所屬的分區名稱"""
+        return pd.Timestamp(time).strftime(self.PARTITION_FORMATS[self.partition_freq])
+
+    def partitions(self, symbol: str, timeframe: str, dataset: str = 'raw') -> List[str]:
+        """
+        列出已儲存的日期分區 (依時間排序)
+
+        Args:
+            symbol (str): 交易品種
+            timeframe (str): 時間週期
+            dataset (str): 數據集名稱，例如 'raw' 或 'processed'
+
+        Returns:
+            List[str]: 分區名稱列表
+        """
+        series_dir = self.series_dir(symbol, timeframe, dataset)
+        if not os.path.isdir(series_dir):
+            return []
+        keys = [
+            name[len('date='):] for name in os.listdir(series_dir)
+            if name.startswith('date=') and os.path.isfile(os.path.join(series_dir, name, self.DATA_FILE))
+        ]
+        return sorted(keys)
+
+    def write(
+        self,
+        df: pd.DataFrame,
+        symbol: str,
+        timeframe: str,
+        dataset: str = 'raw',
+        mode: str = 'merge'
+    ) -> List[str]:
+        """
+        寫入數據
+
+        Args:
+            df (pd.DataFrame): 以時間為索引的數據
+            symbol (str): 交易品種
+            timeframe (str): 時間週期
+            dataset (str): 數據集名稱，例如 'raw' 或 'processed'
+            mode (str): 'merge' 與既有分區合併 (欄位必須相同)；
+                'overwrite' 以此數據取代整個數據集 (先寫入新分區，再刪除其他舊分區)
+
+        Returns:
+            List[str]: 寫入的分區名稱
+
+        Raises:
+            ValueError: 索引不是日期時間類型、不支援的寫入模式，或合併時欄位與既有分區不同
+        """
+        if mode not in self.WRITE_MODES:
+            self.logger.error(f"不支援的寫入模式: {mode}")
+            raise ValueError(f"不支援的寫入模式: {mode}")
+        if not isinstance(df.index, pd.DatetimeIndex):
+            self.logger.error("數據框的索引不是日期時間類型")
+            raise ValueError("數據框的索引不是日期時間類型")
+        if len(df) == 0:
+            if mode == 'overwrite':
+                self.delete(symbol, timeframe, dataset)
+            return []
+
+        series_dir = self.series_dir(symbol, timeframe, dataset)
+        keys = df.index.strftime(self.PARTITION_FORMATS[self.partition_freq])
+        written = []
+
+        for key, part in df.groupby(keys, sort=True):
+            partition_dir = os.path.join(series_dir, f"date={key}")
+            path = os.path.join(partition_dir, self.DATA_FILE)
+            os.makedirs(partition_dir, exist_ok=True)
+
+            if mode == 'merge' and os.path.isfile(path):
+                existing = pd.read_parquet(path)
+                if set(existing.columns) != set(part.columns):
+                    self.logger.error(
+                        f"{symbol} {timeframe} {dataset} 分區 {key} 的欄位與寫入的數據不同，"
+                        f"請使用 mode='overwrite' 取代整個數據集"
+                    )
+                    raise ValueError(f"{dataset} 分區 {key} 的欄位與寫入的數據不同")
+                part = pd.concat([existing, part])
+                part = part[~part.index.duplicated(keep='last')]
+            part = part.sort_index()
+
+            # 先寫入暫存檔再取代，避免中斷時留下損壞的分區
+            tmp_path = path + '.tmp'
+            part.to_parquet(tmp_path, compression=self.compression)
+            os.replace(tmp_path, path)
+            written.append(key)
+
+        if mode == 'overwrite':
+            # 新的分區都寫入後才刪除舊的分區，中斷時不會遺失數據
+            for key in set(self.partitions(symbol, timeframe, dataset)) - set(written):
+                shutil.rmtree(os.path.join(series_dir, f"date={key}"))
+
+        self.logger.info(f"已寫入 {symbol} {timeframe} {dataset} 數據 {len(df)} 筆，共 {len(written)} 個分區")
+        return written
+
+    def iter_partitions(
+        self,
+        symbol: str,
+        timeframe: str,
+        dataset: str = 'raw',
+        columns: Optional[List[str]] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        依時間順序逐一讀取分區，記憶體只需容納單一分區
+
+        Args:
+            symbol (str): 交易品種
+            timeframe (str): 時間週期
+            dataset (str): 數據集名稱
+            columns (List[str], optional): 只讀取這些欄位，時間索引一定會保留
+            start_time (datetime, optional): 開始時間 (包含)
+            end_time (datetime, optional): 結束時間 (包含)
+
+        Yields:
+            pd.DataFrame: 每個分區的數據
+        """
+        series_dir = self.series_dir(symbol, timeframe, dataset)
+        start_key = self._partition_key(start_time) if start_time is not None else None
+        end_key = self._partition_key(end_time) if end_time is not None else None
+
+        for key in self.partitions(symbol, timeframe, dataset):
+            # 分區名稱為固定格式的日期字串，可直接以字串比較篩選
+            if start_key is not None and key < start_key:
+                continue
+            if end_key is not None and key > end_key:
+                break
+
+            part = pd.read_parquet(os.path.join(series_dir, f"date={key}", self.DATA_FILE), columns=columns)
+            if start_time is not None or end_time is not None:
+                part = part.loc[start_time:end_time]
+            if len(part) > 0:
+                yield part
+
+    def read(
+        self,
+        symbol: str,
+        timeframe: str,
+        dataset: str = 'raw',
+        columns: Optional[List[str]] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> Optional[pd.DataFrame]:
+        """
+        讀取數據
+
+        Args:
+            symbol (str): 交易品種
+            timeframe (str): 時間週期
+            dataset (str): 數據集名稱
+            columns (List[str], optional): 只讀取這些欄位，時間索引一定會保留
+            start_time (datetime, optional): 開始時間 (包含)
+            end_time (datetime, optional): 結束時間 (包含)
+
+        Returns:
+            pd.DataFrame: 以時間為索引的數據，沒有數據時回傳 None
+        """
+        parts = list(self.iter_partitions(symbol, timeframe, dataset, columns, start_time, end_time))
+        if not parts:
+            self.logger.info(f"找不到 {symbol} {timeframe} {dataset} 數據")
+            return None
+
+        df = pd.concat(parts) if len(parts) > 1 else parts[0]
+        self.logger.info(f"已讀取 {symbol} {timeframe} {dataset} 數據 {len(df)} 筆")
+        return df
+
+    def delete(self, symbol: str, timeframe: str, dataset: str = 'raw') -> None:
+        """
+        刪除交易品種與時間週期的所有分區
+
+        Args:
+            symbol (str): 交易品種
+            timeframe (str): 時間週期
+            dataset (str): 數據集名稱
+        """
+        series_dir = self.series_dir(symbol, timeframe, dataset)
+        if os.path.isdir(series_dir):
+            shutil.rmtree(series_dir)
+            self.logger.info(f"已刪除 {symbol} {timeframe} {dataset} 數據")
@@ -1,7 +1,11 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, Optional
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Any
 from .utils import setup_logger, get_project_root
+from .fused_indicators import FusedIndicatorKernel, IndicatorSeed, ewm_mean
+from .indicator_scheduler import DependencyScheduler
+from .rolling_cache import RollingStatsCache
 
 class TechnicalIndicatorCalculator:
     """
@@ -24,7 +28,36 @@ class TechnicalIndicatorCalculator:
         'atr': {'period': 14}
     }
     
-    def __init__(self, config: Optional[Dict] = None):
+    # 指標群組: 群組名稱 -> (輸出欄位, 影響結果的配置區塊)
+    INDICATOR_GROUPS = {
+        'ema': (['ema_fast', 'ema_slow'], ['ema']),
+        'macd': (['macd', 'macd_signal'], ['ema', 'macd']),
+        'rsi': (['rsi'], ['rsi']),
+        'bollinger': (['bb_middle', 'bb_std', 'bb_upper', 'bb_lower'], ['bollinger']),
+        'atr': (['atr'], ['atr'])
+    }
+    
+    # 指標群組的相依關係 (MACD 使用 EMA 的結果)，其他群組互相獨立
+    INDICATOR_DEPENDENCIES = {
+        'macd': ['ema']
+    }
+    
+    # 指標群組 -> 計算方法
+    GROUP_METHODS = {
+        'ema': 'calculate_ema',
+        'macd': 'calculate_macd',
+        'rsi': 'calculate_rsi',
+        'bollinger': 'calculate_bollinger_bands',
+        'atr': 'calculate_atr'
+    }
+    
+    def __init__(
+        self,
+        config: Optional[Dict] = None,
+        fused: bool = True,
+        features: Optional[Iterable[str]] = None,
+        max_workers: Optional[int] = None
+    ):
         """
         初始化技術指標計算器
         
@@ -32,28 +65,47 @@ class TechnicalIndicatorCalculator:
         -----------
         config : dict, optional
             配置參數，包含各指標的計算參數
+        fused : bool
+            需要所有指標時是否使用融合核心 (FusedIndicatorKernel) 一次計算
+        features : iterable of str, optional
+            需要的特徵欄位或指標群組 (例如 pipeline.SELECTED_FEATURES)，只計算產生這些欄位的指標群組；
+            非指標的欄位會被忽略，預設計算全部
+        max_workers : int, optional
+            平行計算互相獨立的指標群組時使用的執行緒數量，預設為 CPU 核心數
         """
         self.logger = setup_logger('TechnicalIndicatorCalculator')
         self.config = self.DEFAULT_CONFIG.copy()
+        self.fused = fused
+        self.features = list(features) if features is not None else None
+        self.max_workers = max_workers
         
         if config:
             self.config.update(config)
     
-    def calculate_ema(self, df: pd.DataFrame) -> pd.DataFrame:
-        """計算指數移動平均線"""
+    def calculate_ema(self, df: pd.DataFrame, seed: Optional[IndicatorSeed] = None) -> pd.DataFrame:
+        """計算指數移動平均線 (指定 seed 時從已知的 EMA 值接續)"""
         try:
-            df['ema_fast'] = df['close'].ewm(span=self.config['ema']['fast'], adjust=False).mean()
-            df['ema_slow'] = df['close'].ewm(span=self.config['ema']['slow'], adjust=False).mean()
+            if seed is None:
+                df['ema_fast'] = df['close'].ewm(span=self.config['ema']['fast'], adjust=False).mean()
+                df['ema_slow'] = df['close'].ewm(span=self.config['ema']['slow'], adjust=False).mean()
+            else:
+                close = df['close'].to_numpy(dtype=np.float64)
+                df['ema_fast'] = ewm_mean(close, self.config['ema']['fast'], seed.row, seed.ema_fast)
+                df['ema_slow'] = ewm_mean(close, self.config['ema']['slow'], seed.row, seed.ema_slow)
             return df
         except Exception as e:
             self.logger.error(f"計算 EMA 時發生錯誤: {str(e)}")
             raise
     
-    def calculate_macd(self, df: pd.DataFrame) -> pd.DataFrame:
-        """計算MACD指標"""
+    def calculate_macd(self, df: pd.DataFrame, seed: Optional[IndicatorSeed] = None) -> pd.DataFrame:
+        """計算MACD指標 (指定 seed 時信號線從已知值接續)"""
         try:
             df['macd'] = df['ema_fast'] - df['ema_slow']
-            df['macd_signal'] = df['macd'].ewm(span=self.config['macd']['signal'], adjust=False).mean()
+            if seed is None:
+                df['macd_signal'] = df['macd'].ewm(span=self.config['macd']['signal'], adjust=False).mean()
+            else:
+                df['macd_signal'] = ewm_mean(df['macd'].to_numpy(dtype=np.float64), self.config['macd']['signal'],
+                                             seed.row, seed.macd_signal)
             return df
         except Exception as e:
             self.logger.error(f"計算 MACD 時發生錯誤: {str(e)}")
@@ -72,11 +124,20 @@ class TechnicalIndicatorCalculator:
             self.logger.error(f"計算 RSI 時發生錯誤: {str(e)}")
             raise
     
-    def calculate_bollinger_bands(self, df: pd.DataFrame) -> pd.DataFrame:
-        """計算布林通道"""
+    def calculate_bollinger_bands(
+        self,
+        df: pd.DataFrame,
+        rolling_cache: Optional[RollingStatsCache] = None
+    ) -> pd.DataFrame:
+        """計算布林通道 (指定 rolling_cache 時，收盤價的滾動平均與標準差與其他處理步驟共用)"""
         try:
-            df['bb_middle'] = df['close'].rolling(window=self.config['bollinger']['period']).mean()
-            df['bb_std'] = df['close'].rolling(window=self.config['bollinger']['period']).std()
+            period = self.config['bollinger']['period']
+            if rolling_cache is None:
+                df['bb_middle'] = df['close'].rolling(window=period).mean()
+                df['bb_std'] = df['close'].rolling(window=period).std()
+            else:
+                df['bb_middle'] = rolling_cache.get(df['close'], 'close', period, 'mean')
+                df['bb_std'] = rolling_cache.get(df['close'], 'close', period, 'std')
             df['bb_upper'] = df['bb_middle'] + self.config['bollinger']['std_dev'] * df['bb_std']
             df['bb_lower'] = df['bb_middle'] - self.config['bollinger']['std_dev'] * df['bb_std']
             return df
@@ -90,22 +151,32 @@ class TechnicalIndicatorCalculator:
             high_low = df['high'] - df['low']
             high_close = np.abs(df['high'] - df['close'].shift())
             low_close = np.abs(df['low'] - df['close'].shift())
-            ranges = pd.concat([high_low, high_close, low_close], axis=1)
-            true_range = np.max(ranges, axis=1)
+            # fmax 忽略 NaN (與 DataFrame.max 的 skipna 相同)，不需要先組成三欄的數據框
+            true_range = np.fmax(high_low, np.fmax(high_close, low_close))
             df['atr'] = true_range.rolling(window=self.config['atr']['period']).mean()
             return df
         except Exception as e:
             self.logger.error(f"計算 ATR 時發生錯誤: {str(e)}")
             raise
     
-    def calculate_all_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
+    def calculate_all_indicators(
+        self,
+        df: pd.DataFrame,
+        rolling_cache: Optional[RollingStatsCache] = None,
+        seed: Optional[IndicatorSeed] = None
+    ) -> pd.DataFrame:
         """
-        計算所有技術指標
+        計算所有技術指標 (不論建立計算器時是否指定 features，都計算全部的指標群組；
+        只需要部分特徵時請使用 calculate_indicators)
         
         Parameters:
         -----------
         df : pandas.DataFrame
             包含 OHLCV 數據的 DataFrame
+        rolling_cache : RollingStatsCache, optional
+            與其他處理步驟共用的滾動統計快取 (布林通道使用)
+        seed : IndicatorSeed, optional
+            EMA 與 MACD 信號線的已知狀態，分段計算時由上一段的結果接續 (見 seed_from)
         
         Returns:
         --------
@@ -115,15 +186,471 @@ class TechnicalIndicatorCalculator:
         self.logger.info("開始計算技術指標")
         
         try:
-            df = self.calculate_ema(df)
-            df = self.calculate_macd(df)
-            df = self.calculate_rsi(df)
-            df = self.calculate_bollinger_bands(df)
-            df = self.calculate_atr(df)
-            
+            df = self.calculate_indicators(df, list(self.INDICATOR_GROUPS), rolling_cache, seed)
             self.logger.info("技術指標計算完成")
             return df
-            
+        
         except Exception as e:
             self.logger.error(f"計算技術指標時發生錯誤: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+    
+    def resolve_groups(self, features: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        取得產生指定特徵需要計算的指標群組 (包含相依的群組)
+        
+        Parameters:
+        -----------
+        features : iterable of str, optional
+            特徵欄位或指標群組名稱，預設為建立計算器時指定的 features (未指定時為全部)
+        
+        Returns:
+        --------
+        list of str
+            依 INDICATOR_GROUPS 順序排列的群組名稱
+        """
+        features = self.features if features is None else features
+        if features is None:
+            return list(self.INDICATOR_GROUPS)
+        
+        requested = set(features)
+        needed = set()
+        pending = [group for group, (columns, _) in self.INDICATOR_GROUPS.items()
+                   if group in requested or requested.intersection(columns)]
+        while pending:
+            group = pending.pop()
+            if group not in needed:
+                needed.add(group)
+                pending.extend(self.INDICATOR_DEPENDENCIES.get(group, []))
+        return [group for group in self.INDICATOR_GROUPS if group in needed]
+    
+    def calculate_indicators(
+        self,
+        df: pd.DataFrame,
+        features: Optional[Iterable[str]] = None,
+        rolling_cache: Optional[RollingStatsCache] = None,
+        seed: Optional[IndicatorSeed] = None
+    ) -> pd.DataFrame:
+        """
+        只計算產生指定特徵的指標群組
+        
+        需要所有群組、fused=True 且數據沒有缺失值時使用融合核心 (結果與逐一計算相同，只有浮點誤差)；
+        否則以相依圖排程 (DependencyScheduler)，互相獨立的指標群組在執行緒池中同時計算 (MACD 等待 EMA 完成)。
+        使用相依圖排程的情況:
+        - 只需要部分群組，例如 FeatureStore.compute_or_load 只計算儲存中缺少的群組，
+          或以不含所有指標欄位的 features 建立計算器
+        - 數據含有 NaN 或無限值 (例如補齊時間間隔後的 K 線)，融合核心不支援
+        - 以 fused=False 建立計算器
+        pipeline.SELECTED_FEATURES 需要所有群組，因此 main.py 與 MultiSymbolPipelineRunner 的完整數據使用融合核心。
+        
+        Parameters:
+        -----------
+        df : pandas.DataFrame
+            包含 high、low、close 的 DataFrame
+        features : iterable of str, optional
+            特徵欄位或指標群組名稱，預設為建立計算器時指定的 features (未指定時為全部)
+        rolling_cache : RollingStatsCache, optional
+            與其他處理步驟共用的滾動統計快取 (布林通道使用)
+        seed : IndicatorSeed, optional
+            EMA 與 MACD 信號線的已知狀態，分段計算時由上一段的結果接續 (見 seed_from)
+        
+        Returns:
+        --------
+        pandas.DataFrame
+            添加了所需指標群組欄位的 DataFrame
+        """
+        groups = self.resolve_groups(features)
+        if not groups:
+            return df
+        
+        if self.fused and len(groups) == len(self.INDICATOR_GROUPS) and FusedIndicatorKernel.supports(df):
+            columns = FusedIndicatorKernel(self.config).compute(
+                df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy(),
+                bollinger=self._shared_bollinger(df, rolling_cache),
+                seed=seed
+            )
+            for name, values in columns.items():
+                # 核心輸出的陣列沒有其他引用，不需要再複製一次
+                df[name] = pd.Series(values, index=df.index, copy=False)
+            return df
+        
+        # 每個任務使用各自的數據框 (只引用原始欄位)，執行緒之間不共用可修改的物件
+        prices = {col: df[col] for col in ('high', 'low', 'close') if col in df.columns}
+        scheduler = DependencyScheduler(self.max_workers)
+        for group in self.INDICATOR_GROUPS:
+            scheduler.add(
+                group,
+                lambda deps, group=group: self._compute_group(group, prices, deps, rolling_cache, seed),
+                depends_on=self.INDICATOR_DEPENDENCIES.get(group, [])
+            )
+        results = scheduler.run(groups)
+        for group in groups:
+            for name, values in results[group].items():
+                df[name] = values
+        return df
+    
+    def _compute_group(
+        self,
+        group: str,
+        prices: Dict[str, pd.Series],
+        dependencies: Dict[str, Dict[str, pd.Series]],
+        rolling_cache: Optional[RollingStatsCache],
+        seed: Optional[IndicatorSeed] = None
+    ) -> Dict[str, pd.Series]:
+        """計算單一指標群組，回傳 {欄位: 數值}"""
+        frame = dict(prices)
+        for columns in dependencies.values():
+            frame.update(columns)
+        frame = pd.DataFrame(frame, copy=False)
+        method = getattr(self, self.GROUP_METHODS[group])
+        if group == 'bollinger':
+            frame = method(frame, rolling_cache)
+        elif group in ('ema', 'macd'):
+            frame = method(frame, seed)
+        else:
+            frame = method(frame)
+        return {col: frame[col] for col in self.INDICATOR_GROUPS[group][0]}
+    
+    def _shared_bollinger(self, df: pd.DataFrame, rolling_cache: Optional[RollingStatsCache]):
+        """
+        由快取取得收盤價的滾動 (平均, 標準差)，各自沒有快取時才計算 (例如平均已由價格變動步驟計算)；
+        沒有快取時回傳 None，由融合核心自行計算
+        """
+        if rolling_cache is None:
+            return None
+        period = self.config['bollinger']['period']
+        return (rolling_cache.get(df['close'], 'close', period, 'mean'),
+                rolling_cache.get(df['close'], 'close', period, 'std'))
+    
+    @staticmethod
+    def seed_from(columns: pd.DataFrame, row: int = -1) -> Optional[IndicatorSeed]:
+        """
+        取得指標結果中某一列的 EMA 與 MACD 信號線，作為下一段計算的起始狀態
+        
+        Parameters:
+        -----------
+        columns : pandas.DataFrame
+            含有 ema_fast、ema_slow、macd_signal 的指標結果 (應為 float64，精簡型別會損失精度)
+        row : int
+            取值的列 (負數從最後一列往前算)，預設為最後一列
+        
+        Returns:
+        --------
+        IndicatorSeed or None
+            該列的狀態 (row 為非負的列位置)，缺少欄位或沒有數據時為 None
+        """
+        names = ['ema_fast', 'ema_slow', 'macd_signal']
+        if len(columns) == 0 or not all(name in columns.columns for name in names):
+            return None
+        position = row % len(columns)
+        values = {name: float(columns[name].iloc[position]) for name in names}
+        return IndicatorSeed(row=position, **values)
+    
+    def group_params(self, group: str) -> Dict:
+        """
+        取得指標群組實際使用的參數
+        
+        Parameters:
+        -----------
+        group : str
+            INDICATOR_GROUPS 中的群組名稱
+        
+        Returns:
+        --------
+        dict
+            {配置區塊: 參數}，例如 {'ema': {'fast': 12, 'slow': 26}, 'macd': {'signal': 9}}
+        """
+        if group not in self.INDICATOR_GROUPS:
+            raise ValueError(f"不支援的指標群組: {group}")
+        return {section: dict(self.config[section]) for section in self.INDICATOR_GROUPS[group][1]}
+    
+    def compute_indicator_columns(
+        self,
+        df: pd.DataFrame,
+        rolling_cache: Optional[RollingStatsCache] = None,
+        features: Optional[Iterable[str]] = None,
+        seed: Optional[IndicatorSeed] = None
+    ) -> pd.DataFrame:
+        """
+        只計算技術指標欄位，不修改也不複製整個輸入數據框
+        
+        Parameters:
+        -----------
+        df : pandas.DataFrame
+            包含 high, low, close 的 DataFrame
+        rolling_cache : RollingStatsCache, optional
+            與其他處理步驟共用的滾動統計快取
+        features : iterable of str, optional
+            需要的特徵欄位或指標群組，預設為建立計算器時指定的 features (未指定時為全部)
+        seed : IndicatorSeed, optional
+            EMA 與 MACD 信號線的已知狀態，分段計算時由上一段的結果接續
+        
+        Returns:
+        --------
+        pandas.DataFrame
+            只包含技術指標欄位的 DataFrame (與 df 相同索引)
+        """
+        # copy=False 只引用原始欄位，新增的指標欄位不會寫回 df
+        prices = pd.DataFrame({col: df[col] for col in ['high', 'low', 'close']}, index=df.index, copy=False)
+        prices = self.calculate_indicators(prices, features, rolling_cache, seed)
+        return prices.drop(columns=['high', 'low', 'close'])
+
+
+class RollingWindow:
+    """
+    固定長度的滑動視窗統計
+    
+    每加入一個數值以 Welford 公式在常數時間內更新平均值與平方差和 (視窗已滿時同時移除最舊的數值)；
+    每更新 period 次以視窗內的數值重新精確計算一次 (攤銷後仍為常數時間)，避免誤差隨串流長度累積。
+    視窗內的數值全部相同時，平均值為該數值、標準差為 0 (與 pandas rolling 相同)。
+    """
+    
+    def __init__(self, period: int):
+        """
+        初始化滑動視窗
+        
+        Parameters:
+        -----------
+        period : int
+            視窗長度
+        """
+        self.period = period
+        self.values = deque(maxlen=period)
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._updates = 0
+        self._same_count = 0
+    
+    def __len__(self) -> int:
+        return len(self.values)
+    
+    @property
+    def full(self) -> bool:
+        """視窗是否已填滿"""
+        return len(self.values) == self.period
+    
+    def extend(self, values: Iterable[float]) -> None:
+        """加入多個數值"""
+        for value in values:
+            self.append(value)
+    
+    def append(self, value: float) -> None:
+        """加入一個數值"""
+        value = float(value)
+        values = self.values
+        self._same_count = self._same_count + 1 if values and values[-1] == value else 1
+        if len(values) == self.period:
+            old = values[0]
+            values.append(value)
+            old_mean = self._mean
+            self._mean += (value - old) / self.period
+            self._m2 += (value - old) * (value - self._mean + old - old_mean)
+        else:
+            values.append(value)
+            delta = value - self._mean
+            self._mean += delta / len(values)
+            self._m2 += delta * (value - self._mean)
+        
+        self._updates += 1
+        if self._updates >= self.period:
+            self._recompute()
+    
+    def _recompute(self) -> None:
+        """以視窗內的數值重新計算平均值與平方差和"""
+        window = np.fromiter(self.values, dtype=float, count=len(self.values))
+        self._mean = float(window.mean())
+        self._m2 = float(((window - self._mean) ** 2).sum())
+        self._updates = 0
+    
+    def mean(self) -> float:
+        """視窗填滿時回傳平均值，否則回傳 NaN"""
+        if not self.full:
+            return np.nan
+        if self._same_count >= self.period:
+            return self.values[-1]
+        return self._mean
+    
+    def std(self) -> float:
+        """視窗填滿時回傳樣本標準差 (ddof=1)，否則回傳 NaN"""
+        if not self.full or self.period < 2:
+            return np.nan
+        if self._same_count >= self.period:
+            return 0.0
+        return float(np.sqrt(max(self._m2, 0.0) / (self.period - 1)))
+
+
+class StreamingIndicatorCalculator:
+    """
+    串流技術指標計算器類別
+    
+    與 TechnicalIndicatorCalculator 使用相同的 config，
+    可先以歷史數據初始化狀態，之後每新增一根 K 線只需常數時間即可更新所有指標：
+    - EMA / MACD 信號線：保存上一個 EMA 值，以遞迴公式更新
+    - RSI / 布林通道 / ATR：只保存最近一個週期的數據，平均值與標準差以 RollingWindow 累計更新
+    
+    輸出欄位與批次計算 (calculate_all_indicators) 相同。
+    """
+    
+    OUTPUT_COLUMNS = [
+        'ema_fast', 'ema_slow', 'macd', 'macd_signal', 'rsi',
+        'bb_middle', 'bb_std', 'bb_upper', 'bb_lower', 'atr'
+    ]
+    
+    def __init__(self, config: Optional[Dict] = None):
+        """
+        初始化串流技術指標計算器
+        
+        Parameters:
+        -----------
+        config : dict, optional
+            配置參數，格式與 TechnicalIndicatorCalculator 相同
+        """
+        self.logger = setup_logger('StreamingIndicatorCalculator')
+        self.batch_calculator = TechnicalIndicatorCalculator(config)
+        self.config = self.batch_calculator.config
+        
+        # EMA 平滑係數 (與 pandas ewm(span=..., adjust=False) 相同)
+        self._alpha_fast = 2.0 / (self.config['ema']['fast'] + 1)
+        self._alpha_slow = 2.0 / (self.config['ema']['slow'] + 1)
+        self._alpha_signal = 2.0 / (self.config['macd']['signal'] + 1)
+        
+        self.reset()
+    
+    def reset(self) -> None:
+        """清除所有狀態"""
+        self._ema_fast: Optional[float] = None
+        self._ema_slow: Optional[float] = None
+        self._macd_signal: Optional[float] = None
+        self._prev_close: Optional[float] = None
+        self._gains = RollingWindow(self.config['rsi']['period'])
+        self._losses = RollingWindow(self.config['rsi']['period'])
+        self._closes = RollingWindow(self.config['bollinger']['period'])
+        self._true_ranges = RollingWindow(self.config['atr']['period'])
+        self.bar_count = 0
+    
+    def seed(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        使用歷史數據初始化狀態
+        
+        歷史部分使用批次計算，之後的 update() 會從最後一根 K 線接續計算。
+        
+        Parameters:
+        -----------
+        df : pandas.DataFrame
+            包含 high、low、close 欄位的歷史數據
+        
+        Returns:
+        --------
+        pandas.DataFrame
+            歷史數據的技術指標 (與 calculate_all_indicators 相同)
+        """
+        self.logger.info(f"使用 {len(df)} 筆歷史數據初始化串流指標")
+        self.reset()
+        if len(df) == 0:
+            return df[['high', 'low', 'close']].copy()
+        
+        result = self.batch_calculator.calculate_all_indicators(df[['high', 'low', 'close']].copy())
+        last = result.iloc[-1]
+        self._ema_fast = float(last['ema_fast'])
+        self._ema_slow = float(last['ema_slow'])
+        self._macd_signal = float(last['macd_signal'])
+        self._prev_close = float(last['close'])
+        
+        # 以最近一個週期的數據填入滑動視窗
+        close = result['close']
+        delta = close.diff()
+        gain = delta.where(delta > 0, 0)
+        loss = -delta.where(delta < 0, 0)
+        true_range = np.maximum(
+            result['high'] - result['low'],
+            np.maximum(
+                np.abs(result['high'] - close.shift()),
+                np.abs(result['low'] - close.shift())
+            ).fillna(0)
+        )
+        self._gains.extend(gain.to_numpy()[-self._gains.period:])
+        self._losses.extend(loss.to_numpy()[-self._losses.period:])
+        self._closes.extend(close.to_numpy()[-self._closes.period:])
+        self._true_ranges.extend(true_range.to_numpy()[-self._true_ranges.period:])
+        self.bar_count = len(result)
+        
+        return result
+    
+    def update(self, bar: Any) -> Dict[str, float]:
+        """
+        加入一根新的 K 線並更新所有指標
+        
+        Parameters:
+        -----------
+        bar : dict 或 pandas.Series
+            新 K 線，需包含 high、low、close
+        
+        Returns:
+        --------
+        dict
+            該 K 線的所有指標值，週期不足時為 NaN
+        """
+        high = float(bar['high'])
+        low = float(bar['low'])
+        close = float(bar['close'])
+        
+        # EMA 與 MACD
+        if self._ema_fast is None:
+            self._ema_fast = close
+            self._ema_slow = close
+        else:
+            self._ema_fast = (1 - self._alpha_fast) * self._ema_fast + self._alpha_fast * close
+            self._ema_slow = (1 - self._alpha_slow) * self._ema_slow + self._alpha_slow * close
+        macd = self._ema_fast - self._ema_slow
+        if self._macd_signal is None:
+            self._macd_signal = macd
+        else:
+            self._macd_signal = (1 - self._alpha_signal) * self._macd_signal + self._alpha_signal * macd
+        
+        # RSI 與 ATR 需要前一根收盤價，第一根 K 線的漲跌視為 0
+        if self._prev_close is None:
+            delta = 0.0
+            true_range = high - low
+        else:
+            delta = close - self._prev_close
+            true_range = max(high - low, abs(high - self._prev_close), abs(low - self._prev_close))
+        self._gains.append(delta if delta > 0 else 0.0)
+        self._losses.append(-delta if delta < 0 else 0.0)
+        self._closes.append(close)
+        self._true_ranges.append(true_range)
+        self._prev_close = close
+        self.bar_count += 1
+        
+        result = {
+            'ema_fast': self._ema_fast,
+            'ema_slow': self._ema_slow,
+            'macd': macd,
+            'macd_signal': self._macd_signal,
+            'rsi': self._rsi(),
+            'atr': self._true_ranges.mean()
+        }
+        result.update(self._bollinger())
+        return result
+    
+    def _rsi(self) -> float:
+        """計算目前視窗的 RSI"""
+        gain = self._gains.mean()
+        loss = self._losses.mean()
+        if np.isnan(gain) or np.isnan(loss):
+            return np.nan
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = np.float64(gain) / np.float64(loss)
+            return float(100 - (100 / (1 + rs)))
+    
+    def _bollinger(self) -> Dict[str, float]:
+        """計算目前視窗的布林通道"""
+        if not self._closes.full:
+            return {'bb_middle': np.nan, 'bb_std': np.nan, 'bb_upper': np.nan, 'bb_lower': np.nan}
+        middle = self._closes.mean()
+        std = self._closes.std()
+        std_dev = self.config['bollinger']['std_dev']
+        return {
+            'bb_middle': middle,
+            'bb_std': std,
+            'bb_upper': middle + std_dev * std,
+            'bb_lower': middle - std_dev * std
+        }
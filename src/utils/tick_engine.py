@@ -0,0 +1,766 @@
+"""
+報價級事件驅動回測模組
+
+K 線回測無法反映 K 線內的成交順序 (例如同一根 K 線內先觸及止損還是止盈)，
+此模組逐筆重播 MT5 報價 (copy_ticks_* / MT5History.get_ticks 的格式) 並模擬：
+1. 市價單、限價單、停損單，以及持倉的止損 (SL) / 止盈 (TP)
+2. 交易請求使用與 MT5 相同的欄位 (action、type、price、deviation、type_filling、position 等)，
+   引擎同時實作 order_send / positions_get / symbol_info_tick 等函數，可作為 MT5Connection 的後端，
+   MT5Positions.close_position 等既有程式碼可以直接使用
+3. 委託單、持倉與成交紀錄存放在 numpy 結構化陣列，觸發條件以陣列運算一次檢查所有有效委託單
+
+效能:
+    所有有效委託單與止損止盈可彙整成四個門檻 (ask 下限/上限、bid 下限/上限)，
+    引擎以向量化的區塊搜尋找出下一個觸發的報價，只有觸發成交或策略計時器到期時才回到 Python，
+    因此沒有事件的報價只需要幾次陣列比較，單核心每秒可模擬數百萬筆報價以上。
+    有效委託單與未平倉持倉另外以 編號 -> 位置 的字典索引，每個事件的成本只與有效的數量有關，
+    與已成交、已取消或已平倉的歷史紀錄數量無關。
+
+假設:
+    - 損益以報價貨幣計算 (價差 × 手數 × 合約大小)，假設與帳戶貨幣相同；不計算保證金
+    - 限價單以委託價成交，停損單、止損與止盈以觸發報價的市價成交 (跳空時包含滑價)
+    - 成交量上限 (max_volume_per_tick) 只套用在市價單，用於模擬 FOK / IOC / RETURN 的差異
+"""
+
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from . import mt5_simulator
+from .mt5_simulator import (
+    ORDER_FILLING_FOK, ORDER_FILLING_RETURN,
+    ORDER_TYPE_BUY, ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_BUY_STOP,
+    ORDER_TYPE_SELL, ORDER_TYPE_SELL_LIMIT, ORDER_TYPE_SELL_STOP,
+    POSITION_TYPE_BUY, POSITION_TYPE_SELL, RES_S_OK, TICKS_DTYPE,
+    TRADE_ACTION_DEAL, TRADE_ACTION_MODIFY, TRADE_ACTION_PENDING, TRADE_ACTION_REMOVE, TRADE_ACTION_SLTP,
+    TRADE_RETCODE_DONE, TRADE_RETCODE_DONE_PARTIAL, TRADE_RETCODE_INVALID, TRADE_RETCODE_INVALID_PRICE,
+    TRADE_RETCODE_INVALID_VOLUME, TRADE_RETCODE_POSITION_CLOSED, TRADE_RETCODE_REJECT, TRADE_RETCODE_REQUOTE,
+    _frame_to_records
+)
+from .utils import setup_logger
+
+# ==================== MT5 常數 ====================
+# 數值與 MetaTrader5 模組相同
+ORDER_STATE_PLACED = 1
+ORDER_STATE_CANCELED = 2
+ORDER_STATE_PARTIAL = 3
+ORDER_STATE_FILLED = 4
+ORDER_STATE_REJECTED = 5
+
+DEAL_ENTRY_IN = 0
+DEAL_ENTRY_OUT = 1
+
+DEAL_REASON_EXPERT = 3
+DEAL_REASON_SL = 4
+DEAL_REASON_TP = 5
+
+# ==================== 陣列格式 ====================
+ORDER_DTYPE = np.dtype([
+    ('ticket', '<i8'), ('type', 'i1'), ('state', 'i1'), ('type_filling', 'i1'),
+    ('volume_initial', '<f8'), ('volume_current', '<f8'), ('price_open', '<f8'),
+    ('sl', '<f8'), ('tp', '<f8'), ('deviation', '<i4'), ('magic', '<i8'),
+    ('time_setup_msc', '<i8'), ('time_done_msc', '<i8')
+])
+POSITION_DTYPE = np.dtype([
+    ('ticket', '<i8'), ('type', 'i1'), ('open', '?'), ('volume', '<f8'), ('price_open', '<f8'),
+    ('sl', '<f8'), ('tp', '<f8'), ('magic', '<i8'), ('time_msc', '<i8')
+])
+DEAL_DTYPE = np.dtype([
+    ('ticket', '<i8'), ('order', '<i8'), ('position_id', '<i8'), ('type', 'i1'), ('entry', 'i1'),
+    ('reason', 'i1'), ('volume', '<f8'), ('price', '<f8'), ('profit', '<f8'), ('magic', '<i8'),
+    ('tick', '<i8'), ('time_msc', '<i8')
+])
+
+PENDING_TYPES = (ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_SELL_LIMIT, ORDER_TYPE_BUY_STOP, ORDER_TYPE_SELL_STOP)
+BUY_TYPES = (ORDER_TYPE_BUY, ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_BUY_STOP)
+
+
+class RecordBuffer:
+    """
+    可增長的結構化陣列
+
+    容量不足時加倍，新增紀錄的攤銷成本為常數；records 回傳目前所有紀錄的視圖 (不複製)。
+    """
+
+    def __init__(self, dtype: np.dtype, capacity: int = 1024):
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._size = 0
+
+    def append(self, **fields: Any) -> int:
+        """新增一筆紀錄，回傳其位置"""
+        if self._size == len(self._data):
+            grown = np.zeros(len(self._data) * 2, dtype=self._data.dtype)
+            grown[:self._size] = self._data
+            self._data = grown
+        row = self._data[self._size]
+        for name, value in fields.items():
+            row[name] = value
+        self._size += 1
+        return self._size - 1
+
+    @property
+    def records(self) -> np.ndarray:
+        """所有紀錄 (視圖)"""
+        return self._data[:self._size]
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class TickStrategy:
+    """
+    報價級策略基礎類別
+
+    子類別覆寫需要的回呼函數，在回呼中以 engine.order_send(request) 下單。
+    timer_ms 不為 None 時，每經過 timer_ms 毫秒 (以報價時間對齊) 在該時段的第一筆報價呼叫 on_timer。
+    """
+
+    timer_ms: Optional[int] = None
+
+    def on_start(self, engine: 'TickBacktestEngine') -> None:
+        """回測開始 (目前報價為第一筆報價)"""
+
+    def on_timer(self, engine: 'TickBacktestEngine') -> None:
+        """計時器到期"""
+
+    def on_fill(self, engine: 'TickBacktestEngine', deal: np.void) -> None:
+        """委託單、止損或止盈成交 (deal 為 DEAL_DTYPE 的紀錄)"""
+
+    def on_end(self, engine: 'TickBacktestEngine') -> None:
+        """回測結束 (目前報價為最後一筆報價)"""
+
+
+@dataclass
+class TickBacktestResult:
+    """報價級回測結果"""
+    deals: pd.DataFrame
+    orders: pd.DataFrame
+    balance: float
+    equity: float
+    ticks: int
+    events: int
+    seconds: float
+
+    @property
+    def ticks_per_second(self) -> float:
+        """每秒模擬的報價數量"""
+        return self.ticks / self.seconds if self.seconds > 0 else float('inf')
+
+
+class TickBacktestEngine:
+    """
+    報價級事件驅動回測引擎類別
+
+    範例:
+        >>> class Breakout(TickStrategy):
+        ...     timer_ms = 60_000
+        ...     def on_timer(self, engine):
+        ...         tick = engine.symbol_info_tick()
+        ...         if not engine.positions_get():
+        ...             engine.order_send({'action': engine.TRADE_ACTION_PENDING, 'symbol': 'EURUSD',
+        ...                                'type': engine.ORDER_TYPE_BUY_STOP, 'volume': 0.1,
+        ...                                'price': tick.ask + 0.0005, 'sl': tick.bid - 0.0010,
+        ...                                'tp': tick.ask + 0.0020})
+        >>> engine = TickBacktestEngine(ticks, symbol='EURUSD')
+        >>> result = engine.run(Breakout())
+        >>> result.deals.groupby('reason')['profit'].sum()
+    """
+
+    REQUIRES_CREDENTIALS = False
+
+    # 每次區塊搜尋的報價數量 (由小到大，觸發點通常很近)
+    MIN_SCAN_BLOCK = 1024
+    MAX_SCAN_BLOCK = 1 << 16
+
+    def __init__(
+        self,
+        ticks: Union[pd.DataFrame, np.ndarray],
+        symbol: str,
+        balance: float = 10000.0,
+        point: float = 0.00001,
+        contract_size: float = 100000.0,
+        volume_min: float = 0.01,
+        volume_max: float = 100.0,
+        max_volume_per_tick: Optional[float] = None
+    ):
+        """
+        初始化回測引擎
+
+        Args:
+            ticks: 報價數據，MT5History.get_ticks 的數據框或 copy_ticks_* 的結構化陣列
+            symbol (str): 交易品種
+            balance (float): 初始餘額
+            point (float): 最小報價單位 (deviation 以此為單位)
+            contract_size (float): 合約大小
+            volume_min (float): 最小手數
+            volume_max (float): 最大手數
+            max_volume_per_tick (float, optional): 每筆報價市價單可成交的最大手數，None 表示不限
+        """
+        self.logger = setup_logger('TickBacktestEngine')
+        if isinstance(ticks, pd.DataFrame):
+            ticks = _frame_to_records(ticks, TICKS_DTYPE)
+        ticks = np.sort(np.asarray(ticks), order='time_msc', kind='stable')
+        if len(ticks) == 0:
+            raise ValueError("沒有報價數據")
+
+        self.symbol = symbol
+        self.time_msc = np.ascontiguousarray(ticks['time_msc'], dtype=np.int64)
+        self.bid = np.ascontiguousarray(ticks['bid'], dtype=np.float64)
+        self.ask = np.ascontiguousarray(ticks['ask'], dtype=np.float64)
+        self._ticks = ticks
+        self.n_ticks = len(ticks)
+
+        self.initial_balance = balance
+        self.point = point
+        self.contract_size = contract_size
+        self.volume_min = volume_min
+        self.volume_max = volume_max
+        self.max_volume_per_tick = max_volume_per_tick
+
+        # 匯出常數，讓此物件可以取代 MetaTrader5 模組
+        for source in (vars(mt5_simulator), globals()):
+            for name, value in source.items():
+                if name.isupper() and isinstance(value, int):
+                    setattr(self, name, value)
+
+        self.reset()
+
+    def reset(self) -> None:
+        """清除所有委託單、持倉與成交紀錄"""
+        self.balance = self.initial_balance
+        self.current = 0
+        self.orders = RecordBuffer(ORDER_DTYPE)
+        self.positions = RecordBuffer(POSITION_DTYPE)
+        self.deals = RecordBuffer(DEAL_DTYPE)
+        # 有效委託單與未平倉持倉: 編號 -> 紀錄位置 (依編號順序插入)
+        self._active_orders: Dict[int, int] = {}
+        self._open_positions: Dict[int, int] = {}
+        self._next_ticket = 1
+        self._thresholds: Optional[Tuple[float, float, float, float, bool]] = None
+        self._strategy: Optional[TickStrategy] = None
+        self._last_error: Tuple[int, str] = (RES_S_OK, 'Success')
+
+    # ==================== 回測 ====================
+    def run(self, strategy: TickStrategy) -> TickBacktestResult:
+        """
+        執行回測
+
+        Args:
+            strategy (TickStrategy): 策略
+
+        Returns:
+            TickBacktestResult: 回測結果
+        """
+        self.reset()
+        self._strategy = strategy
+        started = time.perf_counter()
+        events = 0
+        timer_ms = strategy.timer_ms
+
+        self.current = 0
+        strategy.on_start(self)
+        next_timer = self._next_timer_index(0, timer_ms)
+        i = 1
+        while i < self.n_ticks:
+            stop = min(next_timer, self.n_ticks)
+            j = self._scan(i, stop)
+            if j < stop:
+                # 委託單觸發
+                self.current = j
+                self._process_triggers(j)
+                events += 1
+                i = j + 1
+                continue
+            if stop >= self.n_ticks:
+                break
+
+            # 計時器到期: 先處理此報價觸發的委託單，再呼叫策略
+            self.current = stop
+            self._process_triggers(stop)
+            strategy.on_timer(self)
+            events += 1
+            next_timer = self._next_timer_index(stop, timer_ms)
+            i = stop + 1
+
+        self.current = self.n_ticks - 1
+        strategy.on_end(self)
+        seconds = time.perf_counter() - started
+        self._strategy = None
+
+        result = TickBacktestResult(
+            deals=pd.DataFrame(self.deals.records.copy()),
+            orders=pd.DataFrame(self.orders.records.copy()),
+            balance=self.balance,
+            equity=self.balance + self._floating_profit(self.current),
+            ticks=self.n_ticks,
+            events=events,
+            seconds=seconds
+        )
+        self.logger.info(
+            f"回測完成: {self.n_ticks} 筆報價，{events} 個事件，{len(self.deals)} 筆成交，"
+            f"{result.ticks_per_second / 1e6:.1f} 百萬筆報價/秒"
+        )
+        return result
+
+    def _next_timer_index(self, i: int, timer_ms: Optional[int]) -> int:
+        """下一個計時器時段的第一筆報價位置"""
+        if not timer_ms:
+            return self.n_ticks
+        next_time = (self.time_msc[i] // timer_ms + 1) * timer_ms
+        return int(np.searchsorted(self.time_msc, next_time, side='left'))
+
+    def _update_thresholds(self) -> Tuple[float, float, float, float, bool]:
+        """
+        彙整所有有效委託單與止損止盈的觸發門檻
+
+        Returns:
+            Tuple: (ask <= a, ask >= b, bid >= c, bid <= d, 是否有未成交的市價單)
+        """
+        if self._thresholds is not None:
+            return self._thresholds
+
+        ask_le, ask_ge, bid_ge, bid_le = [-np.inf], [np.inf], [np.inf], [-np.inf]
+        active = self.orders.records[self._rows(self._active_orders)]
+        market = bool(((active['type'] == ORDER_TYPE_BUY) | (active['type'] == ORDER_TYPE_SELL)).any())
+        for order_type, bucket in ((ORDER_TYPE_BUY_LIMIT, ask_le), (ORDER_TYPE_BUY_STOP, ask_ge),
+                                   (ORDER_TYPE_SELL_LIMIT, bid_ge), (ORDER_TYPE_SELL_STOP, bid_le)):
+            prices = active['price_open'][active['type'] == order_type]
+            if len(prices):
+                bucket.append(prices.max() if bucket is ask_le or bucket is bid_le else prices.min())
+
+        positions = self.positions.records[self._rows(self._open_positions)]
+        longs = positions[positions['type'] == POSITION_TYPE_BUY]
+        shorts = positions[positions['type'] == POSITION_TYPE_SELL]
+        for values, bucket, use_max in ((longs['sl'], bid_le, True), (longs['tp'], bid_ge, False),
+                                        (shorts['sl'], ask_ge, False), (shorts['tp'], ask_le, True)):
+            values = values[values > 0]
+            if len(values):
+                bucket.append(values.max() if use_max else values.min())
+
+        self._thresholds = (max(ask_le), min(ask_ge), min(bid_ge), max(bid_le), market)
+        return self._thresholds
+
+    @staticmethod
+    def _rows(index: Dict[int, int]) -> np.ndarray:
+        """有效委託單或未平倉持倉的紀錄位置 (依編號順序)"""
+        return np.fromiter(index.values(), dtype=np.intp, count=len(index))
+
+    def _scan(self, start: int, stop: int) -> int:
+        """
+        找出 [start, stop) 中第一筆觸發任何委託單的報價
+
+        Returns:
+            int: 報價位置，沒有觸發時為 stop
+        """
+        if start >= stop:
+            return stop
+        ask_le, ask_ge, bid_ge, bid_le, market = self._update_thresholds()
+        if market:
+            return start
+        if ask_le == -np.inf and ask_ge == np.inf and bid_ge == np.inf and bid_le == -np.inf:
+            return stop
+
+        block = self.MIN_SCAN_BLOCK
+        while start < stop:
+            end = min(start + block, stop)
+            ask = self.ask[start:end]
+            bid = self.bid[start:end]
+            hit = ask <= ask_le
+            hit |= ask >= ask_ge
+            hit |= bid >= bid_ge
+            hit |= bid <= bid_le
+            position = int(hit.argmax())
+            if hit[position]:
+                return start + position
+            start = end
+            block = min(block * 2, self.MAX_SCAN_BLOCK)
+        return stop
+
+    def _process_triggers(self, i: int) -> None:
+        """處理報價 i 觸發的委託單與止損止盈 (依編號順序)"""
+        bid, ask = self.bid[i], self.ask[i]
+
+        rows = self._rows(self._active_orders)
+        orders = self.orders.records[rows]
+        types = orders['type']
+        prices = orders['price_open']
+        hit = (
+            (types == ORDER_TYPE_BUY) | (types == ORDER_TYPE_SELL)
+            | ((types == ORDER_TYPE_BUY_LIMIT) & (ask <= prices))
+            | ((types == ORDER_TYPE_SELL_LIMIT) & (bid >= prices))
+            | ((types == ORDER_TYPE_BUY_STOP) & (ask >= prices))
+            | ((types == ORDER_TYPE_SELL_STOP) & (bid <= prices))
+        )
+        for row in rows[hit]:
+            # 先成交的委託單可能讓策略取消其他委託單
+            if self.orders.records[row]['state'] in (ORDER_STATE_PLACED, ORDER_STATE_PARTIAL):
+                self._fill_order(int(row), i)
+
+        rows = self._rows(self._open_positions)
+        positions = self.positions.records[rows]
+        is_long = positions['type'] == POSITION_TYPE_BUY
+        sl, tp = positions['sl'], positions['tp']
+        sl_hit = (sl > 0) & np.where(is_long, bid <= sl, ask >= sl)
+        tp_hit = (tp > 0) & np.where(is_long, bid >= tp, ask <= tp)
+        for row, is_sl in zip(rows[sl_hit | tp_hit], sl_hit[sl_hit | tp_hit]):
+            if self.positions.records[row]['open']:
+                reason = DEAL_REASON_SL if is_sl else DEAL_REASON_TP
+                self._close_position(int(row), self.positions.records[row]['volume'], i, reason, order=0)
+        self._thresholds = None
+
+    # ==================== 成交 ====================
+    def _ticket(self) -> int:
+        """下一個委託單/持倉/成交編號"""
+        ticket = self._next_ticket
+        self._next_ticket += 1
+        return ticket
+
+    def _fill_order(self, row: int, i: int) -> None:
+        """委託單成交 (開倉)"""
+        order = self.orders.records[row]
+        order_type = int(order['type'])
+        is_buy = order_type in BUY_TYPES
+        if order_type in (ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_SELL_LIMIT):
+            price = float(order['price_open'])
+        else:
+            price = float(self.ask[i] if is_buy else self.bid[i])
+
+        volume = float(order['volume_current'])
+        if order_type in (ORDER_TYPE_BUY, ORDER_TYPE_SELL) and self.max_volume_per_tick is not None:
+            volume = min(volume, self.max_volume_per_tick)
+        remaining = round(float(order['volume_current']) - volume, 8)
+
+        order['volume_current'] = remaining
+        order['state'] = ORDER_STATE_PARTIAL if remaining > 0 else ORDER_STATE_FILLED
+        if remaining <= 0:
+            order['time_done_msc'] = self.time_msc[i]
+            self._active_orders.pop(int(order['ticket']), None)
+        self._open_position(order, volume, price, i)
+        self._thresholds = None
+
+    def _open_position(self, order: np.void, volume: float, price: float, i: int) -> int:
+        """建立持倉與進場成交紀錄，回傳成交紀錄位置"""
+        ticket = self._ticket()
+        is_buy = int(order['type']) in BUY_TYPES
+        self._open_positions[ticket] = self.positions.append(
+            ticket=ticket, type=POSITION_TYPE_BUY if is_buy else POSITION_TYPE_SELL, open=True,
+            volume=volume, price_open=price, sl=order['sl'], tp=order['tp'], magic=order['magic'],
+            time_msc=self.time_msc[i]
+        )
+        row = self.deals.append(
+            ticket=self._ticket(), order=order['ticket'], position_id=ticket,
+            type=ORDER_TYPE_BUY if is_buy else ORDER_TYPE_SELL, entry=DEAL_ENTRY_IN, reason=DEAL_REASON_EXPERT,
+            volume=volume, price=price, profit=0.0, magic=order['magic'], tick=i, time_msc=self.time_msc[i]
+        )
+        self._notify(row)
+        return row
+
+    def _close_position(self, row: int, volume: float, i: int, reason: int, order: int) -> int:
+        """平倉 (可部分平倉) 並記錄出場成交，回傳成交紀錄位置"""
+        position = self.positions.records[row]
+        is_long = position['type'] == POSITION_TYPE_BUY
+        price = float(self.bid[i] if is_long else self.ask[i])
+        direction = 1.0 if is_long else -1.0
+        profit = direction * (price - float(position['price_open'])) * volume * self.contract_size
+        self.balance += profit
+        position['volume'] = round(float(position['volume']) - volume, 8)
+        if position['volume'] <= 0:
+            position['open'] = False
+            del self._open_positions[int(position['ticket'])]
+        self._thresholds = None
+
+        deal = self.deals.append(
+            ticket=self._ticket(), order=order, position_id=position['ticket'],
+            type=ORDER_TYPE_SELL if is_long else ORDER_TYPE_BUY, entry=DEAL_ENTRY_OUT, reason=reason,
+            volume=volume, price=price, profit=profit, magic=position['magic'], tick=i, time_msc=self.time_msc[i]
+        )
+        self._notify(deal)
+        return deal
+
+    def _notify(self, deal_row: int) -> None:
+        """通知策略成交"""
+        if self._strategy is not None:
+            self._strategy.on_fill(self, self.deals.records[deal_row].copy())
+
+    def _position_row(self, ticket: int) -> Optional[int]:
+        """持倉編號對應的位置 (只包含未平倉的持倉)"""
+        return self._open_positions.get(ticket)
+
+    def _floating_profit(self, i: int) -> float:
+        """報價 i 時所有持倉的浮動損益"""
+        positions = self.positions.records[self._rows(self._open_positions)]
+        is_long = positions['type'] == POSITION_TYPE_BUY
+        exit_price = np.where(is_long, self.bid[i], self.ask[i])
+        direction = np.where(is_long, 1.0, -1.0)
+        return float((direction * (exit_price - positions['price_open']) * positions['volume']).sum()
+                     * self.contract_size)
+
+    # ==================== MT5 介面 ====================
+    def _result(self, retcode: int, request: Dict[str, Any], comment: str, **kwargs) -> SimpleNamespace:
+        """建立 order_send 的回傳結果"""
+        values = dict(retcode=retcode, deal=0, order=0, volume=0.0, price=0.0,
+                      bid=float(self.bid[self.current]), ask=float(self.ask[self.current]),
+                      comment=comment, request=request)
+        values.update(kwargs)
+        return SimpleNamespace(**values)
+
+    def order_send(self, request: Dict[str, Any]) -> SimpleNamespace:
+        """
+        送出交易請求 (以目前報價處理)
+
+        支援 TRADE_ACTION_DEAL (市價開倉，或指定 position 平倉)、TRADE_ACTION_PENDING (限價/停損單)、
+        TRADE_ACTION_SLTP (修改持倉止損止盈)、TRADE_ACTION_MODIFY (修改掛單) 與 TRADE_ACTION_REMOVE (取消掛單)。
+        """
+        action = request.get('action')
+        symbol = request.get('symbol', self.symbol)
+        if symbol != self.symbol:
+            return self._result(TRADE_RETCODE_INVALID, request, f'Symbol {symbol} not found')
+
+        if action == TRADE_ACTION_DEAL:
+            return self._market_order(request)
+        if action == TRADE_ACTION_PENDING:
+            return self._pending_order(request)
+        if action == TRADE_ACTION_SLTP:
+            row = self._position_row(request.get('position'))
+            if row is None:
+                return self._result(TRADE_RETCODE_POSITION_CLOSED, request, 'Position not found')
+            position = self.positions.records[row]
+            position['sl'] = float(request.get('sl', position['sl']))
+            position['tp'] = float(request.get('tp', position['tp']))
+            self._thresholds = None
+            return self._result(TRADE_RETCODE_DONE, request, 'Request executed')
+        if action in (TRADE_ACTION_MODIFY, TRADE_ACTION_REMOVE):
+            row = self._active_orders.get(request.get('order'))
+            if row is None:
+                return self._result(TRADE_RETCODE_INVALID, request, 'Order not found')
+            order = self.orders.records[row]
+            if action == TRADE_ACTION_REMOVE:
+                self._cancel_order(order)
+            else:
+                for field, key in (('price_open', 'price'), ('sl', 'sl'), ('tp', 'tp')):
+                    if key in request:
+                        order[field] = float(request[key])
+            self._thresholds = None
+            return self._result(TRADE_RETCODE_DONE, request, 'Request executed', order=int(order['ticket']))
+        return self._result(TRADE_RETCODE_INVALID, request, 'Unsupported trade action')
+
+    def _validate_volume(self, request: Dict[str, Any]) -> Optional[float]:
+        """檢查手數，無效時回傳 None"""
+        volume = float(request.get('volume', 0.0))
+        if volume <= 0 or volume < self.volume_min - 1e-12 or volume > self.volume_max + 1e-12:
+            return None
+        return volume
+
+    def _add_order(self, request: Dict[str, Any], order_type: int, volume: float, price: float, state: int) -> int:
+        """新增委託單紀錄，回傳位置"""
+        ticket = self._ticket()
+        row = self.orders.append(
+            ticket=ticket, type=order_type, state=state,
+            type_filling=int(request.get('type_filling', ORDER_FILLING_FOK)),
+            volume_initial=volume, volume_current=volume, price_open=price,
+            sl=float(request.get('sl', 0.0)), tp=float(request.get('tp', 0.0)),
+            deviation=int(request.get('deviation', 0) or 0), magic=int(request.get('magic', 0)),
+            time_setup_msc=self.time_msc[self.current]
+        )
+        if state in (ORDER_STATE_PLACED, ORDER_STATE_PARTIAL):
+            self._active_orders[ticket] = row
+        return row
+
+    def _cancel_order(self, order: np.void) -> None:
+        """取消委託單 (剩餘的數量不再成交)"""
+        order['state'] = ORDER_STATE_CANCELED
+        order['time_done_msc'] = self.time_msc[self.current]
+        self._active_orders.pop(int(order['ticket']), None)
+
+    def _market_order(self, request: Dict[str, Any]) -> SimpleNamespace:
+        """市價單: 開倉或平倉"""
+        volume = self._validate_volume(request)
+        if volume is None:
+            return self._result(TRADE_RETCODE_INVALID_VOLUME, request, 'Invalid volume')
+        order_type = request.get('type')
+        if order_type not in (ORDER_TYPE_BUY, ORDER_TYPE_SELL):
+            return self._result(TRADE_RETCODE_INVALID, request, 'Unsupported order type')
+
+        i = self.current
+        fill_price = float(self.ask[i] if order_type == ORDER_TYPE_BUY else self.bid[i])
+
+        # 成交價偏離請求價格超過 deviation 點時拒絕 (重新報價)
+        requested = float(request.get('price', 0.0) or 0.0)
+        deviation = int(request.get('deviation', 0) or 0)
+        if requested > 0 and abs(fill_price - requested) > deviation * self.point + 1e-12:
+            return self._result(TRADE_RETCODE_REQUOTE, request, 'Requote')
+
+        # 成交量上限: FOK 全部成交或拒絕，IOC 成交可成交的部分並取消剩餘，RETURN 剩餘部分留在下一筆報價成交
+        filling = int(request.get('type_filling', ORDER_FILLING_FOK))
+        fillable = volume if self.max_volume_per_tick is None else min(volume, self.max_volume_per_tick)
+        if fillable < volume - 1e-12 and filling == ORDER_FILLING_FOK:
+            return self._result(TRADE_RETCODE_REJECT, request, 'Not enough liquidity for FOK')
+
+        ticket = request.get('position')
+        if ticket:
+            row = self._position_row(ticket)
+            if row is None:
+                return self._result(TRADE_RETCODE_POSITION_CLOSED, request, 'Position not found')
+            position = self.positions.records[row]
+            closing_type = ORDER_TYPE_SELL if position['type'] == POSITION_TYPE_BUY else ORDER_TYPE_BUY
+            if order_type != closing_type or volume > position['volume'] + 1e-12:
+                return self._result(TRADE_RETCODE_INVALID, request, 'Invalid close request')
+            order_row = self._add_order(request, order_type, volume, fill_price, ORDER_STATE_FILLED)
+            order = self.orders.records[order_row]
+            order['volume_current'] = 0.0
+            order['time_done_msc'] = self.time_msc[i]
+            deal = self._close_position(row, volume, i, DEAL_REASON_EXPERT, order=int(order['ticket']))
+            return self._result(TRADE_RETCODE_DONE, request, 'Request executed',
+                                deal=int(self.deals.records[deal]['ticket']), order=int(order['ticket']),
+                                volume=volume, price=fill_price)
+
+        order_row = self._add_order(request, order_type, volume, fill_price, ORDER_STATE_PLACED)
+        self._fill_order(order_row, i)
+        order = self.orders.records[order_row]
+        if order['volume_current'] > 0 and filling != ORDER_FILLING_RETURN:
+            self._cancel_order(order)
+        self._thresholds = None
+        retcode = TRADE_RETCODE_DONE if fillable >= volume - 1e-12 else TRADE_RETCODE_DONE_PARTIAL
+        return self._result(retcode, request, 'Request executed', deal=int(self.deals.records[-1]['ticket']),
+                            order=int(order['ticket']), volume=fillable, price=fill_price)
+
+    def _pending_order(self, request: Dict[str, Any]) -> SimpleNamespace:
+        """限價單與停損單"""
+        volume = self._validate_volume(request)
+        if volume is None:
+            return self._result(TRADE_RETCODE_INVALID_VOLUME, request, 'Invalid volume')
+        order_type = request.get('type')
+        if order_type not in PENDING_TYPES:
+            return self._result(TRADE_RETCODE_INVALID, request, 'Unsupported order type')
+
+        # 掛單價格必須位於目前報價的正確一側
+        price = float(request.get('price', 0.0) or 0.0)
+        bid, ask = self.bid[self.current], self.ask[self.current]
+        valid = {
+            ORDER_TYPE_BUY_LIMIT: price < ask,
+            ORDER_TYPE_SELL_LIMIT: price > bid,
+            ORDER_TYPE_BUY_STOP: price > ask,
+            ORDER_TYPE_SELL_STOP: price < bid
+        }[order_type]
+        if price <= 0 or not valid:
+            return self._result(TRADE_RETCODE_INVALID_PRICE, request, 'Invalid price')
+
+        row = self._add_order(request, order_type, volume, price, ORDER_STATE_PLACED)
+        self._thresholds = None
+        return self._result(TRADE_RETCODE_DONE, request, 'Request executed',
+                            order=int(self.orders.records[row]['ticket']), volume=volume, price=price)
+
+    def symbol_info_tick(self, symbol: Optional[str] = None) -> SimpleNamespace:
+        """取得目前報價"""
+        tick = self._ticks[self.current]
+        return SimpleNamespace(**{name: tick[name].item() for name in tick.dtype.names})
+
+    def symbol_info(self, symbol: Optional[str] = None) -> SimpleNamespace:
+        """取得交易品種規格"""
+        return SimpleNamespace(name=self.symbol, point=self.point, trade_contract_size=self.contract_size,
+                               volume_min=self.volume_min, volume_max=self.volume_max, visible=True, select=True)
+
+    def positions_get(self, symbol: Optional[str] = None, ticket: Optional[int] = None, **kwargs) -> Tuple:
+        """取得未平倉的持倉 (profit 為目前報價的浮動損益)"""
+        if ticket is not None:
+            rows = [self._open_positions[ticket]] if ticket in self._open_positions else []
+        else:
+            rows = self._open_positions.values()
+        positions = self.positions.records
+        result = []
+        for row in rows:
+            position = positions[row]
+            is_long = position['type'] == POSITION_TYPE_BUY
+            price = self.bid[self.current] if is_long else self.ask[self.current]
+            direction = 1.0 if is_long else -1.0
+            profit = direction * (price - position['price_open']) * position['volume'] * self.contract_size
+            result.append(SimpleNamespace(
+                ticket=int(position['ticket']), symbol=self.symbol, type=int(position['type']),
+                volume=float(position['volume']), price_open=float(position['price_open']),
+                sl=float(position['sl']), tp=float(position['tp']), profit=float(profit),
+                magic=int(position['magic']), time_msc=int(position['time_msc'])
+            ))
+        return tuple(result)
+
+    def orders_get(self, symbol: Optional[str] = None, ticket: Optional[int] = None, **kwargs) -> Tuple:
+        """取得有效的委託單"""
+        if ticket is not None:
+            rows = [self._active_orders[ticket]] if ticket in self._active_orders else []
+        else:
+            rows = self._active_orders.values()
+        orders = self.orders.records
+        return tuple(
+            SimpleNamespace(symbol=self.symbol, **{name: orders[row][name].item() for name in ORDER_DTYPE.names})
+            for row in rows
+        )
+
+    def account_info(self) -> SimpleNamespace:
+        """取得模擬帳戶資訊"""
+        profit = self._floating_profit(self.current)
+        return SimpleNamespace(login=0, balance=self.balance, equity=self.balance + profit, profit=profit,
+                               margin=0.0, margin_free=self.balance + profit, leverage=0, currency='')
+
+    def initialize(self, *args, **kwargs) -> bool:
+        """與 MetaTrader5.initialize 相同的介面"""
+        return True
+
+    def login(self, *args, **kwargs) -> bool:
+        """與 MetaTrader5.login 相同的介面"""
+        return True
+
+    def shutdown(self) -> None:
+        """與 MetaTrader5.shutdown 相同的介面"""
+
+    def terminal_info(self) -> SimpleNamespace:
+        """取得終端機資訊"""
+        return SimpleNamespace(connected=True, trade_allowed=True, name='TickBacktestEngine')
+
+    def last_error(self) -> Tuple[int, str]:
+        """取得最後一次錯誤"""
+        return self._last_error
+
+    # ==================== 分析 ====================
+    def equity_curve(self, step: int = 1) -> pd.Series:
+        """
+        以成交紀錄重建每筆報價的權益 (不需要在回測中逐筆記錄)
+
+        多單以 bid、空單以 ask 評價。成交紀錄之間的多空手數與成本不變，
+        因此權益 = 餘額 + 合約大小 × (多單手數 × bid - 空單手數 × ask - 多單成本 + 空單成本)。
+
+        Args:
+            step (int): 每隔幾筆報價取樣
+
+        Returns:
+            pd.Series: 以報價時間為索引的權益
+        """
+        deals = self.deals.records
+        ticks = np.arange(0, self.n_ticks, step)
+        if len(deals) == 0:
+            return pd.Series(self.initial_balance, index=pd.to_datetime(self.time_msc[ticks], unit='ms'))
+
+        is_buy = deals['type'] == ORDER_TYPE_BUY
+        entry = deals['entry'] == DEAL_ENTRY_IN
+        volume, price = deals['volume'], deals['price']
+        # 出場成交的開倉成本由已實現損益反推: 多單 vol × open = vol × price - profit / 合約大小
+        cost_out = volume * price - np.where(is_buy, -1.0, 1.0) * deals['profit'] / self.contract_size
+        long_mask_in, short_mask_in = entry & is_buy, entry & ~is_buy
+        long_mask_out, short_mask_out = ~entry & ~is_buy, ~entry & is_buy
+
+        long_volume = np.cumsum(np.where(long_mask_in, volume, 0.0) - np.where(long_mask_out, volume, 0.0))
+        short_volume = np.cumsum(np.where(short_mask_in, volume, 0.0) - np.where(short_mask_out, volume, 0.0))
+        long_cost = np.cumsum(np.where(long_mask_in, volume * price, 0.0) - np.where(long_mask_out, cost_out, 0.0))
+        short_cost = np.cumsum(np.where(short_mask_in, volume * price, 0.0) - np.where(short_mask_out, cost_out, 0.0))
+        balance = self.initial_balance + np.cumsum(deals['profit'])
+
+        # 每筆報價之前 (含) 最後一筆成交的狀態
+        last = np.searchsorted(deals['tick'], ticks, side='right') - 1
+        has_deal = last >= 0
+        last = np.maximum(last, 0)
+        floating = (long_volume[last] * self.bid[ticks] - short_volume[last] * self.ask[ticks]
+                    - long_cost[last] + short_cost[last]) * self.contract_size
+        equity = np.where(has_deal, balance[last] + floating, self.initial_balance)
+        return pd.Series(equity, index=pd.to_datetime(self.time_msc[ticks], unit='ms'), name='equity')
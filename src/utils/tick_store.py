@@ -0,0 +1,327 @@
+"""
+報價儲存模組
+
+此模組提供以附加 (append) 為主的記憶體映射報價儲存：
+1. 固定長度的二進位記錄，欄位與 MT5 報價結構相同 (time_msc, bid, ask, last, volume, flags)
+2. 每個交易品種每天一個檔案
+3. 記錄依 time_msc 排序，時間欄位本身即為索引，以二分搜尋找出範圍
+4. 讀取時回傳 numpy 記憶體映射的視圖，不需要載入整個檔案
+5. 重疊的報價以完整記錄比對去除重複；早於最後一筆記錄的補齊報價會從插入位置起重新寫入檔案
+
+目錄結構:
+    <root>/<symbol>/<YYYYMMDD>.ticks
+"""
+
+import os
+from datetime import datetime
+from typing import Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from .utils import setup_logger
+
+# 報價記錄格式 (緊密排列，每筆 44 bytes)
+TICK_RECORD_DTYPE = np.dtype([
+    ('time_msc', '<i8'),
+    ('bid', '<f8'),
+    ('ask', '<f8'),
+    ('last', '<f8'),
+    ('volume', '<u8'),
+    ('flags', '<u4')
+])
+
+MS_PER_DAY = 86400 * 1000
+
+
+def _to_msc(value: Union[datetime, pd.Timestamp, int]) -> int:
+    """將時間轉換為 Unix 毫秒 (不含時區的時間視為 UTC)"""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert('UTC').tz_localize(None)
+    return int(ts.value // 10**6)
+
+
+def _bisect(times: np.ndarray, value: int, side: str = 'left') -> int:
+    """
+    在已排序的時間欄位上二分搜尋
+
+    np.searchsorted 會先把非連續的欄位視圖複製成連續陣列 (等於讀取整個檔案)，
+    這裡逐一讀取元素，只會觸及 O(log n) 個分頁。
+    """
+    lo, hi = 0, len(times)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        current = times[mid]
+        if current < value or (side == 'right' and current == value):
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _unstored(records: np.ndarray, stored: np.ndarray) -> np.ndarray:
+    """
+    records 中尚未儲存的記錄
+
+    以完整記錄 (所有欄位) 比較，同一毫秒內的多筆報價只要內容不同就會保留；
+    完全相同的記錄依出現次數計算 (records 中多出的次數會保留)。
+    """
+    if len(stored) == 0 or len(records) == 0:
+        return records
+    void = np.dtype((np.void, TICK_RECORD_DTYPE.itemsize))
+    stored_keys = np.ascontiguousarray(stored).view(void)
+    record_keys = np.ascontiguousarray(records).view(void)
+    # 重新下載相同範圍時兩者完全相同，不需要排序比對
+    if len(stored) == len(records) and np.array_equal(stored_keys, record_keys):
+        return records[:0]
+    keys = np.concatenate([stored_keys, record_keys])
+    unique, inverse = np.unique(keys, return_inverse=True)
+    stored_ids, record_ids = inverse[:len(stored)], inverse[len(stored):]
+    stored_counts = np.bincount(stored_ids, minlength=len(unique))
+
+    # 每筆記錄在 records 中相同內容的第幾次出現
+    order = np.argsort(record_ids, kind='stable')
+    sorted_ids = record_ids[order]
+    occurrence = np.empty(len(records), dtype=np.int64)
+    occurrence[order] = np.arange(len(records)) - np.searchsorted(sorted_ids, sorted_ids, side='left')
+    return records[occurrence >= stored_counts[record_ids]]
+
+
+class TickStore:
+    """
+    記憶體映射報價儲存類別
+
+    範例:
+        >>> store = TickStore('data/ticks')
+        >>> store.append("EURUSD", ticks)          # copy_ticks_* 的結果或 get_ticks 的數據框
+        >>> view = store.read("EURUSD", start, end)  # 單日範圍時為零複製視圖
+    """
+
+    FILE_SUFFIX = '.ticks'
+
+    def __init__(self, root_dir: str):
+        """
+        初始化報價儲存
+
+        Args:
+            root_dir (str): 儲存根目錄
+        """
+        self.root_dir = root_dir
+        self.logger = setup_logger('TickStore')
+        os.makedirs(root_dir, exist_ok=True)
+
+    # ---------- 路徑 ----------
+    def _day_path(self, symbol: str, day: int) -> str:
+        """取得某一天 (自 1970-01-01 起的天數) 的檔案路徑"""
+        name = (np.datetime64(day, 'D')).astype(datetime).strftime('%Y%m%d')
+        return os.path.join(self.root_dir, symbol, name + self.FILE_SUFFIX)
+
+    def days(self, symbol: str) -> List[int]:
+        """
+        列出已儲存的日期 (自 1970-01-01 起的天數，依時間排序)
+
+        Args:
+            symbol (str): 交易品種
+
+        Returns:
+            List[int]: 日期列表
+        """
+        symbol_dir = os.path.join(self.root_dir, symbol)
+        if not os.path.isdir(symbol_dir):
+            return []
+        days = []
+        for name in os.listdir(symbol_dir):
+            if name.endswith(self.FILE_SUFFIX):
+                date = datetime.strptime(name[:-len(self.FILE_SUFFIX)], '%Y%m%d')
+                days.append(int(np.datetime64(date, 'D').astype(np.int64)))
+        return sorted(days)
+
+    # ---------- 寫入 ----------
+    @staticmethod
+    def to_records(ticks: Union[np.ndarray, pd.DataFrame]) -> np.ndarray:
+        """
+        將 MT5 報價 (結構化陣列或 get_ticks 的數據框) 轉換為儲存記錄格式
+
+        Args:
+            ticks: 包含 time_msc, bid, ask, last, volume, flags 欄位的報價
+
+        Returns:
+            np.ndarray: TICK_RECORD_DTYPE 格式的陣列
+        """
+        records = np.empty(len(ticks), dtype=TICK_RECORD_DTYPE)
+        for name in TICK_RECORD_DTYPE.names:
+            records[name] = np.asarray(ticks[name])
+        return records
+
+    def _write_day(self, symbol: str, day: int, chunk: np.ndarray) -> int:
+        """
+        將同一天的報價 (已依時間排序) 寫入檔案，回傳實際寫入的筆數
+
+        - 已儲存的記錄略過，最後一筆時間之後 (或同一毫秒內尚未儲存) 的記錄直接附加
+        - 早於最後一筆時間且尚未儲存的記錄 (補齊的報價) 從插入位置起重新寫入檔案，
+          同一毫秒內已儲存的記錄排在前面；插入位置之前的內容不變
+        """
+        path = self._day_path(symbol, day)
+        stored = self.open_day(symbol, day)
+        if len(stored) == 0:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'ab') as f:
+                f.write(chunk.tobytes())
+            return len(chunk)
+
+        last_time = int(stored['time_msc'][-1])
+        overlap = chunk['time_msc'] <= last_time
+        if not overlap.any():
+            with open(path, 'ab') as f:
+                f.write(chunk.tobytes())
+            return len(chunk)
+
+        start = _bisect(stored['time_msc'], int(chunk['time_msc'][0]), 'left')
+        # 複製重疊的部分並釋放記憶體映射，之後才能寫入檔案
+        tail = np.array(stored[start:])
+        del stored
+        missing = _unstored(chunk[overlap], tail)
+        new = np.concatenate([missing, chunk[~overlap]])
+        if len(new) == 0:
+            return 0
+
+        if not np.any(missing['time_msc'] < last_time):
+            with open(path, 'ab') as f:
+                f.write(new.tobytes())
+            return len(new)
+
+        self.logger.warning(
+            f"{symbol} {os.path.basename(path)} 有 {int(np.sum(missing['time_msc'] < last_time))} 筆"
+            f"早於最後一筆記錄的報價，從第 {start} 筆起重新寫入"
+        )
+        merged = np.sort(np.concatenate([tail, new]), order='time_msc', kind='stable')
+        with open(path, 'r+b') as f:
+            f.seek(start * TICK_RECORD_DTYPE.itemsize)
+            f.write(merged.tobytes())
+        return len(new)
+
+    def append(self, symbol: str, ticks: Union[np.ndarray, pd.DataFrame]) -> int:
+        """
+        附加報價，依日期寫入各自的檔案
+
+        重疊的範圍以完整記錄比對，已儲存的報價會被略過，因此重複下載重疊的範圍不會產生重複記錄；
+        與最後一筆記錄同一毫秒但尚未儲存的報價會保留，早於最後一筆記錄的補齊報價會依時間插入。
+
+        Args:
+            symbol (str): 交易品種
+            ticks: 報價數據 (copy_ticks_* 的結構化陣列或 get_ticks 的數據框)
+
+        Returns:
+            int: 實際寫入的筆數
+        """
+        records = self.to_records(ticks)
+        if len(records) == 0:
+            return 0
+        if np.any(np.diff(records['time_msc']) < 0):
+            records = np.sort(records, order='time_msc', kind='stable')
+
+        day_ids = records['time_msc'] // MS_PER_DAY
+        boundaries = np.flatnonzero(np.diff(day_ids)) + 1
+        written = 0
+
+        for chunk in np.split(records, boundaries):
+            written += self._write_day(symbol, int(chunk['time_msc'][0] // MS_PER_DAY), chunk)
+
+        self.logger.info(f"已附加 {symbol} 報價 {written} 筆")
+        return written
+
+    # ---------- 讀取 ----------
+    def open_day(self, symbol: str, day: int) -> np.ndarray:
+        """
+        以記憶體映射開啟某一天的報價 (唯讀)
+
+        Args:
+            symbol (str): 交易品種
+            day (int): 自 1970-01-01 起的天數
+
+        Returns:
+            np.ndarray: TICK_RECORD_DTYPE 格式的記憶體映射陣列，檔案不存在時為空陣列
+        """
+        path = self._day_path(symbol, day)
+        count = os.path.getsize(path) // TICK_RECORD_DTYPE.itemsize if os.path.isfile(path) else 0
+        if count == 0:
+            return np.empty(0, dtype=TICK_RECORD_DTYPE)
+        return np.memmap(path, dtype=TICK_RECORD_DTYPE, mode='r', shape=(count,))
+
+    def iter_read(
+        self,
+        symbol: str,
+        start_time: Optional[Union[datetime, int]] = None,
+        end_time: Optional[Union[datetime, int]] = None
+    ) -> Iterator[np.ndarray]:
+        """
+        依日期逐一回傳時間範圍內的報價視圖 (零複製)
+
+        Args:
+            symbol (str): 交易品種
+            start_time (datetime 或 int, optional): 開始時間 (包含)，整數為 Unix 毫秒
+            end_time (datetime 或 int, optional): 結束時間 (包含)，整數為 Unix 毫秒
+
+        Yields:
+            np.ndarray: 每一天範圍內的記錄視圖
+        """
+        start_msc = _to_msc(start_time) if start_time is not None else None
+        end_msc = _to_msc(end_time) if end_time is not None else None
+
+        for day in self.days(symbol):
+            if start_msc is not None and (day + 1) * MS_PER_DAY <= start_msc:
+                continue
+            if end_msc is not None and day * MS_PER_DAY > end_msc:
+                break
+
+            records = self.open_day(symbol, day)
+            times = records['time_msc']
+            lo = _bisect(times, start_msc, 'left') if start_msc is not None else 0
+            hi = _bisect(times, end_msc, 'right') if end_msc is not None else len(records)
+            if hi > lo:
+                yield records[lo:hi]
+
+    def read(
+        self,
+        symbol: str,
+        start_time: Optional[Union[datetime, int]] = None,
+        end_time: Optional[Union[datetime, int]] = None
+    ) -> np.ndarray:
+        """
+        讀取時間範圍內的報價
+
+        範圍只在同一天內時回傳記憶體映射的零複製視圖；跨越多天時會合併為一個新陣列。
+
+        Args:
+            symbol (str): 交易品種
+            start_time (datetime 或 int, optional): 開始時間 (包含)，整數為 Unix 毫秒
+            end_time (datetime 或 int, optional): 結束時間 (包含)，整數為 Unix 毫秒
+
+        Returns:
+            np.ndarray: TICK_RECORD_DTYPE 格式的記錄
+        """
+        parts = list(self.iter_read(symbol, start_time, end_time))
+        if not parts:
+            return np.empty(0, dtype=TICK_RECORD_DTYPE)
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts)
+
+    @staticmethod
+    def to_dataframe(records: np.ndarray) -> pd.DataFrame:
+        """
+        將記錄轉換為與 MT5History.get_ticks 相同格式的數據框
+
+        Args:
+            records (np.ndarray): TICK_RECORD_DTYPE 格式的記錄
+
+        Returns:
+            pd.DataFrame: 以時間為索引的報價數據
+        """
+        df = pd.DataFrame({name: records[name] for name in TICK_RECORD_DTYPE.names})
+        df.insert(0, 'time', pd.to_datetime(records['time_msc'] // 1000, unit='s'))
+        df.set_index('time', inplace=True)
+        return df
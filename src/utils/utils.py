@@ -4,13 +4,28 @@
 此模組提供了專案中常用的工具函數，包括：
 - 專案路徑管理
 - 日誌設置
+- 峰值記憶體量測
 - 其他通用功能
 """
 
 import logging
 import os
-from datetime import datetime
-from typing import Optional
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+# MT5 時間週期對應的 K 線長度 (W1、MN1 取最長可能長度)
+TIMEFRAME_DELTAS: Dict[str, timedelta] = {
+    'M1': timedelta(minutes=1),
+    'M5': timedelta(minutes=5),
+    'M15': timedelta(minutes=15),
+    'M30': timedelta(minutes=30),
+    'H1': timedelta(hours=1),
+    'H4': timedelta(hours=4),
+    'D1': timedelta(days=1),
+    'W1': timedelta(weeks=1),
+    'MN1': timedelta(days=31)
+}
 
 def get_project_root() -> str:
     """
@@ -84,3 +99,47 @@ def setup_logger(
     return logger
 
 
+class PeakMemoryTracker:
+    """
+    峰值記憶體量測 (context manager)
+    
+    使用 tracemalloc 量測區塊內 Python 與 numpy/pandas 配置的峰值記憶體 (相對於進入區塊時)。
+    巢狀使用時內層會重設外層的峰值，因此只在最外層量測整個流程。
+    
+    Example:
+        >>> with PeakMemoryTracker('數據處理鏈') as tracker:
+        ...     df = processor.process_chain(df)
+        >>> tracker.peak_mb
+    """
+    
+    def __init__(self, label: str, logger: Optional[logging.Logger] = None):
+        """
+        Args:
+            label (str): 記錄在日誌中的名稱
+            logger (logging.Logger, optional): 日誌記錄器，預設為 'PeakMemoryTracker'
+        """
+        self.label = label
+        self.logger = logger or setup_logger('PeakMemoryTracker')
+        self.peak_bytes = 0
+        self._baseline = 0
+        self._started = False
+    
+    @property
+    def peak_mb(self) -> float:
+        """峰值記憶體 (MB)"""
+        return self.peak_bytes / (1024 * 1024)
+    
+    def __enter__(self) -> 'PeakMemoryTracker':
+        self._started = not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._baseline = tracemalloc.get_traced_memory()[0]
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        peak = tracemalloc.get_traced_memory()[1]
+        self.peak_bytes = max(peak - self._baseline, 0)
+        if self._started:
+            tracemalloc.stop()
+        self.logger.info(f"{self.label} 峰值記憶體: {self.peak_mb:.1f} MB")
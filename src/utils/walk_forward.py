@@ -0,0 +1,330 @@
+"""
+滾動前進 (walk-forward) 優化模組
+
+此模組將處理後的時間序列切分為滾動的訓練/測試區間，並以行程池平行評估每個 (區間, 參數組合)：
+1. WalkForwardSplitter: 依 K 線數量切分，訓練與測試之間保留 purge 間隔 (訓練資料的標籤不會看到測試期間)，
+   每個測試區間之後保留 embargo 間隔 (相鄰的測試區間不相連，避免序列相關讓樣本外結果偏高)
+2. SharedArrays: 價格與特徵陣列只放入共享記憶體一次，工作行程直接取得零複製的 numpy 視圖，
+   不需要序列化 (pickle) 數據框；每個任務只傳送區間與參數
+3. WalkForwardRunner: 以行程池執行所有任務，彙整結果並依訓練期間的成績選出每個區間的最佳參數
+
+評估函數必須是模組層級的函數 (可被 pickle)，簽名為:
+    evaluate(arrays: Dict[str, np.ndarray], train: slice, test: slice, params: Dict) -> Dict[str, float]
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .utils import setup_logger
+
+# 由行程池初始化函數設定，工作行程中共享陣列的視圖
+_worker_arrays: Optional[Dict[str, np.ndarray]] = None
+_worker_handles: List[shared_memory.SharedMemory] = []
+
+
+@dataclass(frozen=True)
+class Fold:
+    """單一訓練/測試區間 (以位置表示)"""
+    index: int
+    train: slice
+    test: slice
+
+
+class WalkForwardSplitter:
+    """
+    滾動前進切分類別
+
+    每個區間的配置為:
+        [訓練 train_size] [purge] [測試 test_size] [embargo]
+    下一個區間向後移動 step 根 K 線 (預設為 test_size + embargo，測試區間互不重疊)。
+
+    範例:
+        >>> splitter = WalkForwardSplitter(train_size=50000, test_size=10000, purge=100, embargo=50)
+        >>> for fold in splitter.split(len(df)):
+        ...     train, test = df.iloc[fold.train], df.iloc[fold.test]
+    """
+
+    def __init__(
+        self,
+        train_size: int,
+        test_size: int,
+        purge: int = 0,
+        embargo: int = 0,
+        step: Optional[int] = None,
+        anchored: bool = False
+    ):
+        """
+        初始化切分器
+
+        Args:
+            train_size (int): 訓練區間長度 (anchored=True 時為第一個區間的長度)
+            test_size (int): 測試區間長度
+            purge (int): 訓練與測試之間移除的 K 線數量 (至少為標籤或指標向前看的長度)
+            embargo (int): 測試區間之後跳過的 K 線數量
+            step (int, optional): 每個區間移動的 K 線數量，預設為 test_size + embargo
+            anchored (bool): 訓練區間是否固定從序列開頭開始 (擴張視窗)
+        """
+        if train_size < 1 or test_size < 1:
+            raise ValueError("train_size 與 test_size 必須大於 0")
+        if purge < 0 or embargo < 0:
+            raise ValueError("purge 與 embargo 不可為負數")
+        self.train_size = train_size
+        self.test_size = test_size
+        self.purge = purge
+        self.embargo = embargo
+        self.step = step or test_size + embargo
+        self.anchored = anchored
+
+    def split(self, n: int) -> List[Fold]:
+        """
+        切分長度為 n 的序列
+
+        Args:
+            n (int): K 線數量
+
+        Returns:
+            List[Fold]: 所有完整的區間 (測試區間不足 test_size 的最後一段不使用)
+        """
+        folds = []
+        start = 0
+        while True:
+            train_start = 0 if self.anchored else start
+            train_end = start + self.train_size
+            test_start = train_end + self.purge
+            test_end = test_start + self.test_size
+            if test_end > n:
+                break
+            folds.append(Fold(len(folds), slice(train_start, train_end), slice(test_start, test_end)))
+            start += self.step
+        return folds
+
+    def summary(self, index: pd.Index) -> pd.DataFrame:
+        """
+        以時間表示所有區間
+
+        Args:
+            index (pd.Index): 序列的時間索引
+
+        Returns:
+            pd.DataFrame: 每個區間一列 (train_start, train_end, test_start, test_end)
+        """
+        return pd.DataFrame([
+            {'fold': fold.index,
+             'train_start': index[fold.train.start], 'train_end': index[fold.train.stop - 1],
+             'test_start': index[fold.test.start], 'test_end': index[fold.test.stop - 1]}
+            for fold in self.split(len(index))
+        ])
+
+
+class SharedArrays:
+    """
+    共享記憶體陣列類別
+
+    建立者負責釋放 (close 或 with 區塊結束時 unlink)；工作行程以 specs 附加，只取得視圖。
+
+    範例:
+        >>> with SharedArrays({'close': close, 'features': X}) as shared:
+        ...     arrays = shared.arrays          # 主行程的視圖
+        ...     specs = shared.specs           # 可傳給工作行程 (只包含名稱、形狀與型別)
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        """
+        將陣列複製到共享記憶體 (只複製一次)
+
+        Args:
+            arrays (Dict[str, np.ndarray]): 名稱對應的數值陣列
+        """
+        self._handles: List[shared_memory.SharedMemory] = []
+        self.arrays: Dict[str, np.ndarray] = {}
+        self.specs: Dict[str, Tuple[str, Tuple[int, ...], str]] = {}
+        try:
+            for name, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                if array.dtype == object:
+                    raise ValueError(f"陣列 {name} 不可為 object 型別")
+                handle = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                self._handles.append(handle)
+                view = np.ndarray(array.shape, dtype=array.dtype, buffer=handle.buf)
+                view[...] = array
+                view.flags.writeable = False
+                self.arrays[name] = view
+                self.specs[name] = (handle.name, array.shape, array.dtype.str)
+        except Exception:
+            self.close()
+            raise
+
+    @property
+    def nbytes(self) -> int:
+        """共享陣列的總大小"""
+        return sum(array.nbytes for array in self.arrays.values())
+
+    @staticmethod
+    def attach(specs: Dict[str, Tuple[str, Tuple[int, ...], str]]) -> Tuple[Dict[str, np.ndarray], List]:
+        """
+        在其他行程附加共享陣列
+
+        Args:
+            specs: SharedArrays.specs
+
+        Returns:
+            Tuple: (名稱對應的唯讀視圖, 共享記憶體物件 (必須保留直到不再使用視圖))
+        """
+        arrays, handles = {}, []
+        for name, (shm_name, shape, dtype) in specs.items():
+            handle = shared_memory.SharedMemory(name=shm_name)
+            handles.append(handle)
+            view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=handle.buf)
+            view.flags.writeable = False
+            arrays[name] = view
+        return arrays, handles
+
+    def close(self) -> None:
+        """釋放共享記憶體"""
+        self.arrays = {}
+        for handle in self._handles:
+            handle.close()
+            try:
+                handle.unlink()
+            except FileNotFoundError:
+                pass
+        self._handles = []
+
+    def __enter__(self) -> 'SharedArrays':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def _init_worker(specs) -> None:
+    """行程池初始化函數：附加共享陣列 (每個工作行程只執行一次)"""
+    global _worker_arrays, _worker_handles
+    _worker_arrays, _worker_handles = SharedArrays.attach(specs)
+
+
+def _run_batch(
+    evaluate: Callable,
+    fold: Fold,
+    param_sets: List[Tuple[int, Dict[str, Any]]]
+) -> List[Dict[str, Any]]:
+    """在工作行程中評估同一個區間的多組參數"""
+    rows = []
+    for param_id, params in param_sets:
+        row = {'fold': fold.index, 'param_id': param_id}
+        started = time.perf_counter()
+        try:
+            row.update(evaluate(_worker_arrays, fold.train, fold.test, params))
+        except Exception as e:
+            row['error'] = str(e)
+        row['seconds'] = time.perf_counter() - started
+        rows.append(row)
+    return rows
+
+
+class WalkForwardRunner:
+    """
+    平行滾動前進優化執行器類別
+
+    範例:
+        >>> def evaluate(arrays, train, test, params):          # 模組層級的函數
+        ...     ...
+        ...     return {'train_sharpe': ..., 'test_sharpe': ...}
+        >>> runner = WalkForwardRunner(evaluate, WalkForwardSplitter(50000, 10000, purge=100), max_workers=8)
+        >>> results = runner.run({'open': o, 'close': c, 'spread': s}, param_grid)
+        >>> runner.best_per_fold(results, 'train_sharpe')
+    """
+
+    def __init__(
+        self,
+        evaluate: Callable,
+        splitter: WalkForwardSplitter,
+        max_workers: Optional[int] = None,
+        batch_size: int = 16
+    ):
+        """
+        初始化執行器
+
+        Args:
+            evaluate (Callable): 評估函數 (必須可被 pickle)
+            splitter (WalkForwardSplitter): 切分器
+            max_workers (int, optional): 工作行程數量，預設為 CPU 核心數
+            batch_size (int): 每個任務包含的參數組合數量 (減少任務排程的開銷)
+        """
+        self.logger = setup_logger('WalkForwardRunner')
+        self.evaluate = evaluate
+        self.splitter = splitter
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.batch_size = max(batch_size, 1)
+
+    def run(self, arrays: Dict[str, np.ndarray], param_grid: List[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        評估所有 (區間, 參數組合)
+
+        Args:
+            arrays (Dict[str, np.ndarray]): 價格與特徵陣列 (第一個維度為時間，長度必須相同)
+            param_grid (List[Dict]): 參數組合列表
+
+        Returns:
+            pd.DataFrame: 每個 (區間, 參數組合) 一列，包含參數與評估函數回傳的指標
+        """
+        lengths = {len(array) for array in arrays.values()}
+        if len(lengths) != 1:
+            raise ValueError("所有陣列的長度必須相同")
+        folds = self.splitter.split(lengths.pop())
+        if not folds or not param_grid:
+            self.logger.warning("沒有可評估的區間或參數組合")
+            return pd.DataFrame()
+
+        indexed = list(enumerate(param_grid))
+        batches = [(fold, indexed[i:i + self.batch_size]) for fold in folds
+                   for i in range(0, len(indexed), self.batch_size)]
+        workers = min(self.max_workers, len(batches))
+        started = time.perf_counter()
+        rows: List[Dict[str, Any]] = []
+
+        with SharedArrays(arrays) as shared:
+            self.logger.info(
+                f"開始滾動前進優化: {len(folds)} 個區間 × {len(param_grid)} 組參數，"
+                f"工作行程 {workers}，共享陣列 {shared.nbytes / 1024 ** 2:.1f} MB"
+            )
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(shared.specs,)) as executor:
+                futures = [executor.submit(_run_batch, self.evaluate, fold, batch) for fold, batch in batches]
+                for future in as_completed(futures):
+                    rows.extend(future.result())
+
+        results = pd.DataFrame(rows)
+        params = pd.DataFrame(param_grid)
+        params.index.name = 'param_id'
+        results = results.join(params, on='param_id').sort_values(['fold', 'param_id'], ignore_index=True)
+        if 'error' in results.columns:
+            failed = results['error'].notna().sum()
+            if failed:
+                self.logger.error(f"{failed} 個評估失敗，例如: {results['error'].dropna().iloc[0]}")
+        self.logger.info(f"滾動前進優化完成，耗時 {time.perf_counter() - started:.1f} 秒")
+        return results
+
+    @staticmethod
+    def best_per_fold(results: pd.DataFrame, metric: str, maximize: bool = True) -> pd.DataFrame:
+        """
+        依訓練期間的指標選出每個區間的最佳參數 (其測試期間指標即為樣本外結果)
+
+        Args:
+            results (pd.DataFrame): run() 的回傳值
+            metric (str): 選擇依據的指標欄位 (應為訓練期間的指標)
+            maximize (bool): 指標越大越好
+
+        Returns:
+            pd.DataFrame: 每個區間一列
+        """
+        valid = results.dropna(subset=[metric])
+        positions = valid.groupby('fold')[metric].idxmax() if maximize else valid.groupby('fold')[metric].idxmin()
+        return valid.loc[positions.to_numpy()].reset_index(drop=True)